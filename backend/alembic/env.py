@@ -29,11 +29,13 @@ from app.db.base import Base  # noqa
 # Import "à vide" pour enregistrer les modèles dans Base.metadata
 import app.models.user  # noqa
 import app.models.item  # noqa
+import app.models.swat  # noqa
 target_metadata = Base.metadata
 
 def run_migrations_offline():
     url = config.get_main_option("sqlalchemy.url")
-    context.configure(url=url, target_metadata=target_metadata, literal_binds=True, dialect_opts={"paramstyle": "named"})
+    context.configure(url=url, target_metadata=target_metadata, literal_binds=True,
+                      dialect_opts={"paramstyle": "named"}, include_schemas=True)
     with context.begin_transaction():
         context.run_migrations()
 
@@ -44,7 +46,7 @@ def run_migrations_online():
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_schemas=True)
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,243 @@
+#  backend/alembic/versions
+"""Schéma swat_sebou : tables des modèles, scénarios, résultats et entrées SWAT.
+
+Les tables déjà créées par l'ETL (ensure_swat_schema) sont laissées telles
+quelles (les tables de résultats non partitionnées sont converties par
+0006). Les partitions annuelles sont créées à l'import
+(swat_schema.ensure_year_partitions).
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0002_swat_schema'
+down_revision = '0001_init'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'swat_sebou'
+PARTITIONED = {'postgresql_partition_by': 'RANGE (date)'}
+
+
+def _scenario_fk(primary_key=True):
+    return sa.Column('scenario_id', sa.Integer,
+                     sa.ForeignKey('swat_sebou.swat_scenarios.id', ondelete='CASCADE'),
+                     primary_key=primary_key, nullable=False)
+
+
+def _values(*names):
+    return [sa.Column(n, sa.Double) for n in names]
+
+
+def _create(name, *columns, **kw):
+    if not sa.inspect(op.get_bind()).has_table(name, schema=SCHEMA):
+        op.create_table(name, *columns, schema=SCHEMA, **kw)
+
+
+def upgrade():
+    op.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+
+    _create(
+        'swat_models',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.Text, nullable=False),
+        sa.Column('version', sa.Text),
+        sa.Column('description', sa.Text),
+    )
+    _create(
+        'swat_scenarios',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('model_id', sa.Integer, sa.ForeignKey('swat_sebou.swat_models.id', ondelete='SET NULL')),
+        sa.Column('name', sa.Text, nullable=False),
+        sa.Column('description', sa.Text),
+        sa.Column('start_date', sa.Date),
+        sa.Column('end_date', sa.Date),
+        sa.Column('timestep', sa.String(16)),
+    )
+
+    # --- Résultats (partitionnés par année) ---
+    _create(
+        'swat_subbasin_results',
+        sa.Column('id', sa.BigInteger, primary_key=True, autoincrement=True),
+        _scenario_fk(primary_key=False),
+        sa.Column('subbasin', sa.Integer, nullable=False),
+        sa.Column('date', sa.Date, primary_key=True),
+        *_values('precip', 'surq', 'gw_q', 'wyld', 'sedp', 'orgn', 'solp'),
+        **PARTITIONED,
+    )
+    _create(
+        'swat_reach_results',
+        sa.Column('id', sa.BigInteger, primary_key=True, autoincrement=True),
+        _scenario_fk(primary_key=False),
+        sa.Column('reach', sa.Integer, nullable=False),
+        sa.Column('date', sa.Date, primary_key=True),
+        *_values('flow_in', 'flow_out', 'sed_in', 'sed_out', 'no3_out', 'orgp_out', 'chla_out'),
+        **PARTITIONED,
+    )
+    _create(
+        'swat_sediment_results',
+        _scenario_fk(),
+        sa.Column('reach', sa.Integer, primary_key=True),
+        sa.Column('date', sa.Date, primary_key=True),
+        *_values('sed_in', 'sed_out', 'sand_in', 'sand_out', 'silt_in', 'silt_out', 'clay_in', 'clay_out',
+                 'smag_in', 'smag_out', 'lag_in', 'lag_out', 'gra_in', 'gra_out',
+                 'ch_bnk', 'ch_bed', 'ch_dep', 'fp_dep', 'tss'),
+        **PARTITIONED,
+    )
+    _create(
+        'swat_outlet_results',
+        _scenario_fk(),
+        sa.Column('reach', sa.Integer, primary_key=True),
+        sa.Column('date', sa.Date, primary_key=True),
+        *_values('flow', 'sed', 'orgn', 'orgp', 'no3', 'nh3', 'no2', 'minp', 'cbod', 'disox', 'chla',
+                 'solpst', 'sorpst', 'bactp', 'bactlp', 'temp'),
+        **PARTITIONED,
+    )
+    _create(
+        'swat_reservoir_results',
+        _scenario_fk(),
+        sa.Column('res', sa.Integer, primary_key=True),
+        sa.Column('date', sa.Date, primary_key=True),
+        *_values('volume', 'flow_in', 'flow_out', 'precip', 'evap', 'seepage', 'sed_in', 'sed_out', 'sed_conc'),
+    )
+
+    # --- Import incrémental, réservoirs, stations ---
+    _create(
+        'swat_import_files',
+        _scenario_fk(),
+        sa.Column('file_name', sa.Text, primary_key=True),
+        sa.Column('sha256', sa.String(64), nullable=False),
+        sa.Column('size', sa.BigInteger, nullable=False),
+        sa.Column('mtime_ns', sa.BigInteger, nullable=False),
+        sa.Column('rows', sa.BigInteger),
+        sa.Column('imported_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    _create(
+        'swat_reservoirs',
+        sa.Column('res', sa.Integer, primary_key=True),
+        sa.Column('subbasin', sa.Integer),
+        sa.Column('barrage_id', sa.Integer, index=True),
+    )
+    _create(
+        'swat_station_reach',
+        sa.Column('station_id', sa.Integer, primary_key=True),
+        sa.Column('reach', sa.Integer, nullable=False),
+        sa.Index('ix_swat_station_reach_reach', 'reach', 'station_id'),
+    )
+
+    # --- Entrées et topologie ---
+    _create(
+        'swat_hrus',
+        _scenario_fk(),
+        sa.Column('hru', sa.Integer, primary_key=True),
+        sa.Column('subbasin', sa.Integer, nullable=False),
+        sa.Column('hru_sub', sa.Integer, nullable=False),
+        sa.Column('landuse', sa.Text),
+        sa.Column('soil', sa.Text),
+        sa.Column('slope', sa.Text),
+        sa.Column('hydgrp', sa.String(4)),
+        sa.Index('ix_swat_hrus_subbasin', 'scenario_id', 'subbasin'),
+        sa.Index('ix_swat_hrus_landuse', 'scenario_id', 'landuse'),
+        sa.Index('ix_swat_hrus_soil', 'scenario_id', 'soil'),
+    )
+    _create(
+        'swat_input_params',
+        _scenario_fk(),
+        sa.Column('file_type', sa.String(4), primary_key=True),
+        sa.Column('param', sa.String(16), primary_key=True),
+        sa.Column('subbasin', sa.Integer, primary_key=True),
+        sa.Column('hru', sa.Integer, primary_key=True),
+        sa.Column('idx', sa.SmallInteger, primary_key=True),
+        sa.Column('value', sa.Double),
+        sa.Index('ix_swat_input_params_subbasin', 'scenario_id', 'subbasin', 'hru'),
+        sa.Index('ix_swat_input_params_hru', 'scenario_id', 'hru'),
+    )
+    _create(
+        'swat_reaches',
+        _scenario_fk(),
+        sa.Column('reach', sa.Integer, primary_key=True),
+        sa.Column('downstream', sa.Integer),
+        sa.Column('area_km2', sa.Double),
+        sa.Column('drainage_km2', sa.Double),
+    )
+    _create(
+        'swat_reach_upstream',
+        _scenario_fk(),
+        sa.Column('reach', sa.Integer, primary_key=True),
+        sa.Column('upstream', sa.Integer, primary_key=True),
+        sa.Column('area_km2', sa.Double),
+        sa.Index('ix_swat_reach_upstream_upstream', 'scenario_id', 'upstream'),
+    )
+    _create(
+        'swat_climate_stations',
+        _scenario_fk(),
+        sa.Column('source', sa.Text, primary_key=True),
+        sa.Column('station', sa.Integer, primary_key=True),
+        sa.Column('name', sa.Text),
+        sa.Column('lat', sa.Double),
+        sa.Column('lon', sa.Double),
+        sa.Column('elev', sa.Double),
+    )
+    _create(
+        'swat_climate_forcing',
+        _scenario_fk(),
+        sa.Column('source', sa.Text, primary_key=True),
+        sa.Column('station', sa.Integer, primary_key=True),
+        sa.Column('date', sa.Date, primary_key=True),
+        *_values('pcp', 'tmax', 'tmin'),
+    )
+
+    # --- Tables dérivées (synthèse, séries compactes) ---
+    _create(
+        'swat_subbasin_summary',
+        _scenario_fk(),
+        sa.Column('param', sa.String(16), primary_key=True),
+        sa.Column('subbasin', sa.Integer, primary_key=True),
+        *_values('mean', 'min', 'max', 'p10', 'p50', 'p90'),
+        sa.Column('n', sa.Integer),
+        sa.Column('monthly', postgresql.ARRAY(sa.Double)),
+    )
+    _create(
+        'swat_packed_series',
+        _scenario_fk(),
+        sa.Column('source', sa.String(40), primary_key=True),
+        sa.Column('unit', sa.Integer, primary_key=True),
+        sa.Column('variable', sa.String(20), primary_key=True),
+        sa.Column('year', sa.SmallInteger, primary_key=True),
+        sa.Column('step', sa.String(5), nullable=False),
+        sa.Column('start_date', sa.Date, nullable=False),
+        sa.Column('vals', postgresql.ARRAY(sa.REAL), nullable=False),
+        sa.CheckConstraint("step IN ('day', 'month', 'year')", name='ck_swat_packed_series_step'),
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION swat_sebou.packed_unnest(p_vals real[], p_start date, p_step text)
+        RETURNS TABLE (date date, value real)
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT (p_start + (v.i - 1) * ('1 ' || p_step)::interval)::date, v.value
+            FROM unnest(p_vals) WITH ORDINALITY AS v(value, i)
+        $$
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION swat_sebou.packed_window(
+            p_scenario int, p_source text, p_units int[], p_variables text[],
+            p_start date DEFAULT NULL, p_end date DEFAULT NULL)
+        RETURNS TABLE (unit int, variable text, date date, value real)
+        LANGUAGE sql STABLE AS $$
+            SELECT p.unit, p.variable, u.date, u.value
+            FROM swat_sebou.swat_packed_series p
+            CROSS JOIN LATERAL swat_sebou.packed_unnest(p.vals, p.start_date, p.step) u
+            WHERE p.scenario_id = p_scenario
+              AND p.source = p_source
+              AND (p_units IS NULL OR p.unit = ANY(p_units))
+              AND p.variable = ANY(p_variables)
+              AND (p_start IS NULL OR p.year >= EXTRACT(YEAR FROM p_start))
+              AND (p_end IS NULL OR p.year <= EXTRACT(YEAR FROM p_end))
+              AND (p_start IS NULL OR u.date >= p_start)
+              AND (p_end IS NULL OR u.date <= p_end)
+        $$
+    """)
+
+
+def downgrade():
+    op.execute("DROP SCHEMA IF EXISTS swat_sebou CASCADE")
@@ -0,0 +1,81 @@
+#  backend/alembic/versions
+"""Clés naturelles couvrantes et index BRIN des tables de résultats SWAT.
+
+- (scenario_id, unité, date) unique sur swat_subbasin_results et
+  swat_reach_results, avec les variables en INCLUDE : les séries de
+  api/v1/swat.py sont lues par parcours d'index seul et les imports peuvent
+  passer en INSERT ... ON CONFLICT ;
+- BRIN sur date (tables remplies dans l'ordre chronologique) pour les
+  agrégats par fenêtre de dates.
+
+Sur une table partitionnée, la contrainte et les index sont propagés à
+toutes les partitions annuelles, existantes et futures.
+
+Les bases alimentées avant l'import par table de transit contiennent des
+doublons (scénario, unité, date) laissés par les ré-imports : ils sont
+supprimés avant la pose de la contrainte, en gardant la ligne la plus récente
+(id le plus grand, celle du dernier import).
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_swat_indexes'
+down_revision = '0002_swat_schema'
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger('alembic.runtime.migration')
+
+UNIQUE_KEYS = {
+    'swat_subbasin_results': ('subbasin', ['precip', 'surq', 'gw_q', 'wyld', 'sedp', 'orgn', 'solp']),
+    'swat_reach_results': ('reach', ['flow_in', 'flow_out', 'sed_in', 'sed_out', 'no3_out', 'orgp_out', 'chla_out']),
+}
+BRIN_TABLES = ('swat_subbasin_results', 'swat_reach_results', 'swat_sediment_results', 'swat_outlet_results')
+
+
+def upgrade():
+    # Les bases créées par ensure_swat_schema après cette révision ont déjà clés et index
+    insp = sa.inspect(op.get_bind())
+    # Remplacé par la clé unique (scenario_id, reach, date)
+    op.execute("DROP INDEX IF EXISTS swat_sebou.ix_swat_reach_results_scen_reach_date")
+    for table, (unit, include) in UNIQUE_KEYS.items():
+        if f'uq_{table}_key' in {c['name'] for c in insp.get_unique_constraints(table, schema='swat_sebou')}:
+            continue
+        _drop_duplicates(table, unit)
+        op.execute(f"""
+            ALTER TABLE swat_sebou.{table}
+            ADD CONSTRAINT uq_{table}_key UNIQUE (scenario_id, {unit}, date)
+            INCLUDE ({", ".join(include)})
+        """)
+    for table in BRIN_TABLES:
+        if f'ix_{table}_date_brin' in {i['name'] for i in insp.get_indexes(table, schema='swat_sebou')}:
+            continue
+        op.create_index(f'ix_{table}_date_brin', table, ['date'], schema='swat_sebou', postgresql_using='brin')
+
+
+def _drop_duplicates(table, unit):
+    """Garde une ligne par (scenario_id, unité, date) : celle du dernier import."""
+    deleted = op.get_bind().execute(sa.text(f"""
+        DELETE FROM swat_sebou.{table} t
+        USING (
+            SELECT id, date
+            FROM (
+                SELECT id, date, row_number() OVER (
+                    PARTITION BY scenario_id, {unit}, date ORDER BY id DESC) AS rn
+                FROM swat_sebou.{table}
+            ) d
+            WHERE d.rn > 1
+        ) dup
+        WHERE t.id = dup.id AND t.date = dup.date
+    """)).rowcount
+    if deleted:
+        log.info("%s : %s doublons (scenario_id, %s, date) supprimés", table, deleted, unit)
+
+
+def downgrade():
+    for table in reversed(BRIN_TABLES):
+        op.drop_index(f'ix_{table}_date_brin', table_name=table, schema='swat_sebou')
+    for table in UNIQUE_KEYS:
+        op.drop_constraint(f'uq_{table}_key', table, schema='swat_sebou', type_='unique')
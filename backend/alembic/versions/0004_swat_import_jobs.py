@@ -0,0 +1,42 @@
+#  backend/alembic/versions
+"""Travaux d'import SWAT déposés via l'API (swat_sebou.swat_import_jobs).
+
+L'état des imports en arrière-plan est partagé par tous les processus API.
+La table a pu être créée avant cette révision, par app.etl.swat_jobs au premier dépôt.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0004_swat_import_jobs'
+down_revision = '0003_swat_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('swat_import_jobs', schema='swat_sebou'):
+        return
+    op.create_table(
+        'swat_import_jobs',
+        sa.Column('id', sa.String(32), primary_key=True),
+        sa.Column('scenario', sa.Text, nullable=False),
+        sa.Column('status', sa.String(10), nullable=False),
+        sa.Column('owner', sa.Text, nullable=False),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True)),
+        sa.Column('finished_at', sa.DateTime(timezone=True)),
+        sa.Column('seconds', sa.Double),
+        sa.Column('scenario_id', sa.Integer),
+        sa.Column('rows', sa.BigInteger, nullable=False, server_default='0'),
+        sa.Column('files', postgresql.JSONB, nullable=False, server_default='{}'),
+        sa.Column('error', sa.Text),
+        sa.CheckConstraint("status IN ('uploading', 'queued', 'running', 'done', 'failed')",
+                           name='ck_swat_import_jobs_status'),
+        sa.Index('ix_swat_import_jobs_submitted', 'submitted_at'),
+        schema='swat_sebou',
+    )
+
+
+def downgrade():
+    op.drop_table('swat_import_jobs', schema='swat_sebou')
@@ -0,0 +1,23 @@
+#  backend/alembic/versions
+"""Imports SWAT exécutés hors de l'API (python -m app.etl.swat_jobs).
+
+Le nombre de processus de lecture demandé au dépôt est enregistré avec le
+travail : c'est le processus d'import, et non plus l'API, qui le lit.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005_swat_import_workers'
+down_revision = '0004_swat_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('swat_import_jobs', schema='swat_sebou')}
+    if 'workers' not in columns:
+        op.add_column('swat_import_jobs', sa.Column('workers', sa.Integer), schema='swat_sebou')
+
+
+def downgrade():
+    op.drop_column('swat_import_jobs', 'workers', schema='swat_sebou')
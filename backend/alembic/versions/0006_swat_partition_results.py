@@ -0,0 +1,109 @@
+#  backend/alembic/versions
+"""Conversion des tables de résultats SWAT existantes en tables partitionnées par année.
+
+Les bases créées avant le partitionnement gardent des tables simples (0002
+ne touche pas aux tables existantes) : aucune requête par fenêtre de dates
+n'y profite de l'élagage des partitions. Chaque table encore simple est
+recopiée dans une table partitionnée (RANGE sur date, une partition
+`<table>_y<année>` par année présente), puis les deux sont échangées :
+
+- la table est verrouillée (ACCESS EXCLUSIVE) pendant la copie ;
+- l'espace disque de la table est nécessaire une seconde fois le temps de
+  la copie ;
+- contraintes et index sont reposés sous leur nom ; une clé primaire ou une
+  contrainte unique sans la date la reçoit en dernière colonne (obligatoire
+  sur une table partitionnée) ;
+- la séquence de `id` est conservée.
+
+La conversion n'est pas annulée par downgrade.
+"""
+import logging
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_swat_partition_results'
+down_revision = '0005_swat_import_workers'
+branch_labels = None
+depends_on = None
+
+log = logging.getLogger('alembic.runtime.migration')
+
+SCHEMA = 'swat_sebou'
+TABLES = ('swat_subbasin_results', 'swat_reach_results', 'swat_sediment_results', 'swat_outlet_results')
+
+
+def upgrade():
+    bind = op.get_bind()
+    for name in TABLES:
+        kind = bind.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"),
+                            {"t": f"{SCHEMA}.{name}"}).scalar()
+        if kind == 'r':
+            _partition(bind, name)
+
+
+def _partition(bind, name):
+    table, part = f"{SCHEMA}.{name}", f"{SCHEMA}.{name}__part"
+    op.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+    constraints = bind.execute(sa.text("""
+        SELECT conname, contype, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = CAST(:t AS regclass) AND contype IN ('p', 'u', 'f', 'c')
+        ORDER BY contype = 'f', conname
+    """), {"t": table}).all()
+    indexes = bind.execute(sa.text("""
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = :s AND i.tablename = :n
+          AND i.indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = CAST(:t AS regclass))
+    """), {"s": SCHEMA, "n": name, "t": table}).all()
+    sequence = None
+    if 'id' in {c['name'] for c in sa.inspect(bind).get_columns(name, schema=SCHEMA)}:
+        sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": table}).scalar()
+    years = bind.execute(sa.text(
+        f"SELECT DISTINCT EXTRACT(YEAR FROM date)::int FROM {table} WHERE date IS NOT NULL ORDER BY 1"
+    )).scalars().all()
+
+    op.execute(f"CREATE TABLE {part} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+    for year in years:
+        op.execute(f"""
+            CREATE TABLE {table}_y{year} PARTITION OF {part}
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+        """)
+    rows = bind.execute(sa.text(f"INSERT INTO {part} SELECT * FROM {table}")).rowcount
+    if sequence:
+        # La séquence appartient à l'ancienne colonne id : elle disparaîtrait avec elle
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {part} RENAME TO {name}")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+
+    for con in constraints:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {con.conname} {_with_date(con.contype, con.definition)}")
+    for idx in indexes:
+        if idx.indexdef.startswith('CREATE UNIQUE') and 'date' not in _key_columns(idx.indexdef):
+            log.warning("Index unique %s sans la date ignoré (impossible sur une table partitionnée)",
+                        idx.indexname)
+            continue
+        op.execute(idx.indexdef)
+    log.info("%s partitionnée : %d lignes, %d partitions annuelles", table, rows, len(years))
+
+
+def _key_columns(definition):
+    match = re.search(r"\(([^)]*)\)", definition)
+    return [c.strip() for c in match.group(1).split(',')] if match else []
+
+
+def _with_date(contype, definition):
+    """Clé primaire ou unique : la clé de partition (date) doit en faire partie."""
+    if contype in ('p', 'u') and 'date' not in _key_columns(definition):
+        return re.sub(r"\(([^)]*)\)", r"(\1, date)", definition, count=1)
+    return definition
+
+
+def downgrade():
+    # Conversion irréversible : le schéma partitionné est celui des modèles
+    pass
@@ -11,6 +11,8 @@ from app.api.v1.raw import router as raw_router
 
 from app.api.v1 import swat
 from app.api.v1 import swat_analysis
+from app.api.v1 import swat_inputs
+from app.api.v1 import swat_jobs
 
 from app.routers import hydro, quality, climate
 
@@ -57,3 +59,5 @@ api_router.include_router(quality.router, prefix="/quality", tags=["Quality"])
 api_router.include_router(swat_router, tags=["swat"])
 api_router.include_router(swat.router)
 api_router.include_router(swat_analysis.router)
+api_router.include_router(swat_inputs.router)
+api_router.include_router(swat_jobs.router)
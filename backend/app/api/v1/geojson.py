@@ -1,6 +1,7 @@
 #backend/app/api/v1/geojson.py
 import os
 from fastapi import APIRouter, HTTPException
+from app.core.geojson_stream import stream_raw
 from app.db_raw import connection
 from app.util_dbmeta import get_geom_column, table_exists, find_first_table_like
 
@@ -40,29 +41,41 @@ def _resolve_table(layer_key: str) -> str:
     raise HTTPException(404, f"Couche inconnue: {layer_key}. Renseigne une table via variable d'env.")
 
 @router.get("/{layer_key}")
-def layer_geojson(layer_key: str, limit: int = 10000):
+def layer_geojson(layer_key: str, limit: int = 10000, stream: bool = False):
+    """
+    FeatureCollection d'une couche. stream=true : entités lues par lots via un
+    curseur serveur et écrites au fil de l'eau (mémoire bornée, premier octet
+    sans attendre la fin de la requête).
+    """
     table = _resolve_table(layer_key)
     geom_col = get_geom_column(table)
     if not geom_col:
         raise HTTPException(500, f"Colonne géométrique introuvable sur {table}")
 
-    sql = f"""
-      SELECT jsonb_build_object(
-        'type','FeatureCollection',
-        'features', COALESCE(jsonb_agg(
+    feature = f"""
           jsonb_build_object(
             'type','Feature',
             'geometry', ST_AsGeoJSON({geom_col})::jsonb,
             'properties', to_jsonb(t) - '{geom_col}'
-          )
-        ), '[]'::jsonb)
-      )
+          )"""
+    source = f"""
       FROM (
         SELECT * FROM {table}
         WHERE {geom_col} IS NOT NULL
         LIMIT %s
       ) AS t
     """
+    if stream:
+        return stream_raw(f"SELECT {feature}::text {source}", (limit,))
+
+    sql = f"""
+      SELECT jsonb_build_object(
+        'type','FeatureCollection',
+        'features', COALESCE(jsonb_agg({feature}
+        ), '[]'::jsonb)
+      )
+      {source}
+    """
     with connection() as cx:
         with cx.cursor() as cur:
             cur.execute(sql, (limit,))
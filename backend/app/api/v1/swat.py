@@ -1,11 +1,145 @@
 # backend/app/api/v1/swat.py
-from fastapi import APIRouter, Query
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import text
 from app.db.database import engine
+from app.etl.swat_cube import open_cube
+from app.etl.swat_packed import PACKED_SERIES, packed_source
+from app.etl.swat_summary import SUMMARY_PARAMS, summary_select_sql
 
 
 router = APIRouter(prefix="/swat", tags=["SWAT"])
 
+# Variables de swat_reservoir_results exposées par l’API
+RESERVOIR_VARIABLES = ("volume", "flow_in", "flow_out", "precip", "evap",
+                       "seepage", "sed_in", "sed_out", "sed_conc")
+# Variables de swat_subbasin_results -> facteur de conversion en total par km²
+# (mm -> m³ : ×1000 ; kg/ha ou t/ha -> kg ou t : ×100)
+SUBBASIN_VARIABLES = {"precip": 1000, "surq": 1000, "gw_q": 1000, "wyld": 1000,
+                      "sedp": 100, "orgn": 100, "solp": 100}
+# Variables de swat_reach_results
+REACH_VARIABLES = ("flow_in", "flow_out", "sed_in", "sed_out", "no3_out", "orgp_out", "chla_out")
+# Variables de swat_sediment_results (output.sed)
+SEDIMENT_VARIABLES = ("sed_in", "sed_out", "sand_in", "sand_out", "silt_in", "silt_out",
+                      "clay_in", "clay_out", "smag_in", "smag_out", "lag_in", "lag_out",
+                      "gra_in", "gra_out", "ch_bnk", "ch_bed", "ch_dep", "fp_dep", "tss")
+# Variables de swat_outlet_results (watout.dat)
+OUTLET_VARIABLES = ("flow", "sed", "orgn", "orgp", "no3", "nh3", "no2", "minp", "cbod",
+                    "disox", "chla", "solpst", "sorpst", "bactp", "bactlp", "temp")
+
+# Séries disponibles en lot : type d’unité -> (table, colonne d’unité, variables)
+SERIES_SOURCES = {
+    "subbasin":  ("swat_sebou.swat_subbasin_results", "subbasin", tuple(SUBBASIN_VARIABLES)),
+    "reach":     ("swat_sebou.swat_reach_results", "reach", REACH_VARIABLES),
+    "sediment":  ("swat_sebou.swat_sediment_results", "reach", SEDIMENT_VARIABLES),
+    "outlet":    ("swat_sebou.swat_outlet_results", "reach", OUTLET_VARIABLES),
+    "reservoir": ("swat_sebou.swat_reservoir_results", "res", RESERVOIR_VARIABLES),
+}
+
+
+def _nullable(values: np.ndarray) -> list:
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def _cube_rows(cube, unit: int, cols: list[str], date_start=None, date_end=None,
+               max_points: int | None = None) -> list[dict]:
+    """Équivalent de _series_rows lu dans le cube mmap du scénario (même décimation)."""
+    window = cube.date_range(date_start, date_end)
+    if unit not in cube.units:
+        return []
+    mask = cube.present([unit], window)
+    dates = cube.dates[window][mask]
+    values = {c: cube.series(c, unit, window)[mask] for c in cols}
+    if max_points and len(dates) > 0:
+        # Même découpage que ntile : les premiers intervalles reçoivent un élément de plus
+        n = min(max_points, len(dates))
+        starts = np.cumsum([0] + [len(b) for b in np.array_split(dates, n)[:-1]])
+        dates = dates[starts]
+        for c, v in values.items():
+            ok = ~np.isnan(v)
+            total = np.add.reduceat(np.where(ok, v, 0.0), starts)
+            count = np.add.reduceat(ok.astype(np.int64), starts)
+            values[c] = np.divide(total, count, out=np.full(n, np.nan), where=count > 0)
+    columns = {c: _nullable(v) for c, v in values.items()}
+    return [{"date": d, **{c: columns[c][k] for c in cols}} for k, d in enumerate(dates.tolist())]
+
+
+def _packed_src(cols: list[str], by_unit: bool = False) -> str:
+    """Sous-requête (date, variables...) sur swat_packed_series via packed_window()."""
+    pivot = ", ".join(f"MAX(value) FILTER (WHERE variable = '{c}') AS {c}" for c in cols)
+    return f"""
+        SELECT {"unit, " if by_unit else ""}date, {pivot}
+        FROM swat_sebou.packed_window(:sid, :source, :units, :variables,
+                                      CAST(:date_start AS date), CAST(:date_end AS date))
+        GROUP BY {"unit, " if by_unit else ""}date
+        HAVING COUNT(value) > 0
+    """
+
+
+def _packed_params(scenario_id: int, table: str, units: list[int], cols: list[str],
+                   date_start=None, date_end=None, max_points: int | None = None) -> dict:
+    params = {"sid": scenario_id, "source": packed_source(table), "units": units, "variables": cols,
+              "date_start": date_start, "date_end": date_end}
+    if max_points:
+        params["n"] = max_points
+    return params
+
+
+def _series_rows(table: str, unit_col: str, unit: int, scenario_id: int, allowed: tuple,
+                 variables: list[str] | None, date_start=None, date_end=None,
+                 max_points: int | None = None) -> list[dict]:
+    """
+    Série (date, variables...) d’une unité sur une fenêtre de dates, lue via la
+    clé (scenario_id, unité, date). Avec `max_points`, la série est décimée
+    dans la base : découpage en `max_points` intervalles consécutifs (ntile),
+    moyenne des valeurs et première date de chaque intervalle.
+    """
+    cols = variables or list(allowed)
+    unknown = [v for v in cols if v not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Variables inconnues : {', '.join(unknown)}")
+
+    cube = open_cube(scenario_id, table)
+    if cube is not None and all(c in cube.variables for c in cols):
+        return _cube_rows(cube, unit, cols, date_start, date_end, max_points)
+
+    filters = [f"{unit_col} = :unit", "scenario_id = :sid"]
+    params = {"unit": unit, "sid": scenario_id}
+    if date_start:
+        filters.append("date >= :date_start")
+        params["date_start"] = date_start
+    if date_end:
+        filters.append("date <= :date_end")
+        params["date_end"] = date_end
+    rows_src = f"SELECT date, {', '.join(cols)} FROM {table} WHERE {' AND '.join(filters)}"
+
+    def query(src: str) -> str:
+        if max_points:
+            return f"""
+                SELECT MIN(date) AS date, {", ".join(f"AVG({c}) AS {c}" for c in cols)}
+                FROM (SELECT *, ntile(:n) OVER (ORDER BY date) AS bucket FROM ({src}) src) s
+                GROUP BY bucket
+                ORDER BY bucket
+            """
+        return f"SELECT * FROM ({src}) s ORDER BY date"
+
+    with engine.connect() as conn:
+        # Séries compactes (float4[]) si elles sont activées et que le scénario en a,
+        # sinon tables ligne à ligne
+        rows = []
+        if PACKED_SERIES:
+            rows = conn.execute(text(query(_packed_src(cols))),
+                                _packed_params(scenario_id, table, [unit], cols, date_start, date_end, max_points)
+                                ).mappings().all()
+        if not rows:
+            if max_points:
+                params["n"] = max_points
+            rows = conn.execute(text(query(rows_src)), params).mappings().all()
+    return [dict(r) for r in rows]
+
 # --- 1. Liste des scénarios SWAT ---
 @router.get("/scenarios")
 def list_scenarios():
@@ -15,29 +149,313 @@ def list_scenarios():
         rows = conn.execute(text(sql)).mappings().all()
     return [dict(r) for r in rows]
 
-# --- 2. Moyennes par sous-bassin ---
+# --- 2. Statistiques par sous-bassin (carte choroplèthe) ---
 @router.get("/subbasins")
 def list_subbasins(scenario_id: int = Query(...), param: str = Query("surq")):
-    sql = f"""
-        SELECT subbasin, AVG({param}) AS value
-        FROM swat_sebou.swat_subbasin_results
-        WHERE scenario_id = :sid
-        GROUP BY subbasin
+    """
+    Synthèse précalculée à l’import (swat_subbasin_summary) : `value` = moyenne,
+    plus min, max, p10/p50/p90 et climatologie mensuelle. Lecture par clé primaire.
+    """
+    if param not in SUMMARY_PARAMS:
+        raise HTTPException(status_code=400, detail=f"Paramètre inconnu : {param} (parmi {', '.join(SUMMARY_PARAMS)})")
+    sql = """
+        SELECT subbasin, mean AS value, min, max, p10, p50, p90, n, monthly
+        FROM swat_sebou.swat_subbasin_summary
+        WHERE scenario_id = :sid AND param = :param
         ORDER BY subbasin
     """
     with engine.connect() as conn:
-        rows = conn.execute(text(sql), {"sid": scenario_id}).mappings().all()
+        rows = conn.execute(text(sql), {"sid": scenario_id, "param": param}).mappings().all()
+        if not rows:
+            # Scénario importé avant la synthèse : même synthèse calculée à la volée
+            # (python -m app.etl.swat_summary <id> pour la précalculer)
+            rows = conn.exec_driver_sql(f"""
+                SELECT subbasin, mean AS value, min, max, p10, p50, p90, n, monthly
+                FROM ({summary_select_sql((param,))}) s
+                ORDER BY subbasin
+            """, {"sid": scenario_id}).mappings().all()
     return [dict(r) for r in rows]
 
 # --- 3. Série temporelle d’un sous-bassin ---
 @router.get("/subbasins/{id}")
-def get_timeseries(id: int, scenario_id: int = Query(...)):
+def get_timeseries(
+    id: int,
+    scenario_id: int = Query(...),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+):
+    """Série complète d’un sous-bassin (cube mmap, séries compactes ou table de résultats)."""
+    return _series_rows("swat_sebou.swat_subbasin_results", "subbasin", id, scenario_id,
+                        tuple(SUBBASIN_VARIABLES), None, date_start, date_end)
+
+# --- 4. Réservoirs SWAT et barrages ABHS associés ---
+@router.get("/reservoirs")
+def list_reservoirs():
+    """Réservoirs du modèle (fig.fig) avec le barrage de public.barrages_abhs correspondant."""
+    sql = """
+        SELECT r.res, r.subbasin, r.barrage_id, b.nom_barrage
+        FROM swat_sebou.swat_reservoirs r
+        LEFT JOIN public.barrages_abhs b ON b.id = r.barrage_id
+        ORDER BY r.res
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql)).mappings().all()
+    return [dict(r) for r in rows]
+
+
+@router.put("/reservoirs/{res}/barrage")
+def set_reservoir_barrage(res: int, barrage_id: int | None = Query(None, description="id de public.barrages_abhs (vide = aucun)")):
+    """Associe un réservoir SWAT à un barrage ABHS."""
+    with engine.begin() as conn:
+        if barrage_id is not None and not conn.execute(
+            text("SELECT 1 FROM public.barrages_abhs WHERE id = :bid"), {"bid": barrage_id}
+        ).first():
+            raise HTTPException(status_code=404, detail=f"Barrage {barrage_id} introuvable")
+        row = conn.execute(text("""
+            UPDATE swat_sebou.swat_reservoirs SET barrage_id = :bid
+            WHERE res = :res
+            RETURNING res, subbasin, barrage_id
+        """), {"res": res, "bid": barrage_id}).mappings().first()
+    if not row:
+        raise HTTPException(status_code=404, detail=f"Réservoir {res} introuvable")
+    return dict(row)
+
+
+def _reservoir_series(res: int, scenario_id: int, date_start, date_end,
+                      variables: list[str] | None, max_points: int | None = None):
+    data = _series_rows("swat_sebou.swat_reservoir_results", "res", res, scenario_id,
+                        RESERVOIR_VARIABLES, variables, date_start, date_end, max_points)
+    with engine.connect() as conn:
+        meta = conn.execute(text("""
+            SELECT r.res, r.subbasin, r.barrage_id, b.nom_barrage
+            FROM swat_sebou.swat_reservoirs r
+            LEFT JOIN public.barrages_abhs b ON b.id = r.barrage_id
+            WHERE r.res = :res
+        """), {"res": res}).mappings().first()
+    return {"reservoir": dict(meta) if meta else {"res": res}, "data": data}
+
+
+# --- 5. Série temporelle d’un réservoir ---
+@router.get("/reservoirs/{res}")
+def get_reservoir_timeseries(
+    res: int,
+    scenario_id: int = Query(...),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+    variables: list[str] | None = Query(None, description=f"Parmi : {', '.join(RESERVOIR_VARIABLES)}"),
+    max_points: int | None = Query(None, ge=2, description="Série décimée à N points (vide = résolution complète)"),
+):
+    return _reservoir_series(res, scenario_id, date_start, date_end, variables, max_points)
+
+
+# --- 6. Série simulée d’un barrage ABHS (via son réservoir SWAT) ---
+@router.get("/barrages/{barrage_id}")
+def get_barrage_timeseries(
+    barrage_id: int,
+    scenario_id: int = Query(...),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+    variables: list[str] | None = Query(None, description=f"Parmi : {', '.join(RESERVOIR_VARIABLES)}"),
+    max_points: int | None = Query(None, ge=2, description="Série décimée à N points (vide = résolution complète)"),
+):
+    with engine.connect() as conn:
+        res = conn.execute(text("SELECT res FROM swat_sebou.swat_reservoirs WHERE barrage_id = :bid ORDER BY res"),
+                           {"bid": barrage_id}).scalar()
+    if res is None:
+        raise HTTPException(status_code=404, detail=f"Aucun réservoir SWAT associé au barrage {barrage_id}")
+    return _reservoir_series(res, scenario_id, date_start, date_end, variables, max_points)
+
+
+# --- 7. Sédiments par tronçon (output.sed) ---
+@router.get("/sediment/{reach}")
+def get_sediment_timeseries(
+    reach: int,
+    scenario_id: int = Query(...),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+    variables: list[str] | None = Query(None, description=f"Parmi : {', '.join(SEDIMENT_VARIABLES)}"),
+    max_points: int | None = Query(None, ge=2, description="Série décimée à N points (vide = résolution complète)"),
+):
+    return _series_rows("swat_sebou.swat_sediment_results", "reach", reach, scenario_id,
+                        SEDIMENT_VARIABLES, variables, date_start, date_end, max_points)
+
+
+# --- 8. Exutoires (watout.dat) ---
+@router.get("/outlets")
+def list_outlets(scenario_id: int = Query(...)):
+    """Tronçons dont le débit et la qualité journaliers sont disponibles (watout)."""
+    sql = """
+        SELECT reach, MIN(date) AS date_start, MAX(date) AS date_end, COUNT(*) AS n
+        FROM swat_sebou.swat_outlet_results
+        WHERE scenario_id = :sid
+        GROUP BY reach
+        ORDER BY reach
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql), {"sid": scenario_id}).mappings().all()
+    return [dict(r) for r in rows]
+
+
+@router.get("/outlets/{reach}")
+def get_outlet_timeseries(
+    reach: int,
+    scenario_id: int = Query(...),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+    variables: list[str] | None = Query(None, description=f"Parmi : {', '.join(OUTLET_VARIABLES)}"),
+    max_points: int | None = Query(None, ge=2, description="Série décimée à N points (vide = résolution complète)"),
+):
+    return _series_rows("swat_sebou.swat_outlet_results", "reach", reach, scenario_id,
+                        OUTLET_VARIABLES, variables, date_start, date_end, max_points)
+
+
+# --- 9. Topologie de routage (fig.fig) ---
+@router.get("/reaches")
+def list_reaches(scenario_id: int = Query(...)):
+    """Tronçons avec tronçon aval, surface propre et surface drainée."""
     sql = """
-        SELECT date, precip, surq, gw_q, wyld, sedp, orgn, solp
-        FROM swat_sebou.swat_subbasin_results
-        WHERE subbasin = :id AND scenario_id = :sid
-        ORDER BY date
+        SELECT r.reach, r.downstream, r.area_km2, r.drainage_km2,
+               (SELECT COUNT(*) FROM swat_sebou.swat_reach_upstream u
+                WHERE u.scenario_id = r.scenario_id AND u.reach = r.reach) AS n_subbasins
+        FROM swat_sebou.swat_reaches r
+        WHERE r.scenario_id = :sid
+        ORDER BY r.reach
     """
     with engine.connect() as conn:
-        rows = conn.execute(text(sql), {"id": id, "sid": scenario_id}).mappings().all()
+        rows = conn.execute(text(sql), {"sid": scenario_id}).mappings().all()
     return [dict(r) for r in rows]
+
+
+# --- 10. Agrégation sur tous les sous-bassins amont d’un tronçon ---
+@router.get("/reaches/{id}/upstream")
+def get_upstream_aggregate(
+    id: int,
+    scenario_id: int = Query(...),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+    variables: list[str] | None = Query(None, description=f"Parmi : {', '.join(SUBBASIN_VARIABLES)}"),
+    agg: str = Query("mean", pattern="^(mean|total)$",
+                     description="mean : moyenne pondérée par la surface (mm, kg/ha) ; total : m³, kg ou t"),
+):
+    """
+    Série agrégée sur les sous-bassins contributeurs du tronçon, en une seule
+    requête : jointure de la fermeture amont précalculée (swat_reach_upstream)
+    avec les résultats des sous-bassins.
+    """
+    cols = variables or list(SUBBASIN_VARIABLES)
+    unknown = [v for v in cols if v not in SUBBASIN_VARIABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Variables inconnues : {', '.join(unknown)}")
+
+    if agg == "mean":
+        exprs = [f"SUM(s.{c} * u.area_km2) / NULLIF(SUM(u.area_km2), 0) AS {c}" for c in cols]
+    else:
+        exprs = [f"SUM(s.{c} * u.area_km2) * {SUBBASIN_VARIABLES[c]} AS {c}" for c in cols]
+
+    filters = ["u.scenario_id = :sid", "u.reach = :reach"]
+    params = {"sid": scenario_id, "reach": id}
+    if date_start:
+        filters.append("s.date >= :date_start")
+        params["date_start"] = date_start
+    if date_end:
+        filters.append("s.date <= :date_end")
+        params["date_end"] = date_end
+
+    sql = f"""
+        SELECT s.date, COUNT(*) AS n_subbasins, {", ".join(exprs)}
+        FROM swat_sebou.swat_reach_upstream u
+        JOIN swat_sebou.swat_subbasin_results s
+          ON s.scenario_id = u.scenario_id AND s.subbasin = u.upstream
+        WHERE {" AND ".join(filters)}
+        GROUP BY s.date
+        ORDER BY s.date
+    """
+    with engine.connect() as conn:
+        upstream = conn.execute(text("""
+            SELECT upstream FROM swat_sebou.swat_reach_upstream
+            WHERE scenario_id = :sid AND reach = :reach
+            ORDER BY upstream
+        """), {"sid": scenario_id, "reach": id}).scalars().all()
+        if not upstream:
+            raise HTTPException(status_code=404, detail=f"Tronçon {id} absent du graphe de routage")
+        rows = conn.execute(text(sql), params).mappings().all()
+    return {"reach": id, "agg": agg, "subbasins": list(upstream), "data": [dict(r) for r in rows]}
+
+
+# --- 11. Séries en lot, format colonnes ---
+@router.get("/series")
+def get_series_batch(
+    scenario_id: int = Query(...),
+    kind: str = Query("subbasin", description=f"Parmi : {', '.join(SERIES_SOURCES)}"),
+    ids: list[int] = Query(..., description="Sous-bassins / tronçons / réservoirs"),
+    variables: list[str] = Query(..., description="Variables de la table choisie"),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+):
+    """
+    Plusieurs unités et variables en une requête : un axe de dates commun et un
+    tableau de valeurs par (unité, variable), null là où l’unité n’a pas de valeur.
+    """
+    if kind not in SERIES_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Type inconnu : {kind}")
+    table, unit_col, allowed = SERIES_SOURCES[kind]
+    unknown = [v for v in variables if v not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Variables inconnues : {', '.join(unknown)}")
+    ids = sorted(set(ids))
+
+    cube = open_cube(scenario_id, table)
+    if cube is not None and all(v in cube.variables for v in variables):
+        # Tranches du cube mmap : une vue par (variable, unité), aucune requête
+        window = cube.date_range(date_start, date_end)
+        mask = cube.present(ids, window)
+        empty = [None] * int(mask.sum())
+        return {
+            "kind": kind,
+            "scenario_id": scenario_id,
+            "dates": [d.isoformat() for d in cube.dates[window][mask].tolist()],
+            "series": [
+                {"id": unit, "variable": var,
+                 "values": empty if (col := cube.series(var, unit, window)) is None else _nullable(col[mask])}
+                for var in variables for unit in ids
+            ],
+        }
+
+    filters = ["scenario_id = :sid", f"{unit_col} = ANY(:ids)"]
+    params = {"sid": scenario_id, "ids": ids}
+    if date_start:
+        filters.append("date >= :date_start")
+        params["date_start"] = date_start
+    if date_end:
+        filters.append("date <= :date_end")
+        params["date_end"] = date_end
+
+    sql = f"""
+        SELECT {unit_col} AS unit, date, {", ".join(variables)}
+        FROM {table}
+        WHERE {" AND ".join(filters)}
+    """
+    with engine.connect() as conn:
+        rows = []
+        if PACKED_SERIES:
+            rows = conn.execute(text(_packed_src(variables, by_unit=True)),
+                                _packed_params(scenario_id, table, ids, variables, date_start, date_end)).all()
+        if not rows:
+            rows = conn.execute(text(sql), params).all()
+
+    df = pd.DataFrame(rows, columns=["unit", "date", *variables])
+    dates = np.sort(df["date"].unique())
+    series = []
+    for var in variables:
+        grid = (df.pivot(index="date", columns="unit", values=var)
+                  .reindex(index=dates, columns=ids)
+                  .to_numpy(dtype=np.float64))
+        for j, unit in enumerate(ids):
+            col = grid[:, j]
+            series.append({"id": unit, "variable": var, "values": _nullable(col)})
+    return {
+        "kind": kind,
+        "scenario_id": scenario_id,
+        "dates": [d.isoformat() for d in dates],
+        "series": series,
+    }
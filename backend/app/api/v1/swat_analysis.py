@@ -1,10 +1,17 @@
 # backend/app/api/v1/swat_analysis.py
-from fastapi import APIRouter, Query
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Query
 from sqlalchemy import text
+from app.api.v1.swat import REACH_VARIABLES, SUBBASIN_VARIABLES
+from app.core.swat_cache import (cached, import_version, import_versions, lookup, mapping_version,
+                                 observed_version, store)
 from app.db.database import engine
+from app.etl.swat_schema import OBSERVED_DEBIT
 
 
 import numpy as np
+import pandas as pd
 
 router = APIRouter(prefix="/api/v1/swat/analysis", tags=["SWAT-Analysis"])
 
@@ -18,37 +25,431 @@ def calc_r2(obs, sim):
 def calc_pbias(obs, sim):
     return 100 * np.sum(sim - obs) / np.sum(obs)
 
+
+# =====================================================
+# Moteur de métriques vectorisé (toutes les paires d’un coup)
+# =====================================================
+RESAMPLE_STEPS = ("daily", "monthly", "annual")
+METRICS = ("NSE", "R2", "PBIAS", "KGE", "RMSE", "logNSE", "RSR")
+
+
+def to_periods(dates, step: str) -> np.ndarray:
+    """Dates -> numéro de période entier (jour, mois ou année depuis 1970)."""
+    d = np.asarray(dates, dtype="datetime64[D]")
+    if step == "daily":
+        return d.astype(np.int64)
+    if step == "monthly":
+        return d.astype("datetime64[M]").astype(np.int64)
+    return d.astype("datetime64[Y]").astype(np.int64)
+
+
+def period_dates(periods: np.ndarray, step: str) -> np.ndarray:
+    unit = {"daily": "D", "monthly": "M", "annual": "Y"}[step]
+    return periods.astype(f"datetime64[{unit}]").astype("datetime64[D]")
+
+
+def batch_metrics(codes: np.ndarray, obs: np.ndarray, sim: np.ndarray, n_groups: int) -> dict:
+    """
+    Métriques de calage pour `n_groups` paires à la fois : `codes` donne la
+    paire de chaque couple (obs, sim). Sommes par paire via np.bincount, sans
+    boucle Python. Retourne {métrique: tableau (n_groups,)}.
+    """
+    def gsum(x):
+        return np.bincount(codes, weights=x, minlength=n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.bincount(codes, minlength=n_groups).astype(np.float64)
+        mo, ms = gsum(obs) / n, gsum(sim) / n
+        do, ds = obs - mo[codes], sim - ms[codes]
+        sse, sst = gsum((sim - obs) ** 2), gsum(do ** 2)
+        sss, cov = gsum(ds ** 2), gsum(do * ds)
+
+        r = cov / np.sqrt(sst * sss)
+        alpha = np.sqrt(sss / sst)
+        beta = ms / mo
+
+        # log-NSE : décalage de 1 % du débit moyen observé (évite log(0))
+        eps = np.abs(mo[codes]) / 100 + 1e-9
+        lo, ls = np.log(np.clip(obs, 0, None) + eps), np.log(np.clip(sim, 0, None) + eps)
+        lmo = gsum(lo) / n
+        lsse, lsst = gsum((ls - lo) ** 2), gsum((lo - lmo[codes]) ** 2)
+
+        return {
+            "n": n.astype(np.int64),
+            "NSE": 1 - sse / sst,
+            "R2": r ** 2,
+            "PBIAS": 100 * gsum(sim - obs) / gsum(obs),
+            "KGE": 1 - np.sqrt((r - 1) ** 2 + (alpha - 1) ** 2 + (beta - 1) ** 2),
+            "RMSE": np.sqrt(sse / n),
+            "logNSE": 1 - lsse / lsst,
+            "RSR": np.sqrt(sse) / np.sqrt(sst),
+        }
+
+
+def compute_metrics(obs, sim) -> dict:
+    """Métriques d’une seule paire (arrondies, None si indéfinies)."""
+    obs, sim = np.asarray(obs, dtype=np.float64), np.asarray(sim, dtype=np.float64)
+    res = batch_metrics(np.zeros(len(obs), dtype=np.int64), obs, sim, 1)
+    return {m: _round(res[m][0], 2 if m in ("PBIAS", "RMSE") else 3) for m in METRICS}
+
+
+def _round(x, digits: int):
+    return None if x is None or not np.isfinite(x) else round(float(x), digits)
+
+
+def _aligned_pairs(rows: list, step: str) -> pd.DataFrame:
+    """
+    Lignes ('sim'|'obs', scenario_id, reach, date, value) -> couples alignés
+    (scenario_id, reach, period, sim, obs), chaque série étant d’abord
+    moyennée au pas demandé.
+    """
+    df = pd.DataFrame(rows, columns=["src", "scenario_id", "reach", "date", "value"])
+    if df.empty:
+        return df
+    df["period"] = to_periods(df["date"].to_numpy(dtype="datetime64[D]"), step)
+    df["value"] = df["value"].astype(np.float64)
+    sim = (df[df["src"] == "sim"].groupby(["scenario_id", "reach", "period"], as_index=False)["value"]
+           .mean().rename(columns={"value": "sim"}))
+    obs = (df[df["src"] == "obs"].groupby(["reach", "period"], as_index=False)["value"]
+           .mean().rename(columns={"value": "obs"}))
+    pairs = sim.merge(obs, on=["reach", "period"]).dropna(subset=["sim", "obs"])
+    return pairs.sort_values(["scenario_id", "reach", "period"], ignore_index=True)
+
+
+def _check_step(conn, scenario_ids: list[int], step: str) -> None:
+    """
+    Refuse un pas plus fin que la sortie d’un scénario (IPRINT de file.cio) :
+    au pas journalier, un scénario mensuel serait comparé à un seul jour
+    d’observation par mois.
+    """
+    if step not in RESAMPLE_STEPS:
+        raise HTTPException(status_code=400, detail=f"Pas inconnu : {step} (parmi {', '.join(RESAMPLE_STEPS)})")
+    rows = conn.execute(text("SELECT id, timestep FROM swat_sebou.swat_scenarios WHERE id = ANY(:sids)"),
+                        {"sids": scenario_ids}).all()
+    coarser = [f"{r.id} ({r.timestep})" for r in rows
+               if r.timestep in RESAMPLE_STEPS and RESAMPLE_STEPS.index(r.timestep) > RESAMPLE_STEPS.index(step)]
+    if coarser:
+        raise HTTPException(status_code=400,
+                            detail=f"Pas {step} plus fin que la sortie des scénarios {', '.join(coarser)}")
+
+
+def _fetch_pairs(scenario_ids: list[int], reach_ids: list[int] | None,
+                 date_start: date | None, date_end: date | None,
+                 station_ids: list[int] | None = None) -> list:
+    """
+    Simulé (toutes les paires demandées) et observé en une seule requête.
+    Les débits observés ne sont lus que pour les stations rattachées aux
+    tronçons (swat_station_reach, ou celles de `station_ids`), via l’index
+    (station, date).
+    """
+    obs_table, obs_station, obs_date, obs_value = OBSERVED_DEBIT
+    sim_filters = ["s.scenario_id = ANY(:sids)"]
+    obs_filters = [f"m.{obs_value} IS NOT NULL"]
+    params: dict = {"sids": scenario_ids}
+    if reach_ids:
+        sim_filters.append("s.reach = ANY(:rids)")
+        obs_filters.append("sr.reach = ANY(:rids)")
+        params["rids"] = reach_ids
+    if station_ids:
+        obs_filters.append("sr.station_id = ANY(:stids)")
+        params["stids"] = station_ids
+    if date_start:
+        sim_filters.append("s.date >= :date_start")
+        obs_filters.append(f"m.{obs_date} >= :date_start")
+        params["date_start"] = date_start
+    if date_end:
+        sim_filters.append("s.date <= :date_end")
+        obs_filters.append(f"m.{obs_date} <= :date_end")
+        params["date_end"] = date_end
+
+    sql = f"""
+        SELECT 'sim' AS src, s.scenario_id, s.reach, s.date, s.flow_out AS value
+        FROM swat_sebou.swat_reach_results s
+        WHERE {" AND ".join(sim_filters)}
+        UNION ALL
+        SELECT 'obs', NULL, sr.reach, m.{obs_date}, m.{obs_value}
+        FROM swat_sebou.swat_station_reach sr
+        JOIN {obs_table} m ON m.{obs_station} = sr.station_id
+        WHERE {" AND ".join(obs_filters)}
+    """
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).all()
+
 @router.get("/compare")
 def compare_swat_observed(
     reach_id: int = Query(..., description="ID du reach SWAT"),
     scenario_id: int = Query(..., description="ID du scénario SWAT"),
+    station_id: int | None = Query(None, description="Station de jaugeage (défaut : toutes celles du tronçon)"),
+    step: str = Query("monthly", description="daily, monthly ou annual"),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
 ):
     """
-    Compare les débits simulés SWAT et observés, calcule les indicateurs.
+    Compare les débits simulés SWAT et observés aux stations rattachées au
+    tronçon, les deux séries étant moyennées au pas demandé (moyenne des
+    stations si plusieurs), et calcule les indicateurs. Mêmes couples et mêmes
+    valeurs que /metrics pour le même pas.
     """
+    with engine.connect() as conn:
+        _check_step(conn, [scenario_id], step)
+    stations = [station_id] if station_id is not None else None
+    pairs = _aligned_pairs(_fetch_pairs([scenario_id], [reach_id], date_start, date_end, stations), step)
+
+    if pairs.empty:
+        return {"message": "Aucune donnée à comparer"}
+
+    metrics = compute_metrics(pairs["obs"].to_numpy(), pairs["sim"].to_numpy())
+    data = [
+        {"date": d.isoformat(), "simulated": float(sim), "observed": float(obs)}
+        for d, sim, obs in zip(period_dates(pairs["period"].to_numpy(), step).tolist(), pairs["sim"], pairs["obs"])
+    ]
+    return {"step": step, "metrics": {"n": len(data), **metrics}, "data": data}
+
+
+# =====================================================
+# Rattachement stations de jaugeage ↔ tronçons
+# =====================================================
+@router.get("/stations")
+def list_station_reaches(reach_id: int | None = Query(None)):
+    """Stations de public.stations_abhs rattachées à un tronçon du modèle."""
     sql = """
-        SELECT s.date, s.flow_out AS simulated, m.debit_jr AS observed
-        FROM swat_sebou.swat_reach_results s
-        JOIN public.mesures_debit_jr m
-        ON s.date = m.date_jr
-        WHERE s.reach = :reach_id AND s.scenario_id = :scenario_id
-        AND m.debit_jr IS NOT NULL
-        ORDER BY s.date
+        SELECT sr.station_id, sr.reach, st.nom_station
+        FROM swat_sebou.swat_station_reach sr
+        LEFT JOIN public.stations_abhs st ON st.id_station = sr.station_id
     """
+    params = {}
+    if reach_id is not None:
+        sql += " WHERE sr.reach = :reach_id"
+        params["reach_id"] = reach_id
     with engine.connect() as conn:
-        rows = conn.execute(text(sql), {"reach_id": reach_id, "scenario_id": scenario_id}).mappings().all()
-        data = [dict(r) for r in rows]
+        rows = conn.execute(text(sql + " ORDER BY sr.reach, sr.station_id"), params).mappings().all()
+    return [dict(r) for r in rows]
+
+
+@router.put("/stations/{station_id}/reach")
+def set_station_reach(station_id: int, reach_id: int | None = Query(None, description="Tronçon SWAT (vide = détacher)")):
+    """Rattache une station de jaugeage à un tronçon (ou la détache)."""
+    with engine.begin() as conn:
+        if not conn.execute(
+            text("SELECT 1 FROM public.stations_abhs WHERE id_station = :sid"), {"sid": station_id}
+        ).first():
+            raise HTTPException(status_code=404, detail=f"Station {station_id} introuvable")
+        if reach_id is None:
+            conn.execute(text("DELETE FROM swat_sebou.swat_station_reach WHERE station_id = :sid"),
+                         {"sid": station_id})
+        else:
+            conn.execute(text("""
+                INSERT INTO swat_sebou.swat_station_reach (station_id, reach) VALUES (:sid, :reach)
+                ON CONFLICT (station_id) DO UPDATE SET reach = EXCLUDED.reach
+            """), {"sid": station_id, "reach": reach_id})
+    return {"station_id": station_id, "reach": reach_id}
+
+
+
+@router.get("/metrics")
+def batch_calibration_metrics(
+    scenario_ids: list[int] = Query(..., description="Scénarios SWAT"),
+    reach_ids: list[int] | None = Query(None, description="Tronçons (vide = tous)"),
+    step: str = Query("monthly", description="daily, monthly ou annual"),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+):
+    """
+    NSE, R², PBIAS, KGE, RMSE, log-NSE et RSR pour toutes les paires
+    tronçon × scénario, après agrégation des séries au pas demandé.
+    Un pas plus fin que la sortie d’un scénario est refusé. Résultat mis en
+    cache jusqu’au prochain import des scénarios concernés, au prochain
+    changement de rattachement station ↔ tronçon ou des débits observés.
+    """
+    scenario_ids = sorted(set(scenario_ids))
+    reach_ids = sorted(set(reach_ids)) if reach_ids else None
+
+    def compute():
+        pairs = _aligned_pairs(_fetch_pairs(scenario_ids, reach_ids, date_start, date_end), step)
+        if pairs.empty:
+            return []
+        keys = pairs[["scenario_id", "reach"]]
+        codes = keys.groupby(["scenario_id", "reach"], sort=False).ngroup().to_numpy()
+        groups = keys.drop_duplicates(ignore_index=True)
+        res = batch_metrics(codes, pairs["obs"].to_numpy(), pairs["sim"].to_numpy(), len(groups))
+        return [
+            {"scenario_id": int(g.scenario_id), "reach": int(g.reach), "n": int(res["n"][i]),
+             **{m: _round(res[m][i], 2 if m in ("PBIAS", "RMSE") else 3) for m in METRICS}}
+            for i, g in enumerate(groups.itertuples(index=False))
+        ]
+
+    obs_table, _, obs_date, _ = OBSERVED_DEBIT
+    with engine.connect() as conn:
+        _check_step(conn, scenario_ids, step)
+        version = (f"{import_version(conn, scenario_ids)}|{mapping_version(conn)}"
+                   f"|{observed_version(conn, obs_table, obs_date)}")
+    key = (tuple(scenario_ids), tuple(reach_ids or ()), step, date_start, date_end)
+    return {"step": step, "results": cached("metrics", key, version, compute)}
 
-    if not data:
-        return {"message": "Aucune donnée à comparer"}
 
-    obs = np.array([d["observed"] for d in data])
-    sim = np.array([d["simulated"] for d in data])
 
-    metrics = {
-        "NSE": round(calc_nse(obs, sim), 3),
-        "R2": round(calc_r2(obs, sim), 3),
-        "PBIAS": round(calc_pbias(obs, sim), 2),
-    }
+# =====================================================
+# Différences entre scénarios (calcul en base)
+# =====================================================
+DIFF_PERIODS = {
+    "all": "'all'",
+    "year": "EXTRACT(YEAR FROM date)::int::text",
+    "month": "EXTRACT(MONTH FROM date)::int::text",
+}
+DIFF_TABLES = {
+    "subbasins": ("swat_sebou.swat_subbasin_results", "subbasin", tuple(SUBBASIN_VARIABLES)),
+    "reaches":   ("swat_sebou.swat_reach_results", "reach", REACH_VARIABLES),
+}
+
+
+def _diff_sql(table: str, unit_col: str, variables: list[str], period: str, filters: list[str]) -> str:
+    """
+    Une seule agrégation groupée (scénario, unité, période) sur le scénario de
+    référence et tous les scénarios comparés, puis jointure de la référence
+    sur chacun : valeurs a / b, écart absolu et relatif (%) par variable.
+    """
+    avgs = ", ".join(f"AVG({v}) AS {v}" for v in variables)
+    deltas = ", ".join(
+        f"a.{v} AS {v}_a, b.{v} AS {v}_b, b.{v} - a.{v} AS {v}_abs, "
+        f"100 * (b.{v} - a.{v}) / NULLIF(a.{v}, 0) AS {v}_rel"
+        for v in variables
+    )
+    return f"""
+        WITH g AS (
+            SELECT scenario_id, {unit_col} AS unit, {DIFF_PERIODS[period]} AS period, {avgs}
+            FROM {table}
+            WHERE scenario_id = ANY(:all_ids){"".join(f" AND {f}" for f in filters)}
+            GROUP BY 1, 2, 3
+        )
+        SELECT b.scenario_id AS scenario_b, b.unit, b.period, {deltas}
+        FROM g b
+        JOIN g a ON a.scenario_id = :a AND a.unit = b.unit AND a.period = b.period
+        WHERE b.scenario_id = ANY(:bs)
+        ORDER BY b.scenario_id, b.unit, b.period
+    """
 
-    return {"metrics": metrics, "data": data}
+
+@router.get("/diff")
+def scenario_diff(
+    scenario_a: int = Query(..., description="Scénario de référence"),
+    scenario_b: list[int] = Query(..., description="Scénario(s) comparé(s) à la référence"),
+    variables: list[str] | None = Query(None, description="Variables des sous-bassins et/ou des tronçons"),
+    period: str = Query("all", description="all (fenêtre entière), year ou month (climatologie mensuelle)"),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+):
+    """
+    Écarts absolus et relatifs (b - a) par sous-bassin et par tronçon, pour
+    chaque scénario b comparé à a. Chaque paire est mise en cache jusqu’au
+    prochain import de l’un des deux scénarios ; seules les paires absentes
+    du cache sont calculées (en une requête par table).
+    """
+    if period not in DIFF_PERIODS:
+        raise HTTPException(status_code=400, detail=f"Période inconnue : {period} (parmi {', '.join(DIFF_PERIODS)})")
+    known = set(SUBBASIN_VARIABLES) | set(REACH_VARIABLES)
+    unknown = [v for v in variables or () if v not in known]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Variables inconnues : {', '.join(unknown)}")
+    bs = sorted(set(scenario_b) - {scenario_a})
+    if not bs:
+        raise HTTPException(status_code=400, detail="Choisir au moins un scénario différent de la référence")
+
+    filters, params = [], {}
+    if date_start:
+        filters.append("date >= :date_start")
+        params["date_start"] = date_start
+    if date_end:
+        filters.append("date <= :date_end")
+        params["date_end"] = date_end
+
+    out = {"scenario_a": scenario_a, "period": period}
+    with engine.connect() as conn:
+        versions = import_versions(conn, [scenario_a, *bs])
+        for name, (table, unit_col, allowed) in DIFF_TABLES.items():
+            cols = [v for v in (variables or allowed) if v in allowed]
+            if not cols:
+                continue
+            key = lambda b: (scenario_a, b, name, tuple(cols), period, date_start, date_end)
+            version = lambda b: f"{versions[scenario_a]}|{versions[b]}"
+            results = {b: lookup("diff", key(b), version(b)) for b in bs}
+            missing = [b for b, r in results.items() if r is None]
+            if missing:
+                rows = conn.execute(text(_diff_sql(table, unit_col, cols, period, filters)),
+                                    {**params, "a": scenario_a, "bs": missing,
+                                     "all_ids": [scenario_a, *missing]}).mappings().all()
+                for b in missing:
+                    results[b] = [dict(r) for r in rows if r["scenario_b"] == b]
+                    store("diff", key(b), version(b), results[b])
+            out[name] = [r for b in bs for r in results[b]]
+    return out
+
+
+# =====================================================
+# Enveloppes d’ensemble (plusieurs scénarios)
+# =====================================================
+ENSEMBLE_SOURCES = {
+    "subbasin": ("swat_sebou.swat_subbasin_results", "subbasin", tuple(SUBBASIN_VARIABLES)),
+    "reach":    ("swat_sebou.swat_reach_results", "reach", REACH_VARIABLES),
+}
+
+
+@router.get("/ensemble")
+def ensemble_bands(
+    scenario_ids: list[int] = Query(..., description="Scénarios de l’ensemble"),
+    kind: str = Query("reach", description="reach ou subbasin"),
+    unit: int = Query(..., description="Tronçon ou sous-bassin"),
+    variable: str = Query("flow_out"),
+    percentiles: list[float] = Query([10, 50, 90], description="Quantiles en % (0-100)"),
+    date_start: date | None = Query(None, description="Début (inclus)"),
+    date_end: date | None = Query(None, description="Fin (incluse)"),
+):
+    """
+    Min, max, moyenne et quantiles par date à travers les scénarios, calculés
+    en un seul passage groupé par date sur la clé (scénario, unité, date).
+    Résultat mis en cache jusqu’au prochain import de l’un des scénarios.
+    """
+    if kind not in ENSEMBLE_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Type inconnu : {kind} (parmi {', '.join(ENSEMBLE_SOURCES)})")
+    table, unit_col, allowed = ENSEMBLE_SOURCES[kind]
+    if variable not in allowed:
+        raise HTTPException(status_code=400, detail=f"Variable inconnue : {variable}")
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise HTTPException(status_code=400, detail="Les quantiles doivent être compris entre 0 et 100")
+    scenario_ids = sorted(set(scenario_ids))
+    percentiles = sorted(set(percentiles))
+
+    filters = ["scenario_id = ANY(:sids)", f"{unit_col} = :unit", f"{variable} IS NOT NULL"]
+    params: dict = {"sids": scenario_ids, "unit": unit, "fractions": [p / 100 for p in percentiles]}
+    if date_start:
+        filters.append("date >= :date_start")
+        params["date_start"] = date_start
+    if date_end:
+        filters.append("date <= :date_end")
+        params["date_end"] = date_end
+    sql = f"""
+        SELECT date, COUNT(*) AS n, MIN({variable}) AS min, MAX({variable}) AS max, AVG({variable}) AS mean,
+               percentile_cont(CAST(:fractions AS double precision[])) WITHIN GROUP (ORDER BY {variable}) AS bands
+        FROM {table}
+        WHERE {" AND ".join(filters)}
+        GROUP BY date
+        ORDER BY date
+    """
+
+    def compute():
+        with engine.connect() as conn:
+            rows = conn.execute(text(sql), params).all()
+        labels = [f"p{p:g}" for p in percentiles]
+        return {
+            "dates": [r.date.isoformat() for r in rows],
+            "n": [r.n for r in rows],
+            "min": [r.min for r in rows],
+            "max": [r.max for r in rows],
+            "mean": [r.mean for r in rows],
+            "percentiles": {lab: [r.bands[k] for r in rows] for k, lab in enumerate(labels)},
+        }
+
+    with engine.connect() as conn:
+        version = import_version(conn, scenario_ids)
+    key = (tuple(scenario_ids), kind, unit, variable, tuple(percentiles), date_start, date_end)
+    return {"kind": kind, "unit": unit, "variable": variable, "scenario_ids": scenario_ids,
+            **cached("ensemble", key, version, compute)}
@@ -0,0 +1,125 @@
+# backend/app/api/v1/swat_inputs.py
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import text
+from app.db.database import engine
+
+
+router = APIRouter(prefix="/swat/inputs", tags=["SWAT-Inputs"])
+
+
+def _hru_filters(scenario_id: int, subbasin, hru, landuse, soil, alias: str = "h") -> tuple[list[str], dict]:
+    filters = [f"{alias}.scenario_id = :sid"]
+    params = {"sid": scenario_id}
+    for col, val in (("subbasin", subbasin), ("hru", hru), ("landuse", landuse), ("soil", soil)):
+        if val is not None:
+            filters.append(f"{alias}.{col} = :{col}")
+            params[col] = val
+    return filters, params
+
+
+# --- 1. HRU d’un scénario ---
+@router.get("/hrus")
+def list_hrus(
+    scenario_id: int = Query(...),
+    subbasin: int | None = Query(None),
+    landuse: str | None = Query(None, description="Code d’occupation du sol (ex. AGRC)"),
+    soil: str | None = Query(None, description="Nom du sol (ex. SCALSEP)"),
+):
+    filters, params = _hru_filters(scenario_id, subbasin, None, landuse, soil)
+    sql = f"""
+        SELECT h.hru, h.subbasin, h.hru_sub, h.landuse, h.soil, h.slope, h.hydgrp
+        FROM swat_sebou.swat_hrus h
+        WHERE {" AND ".join(filters)}
+        ORDER BY h.hru
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql), params).mappings().all()
+    return [dict(r) for r in rows]
+
+
+# --- 2. Paramètres d’entrée ---
+@router.get("/params")
+def get_params(
+    scenario_id: int = Query(...),
+    param: list[str] | None = Query(None, description="Noms SWAT (ex. CN2, SOL_K)"),
+    file_type: str | None = Query(None, description="hru, sol, mgt, gw, chm, sdr, sep, sub, rte, swq, pnd, wgn, wus"),
+    subbasin: int | None = Query(None),
+    hru: int | None = Query(None),
+    landuse: str | None = Query(None),
+    soil: str | None = Query(None),
+):
+    """
+    Valeurs des paramètres d’entrée. Les filtres landuse / soil sélectionnent
+    les HRU correspondantes ; les paramètres de sous-bassin (hru = 0) sont
+    renvoyés quand aucun filtre HRU n’est donné.
+    """
+    filters = ["p.scenario_id = :sid"]
+    params: dict = {"sid": scenario_id}
+    if param:
+        filters.append("p.param = ANY(:param)")
+        params["param"] = [p.upper() for p in param]
+    if file_type:
+        filters.append("p.file_type = :file_type")
+        params["file_type"] = file_type.lower()
+    if subbasin is not None:
+        filters.append("p.subbasin = :subbasin")
+        params["subbasin"] = subbasin
+    if hru is not None:
+        filters.append("p.hru = :hru")
+        params["hru"] = hru
+
+    join = ""
+    if landuse is not None or soil is not None:
+        hru_filters, hru_params = _hru_filters(scenario_id, None, None, landuse, soil)
+        join = f"JOIN swat_sebou.swat_hrus h ON h.scenario_id = p.scenario_id AND h.hru = p.hru AND {' AND '.join(hru_filters[1:])}"
+        params.update({k: v for k, v in hru_params.items() if k != "sid"})
+
+    sql = f"""
+        SELECT p.file_type, p.subbasin, p.hru, p.param, p.idx, p.value
+        FROM swat_sebou.swat_input_params p
+        {join}
+        WHERE {" AND ".join(filters)}
+        ORDER BY p.subbasin, p.hru, p.file_type, p.param, p.idx
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql), params).mappings().all()
+    return [dict(r) for r in rows]
+
+
+# --- 3. Différences entre deux scénarios ---
+@router.get("/diff")
+def diff_params(
+    scenario_a: int = Query(...),
+    scenario_b: int = Query(...),
+    file_type: str | None = Query(None),
+    param: list[str] | None = Query(None),
+):
+    """Paramètres dont la valeur diffère (ou qui manquent d’un côté) entre deux scénarios."""
+    if scenario_a == scenario_b:
+        raise HTTPException(status_code=400, detail="Choisir deux scénarios différents")
+    filters = []
+    params: dict = {"a": scenario_a, "b": scenario_b}
+    if file_type:
+        filters.append("file_type = :file_type")
+        params["file_type"] = file_type.lower()
+    if param:
+        filters.append("param = ANY(:param)")
+        params["param"] = [p.upper() for p in param]
+    extra = "".join(f" AND {f}" for f in filters)
+
+    sql = f"""
+        SELECT COALESCE(a.file_type, b.file_type) AS file_type,
+               COALESCE(a.subbasin, b.subbasin)   AS subbasin,
+               COALESCE(a.hru, b.hru)             AS hru,
+               COALESCE(a.param, b.param)         AS param,
+               COALESCE(a.idx, b.idx)             AS idx,
+               a.value AS value_a, b.value AS value_b
+        FROM (SELECT * FROM swat_sebou.swat_input_params WHERE scenario_id = :a{extra}) a
+        FULL JOIN (SELECT * FROM swat_sebou.swat_input_params WHERE scenario_id = :b{extra}) b
+          USING (file_type, param, subbasin, hru, idx)
+        WHERE a.value IS DISTINCT FROM b.value
+        ORDER BY 2, 3, 1, 4, 5
+    """
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql), params).mappings().all()
+    return [dict(r) for r in rows]
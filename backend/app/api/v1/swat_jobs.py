@@ -0,0 +1,72 @@
+# backend/app/api/v1/swat_jobs.py
+import os
+import shutil
+import zipfile
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+
+from app.api.deps import get_current_user
+from app.core.logger import get_logger
+from app.etl import swat_jobs
+from app.models.user import User
+
+router = APIRouter(prefix="/swat/imports", tags=["SWAT-Imports"])
+log = get_logger(__name__)
+
+CHUNK = 1024 * 1024
+
+
+# --- 1. Dépôt d’une archive TxtInOut ---
+@router.post("", status_code=202)
+def upload_run(
+    scenario: str = Form(..., description="Nom du scénario"),
+    file: UploadFile = File(..., description="Archive .zip d’un dossier TxtInOut"),
+    workers: int | None = Form(None, description="Processus de lecture (défaut : un par fichier)"),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Enregistre l’archive et met l’import en file ; il est exécuté par un
+    processus d’import à part (python -m app.etl.swat_jobs), jamais par l’API.
+    La réponse est immédiate ; suivre l’avancement avec GET /swat/imports/{id}.
+    Fonction synchrone : la copie de l’archive tourne dans le pool de threads,
+    pas dans la boucle d’événements.
+    """
+    scenario = scenario.strip()
+    if not scenario:
+        raise HTTPException(status_code=400, detail="Nom de scénario vide")
+    try:
+        job = swat_jobs.new_job(scenario)
+    except swat_jobs.QueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+
+    zip_path = os.path.join(swat_jobs.job_dir(job["id"]), "run.zip")
+    try:
+        with open(zip_path, "wb") as fh:
+            shutil.copyfileobj(file.file, fh, CHUNK)
+        if not zipfile.is_zipfile(zip_path):
+            raise ValueError("Le fichier déposé n’est pas une archive zip")
+    except Exception as exc:
+        swat_jobs.discard(job["id"], str(exc))
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        file.file.close()
+
+    log.info(f"POST /swat/imports | scenario={scenario} job={job['id']} user={current_user.email} "
+             f"size={os.path.getsize(zip_path)}")
+    return swat_jobs.submit(job["id"], workers)
+
+
+# --- 2. Suivi des imports ---
+@router.get("")
+def list_imports(current_user: User = Depends(get_current_user)):
+    """Imports récents (les plus récents d’abord)."""
+    return swat_jobs.list_jobs()
+
+
+@router.get("/{job_id}")
+def import_status(job_id: str, current_user: User = Depends(get_current_user)):
+    """État, progression, temps et lignes par fichier d’un import."""
+    job = swat_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Import {job_id} introuvable")
+    return job
@@ -0,0 +1,84 @@
+# backend/app/core/geojson_stream.py
+"""
+FeatureCollection GeoJSON en flux.
+
+La requête renvoie une entité (texte JSON) par ligne ; les lignes sont lues
+par lots depuis un curseur nommé côté serveur (DECLARE ... CURSOR) et la
+collection est écrite au fil de l'eau. Ni PostgreSQL ni l'API n'assemblent
+la collection complète : le premier octet part après le premier lot et la
+mémoire reste bornée par GEOJSON_STREAM_BATCH entités, quelle que soit la
+taille de la couche.
+
+La requête est déclarée et le premier lot lu avant de renvoyer la réponse :
+une erreur SQL donne encore un vrai code 500. Une erreur plus tard ne peut
+que tronquer le flux (journalisée). Connexion et curseur sont libérés en fin
+de flux, et de toute façon par une tâche de fond de la réponse : un corps
+jamais lu (client parti, erreur d'envoi) ne garde pas la connexion du pool.
+"""
+
+import os
+import uuid
+from contextlib import ExitStack
+from typing import Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from sqlalchemy import text
+
+from app.core.logger import get_logger
+from app.db.session import engine
+from app.db_raw import connection
+
+logger = get_logger(__name__)
+
+STREAM_BATCH = int(os.getenv("GEOJSON_STREAM_BATCH", "2000"))
+MEDIA_TYPE = "application/geo+json"
+
+
+def _response(first: list, fetch, stack: ExitStack) -> StreamingResponse:
+    def body() -> Iterator[bytes]:
+        try:
+            yield b'{"type":"FeatureCollection","features":['
+            rows, sep = first, b""
+            while rows:
+                yield sep + ",".join(row[0] for row in rows).encode()
+                sep = b","
+                rows = fetch()
+            yield b"]}"
+        except Exception as e:
+            logger.exception("Flux GeoJSON interrompu : %s", e)
+            raise
+        finally:
+            stack.close()
+
+    # ExitStack.close() est idempotent : la tâche de fond couvre le corps jamais itéré
+    return StreamingResponse(body(), media_type=MEDIA_TYPE, background=BackgroundTask(stack.close))
+
+
+def stream_query(sql: str, params: Optional[dict] = None, batch: int = STREAM_BATCH) -> StreamingResponse:
+    """
+    Requête SQLAlchemy (paramètres :nom) dont la première colonne est une
+    entité en texte JSON ; stream_results = curseur nommé psycopg2.
+    """
+    with ExitStack() as stack:
+        cx = stack.enter_context(engine.connect().execution_options(stream_results=True, max_row_buffer=batch))
+        result = cx.execute(text(sql), params or {})
+        stack.callback(result.close)
+        first = result.fetchmany(batch)
+        stack = stack.pop_all()
+    return _response(first, lambda: result.fetchmany(batch), stack)
+
+
+def stream_raw(sql: str, params=None, batch: int = STREAM_BATCH) -> StreamingResponse:
+    """Même chose via le pool psycopg2 (app.db_raw, paramètres %s)."""
+    with ExitStack() as stack:
+        cx = stack.enter_context(connection())
+        # Lecture seule : on relâche la transaction même si le client coupe le flux
+        stack.callback(cx.rollback)
+        cur = cx.cursor(name=f"geojson_{uuid.uuid4().hex}")
+        stack.callback(cur.close)
+        cur.itersize = batch
+        cur.execute(sql, params)
+        first = cur.fetchmany(batch)
+        stack = stack.pop_all()
+    return _response(first, lambda: cur.fetchmany(batch), stack)
@@ -0,0 +1,107 @@
+# backend/app/core/swat_cache.py
+"""
+Cache mémoire des calculs SWAT coûteux (métriques, différences de scénarios...).
+
+Chaque entrée est rattachée à la « version d'import » des scénarios concernés
+(date du dernier fichier importé dans swat_import_files) : un nouvel import
+change la version et les anciennes entrées ne sont plus jamais relues. Les
+calculs qui dépendent des observations y ajoutent la version du rattachement
+stations ↔ tronçons (mapping_version) et celle des débits observés
+(observed_version).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import text
+
+from app.core.tile_cache import read_version
+
+CACHE_SIZE = int(os.getenv("SWAT_CACHE_SIZE", "256"))
+
+_lock = threading.Lock()
+_entries: OrderedDict = OrderedDict()
+
+
+def import_version(conn, scenario_ids=None) -> str:
+    """Version des données importées (tous les scénarios, ou ceux de la liste)."""
+    sql = "SELECT COALESCE(MAX(imported_at)::text, '') || ':' || COUNT(*) FROM swat_sebou.swat_import_files"
+    params = {}
+    if scenario_ids is not None:
+        sql += " WHERE scenario_id = ANY(:sids)"
+        params["sids"] = list(scenario_ids)
+    return conn.execute(text(sql), params).scalar()
+
+
+def import_versions(conn, scenario_ids) -> dict[int, str]:
+    """Version d'import de chaque scénario de la liste, en une requête."""
+    rows = conn.execute(text("""
+        SELECT s.id, COALESCE(MAX(f.imported_at)::text, '') || ':' || COUNT(f.file_name)
+        FROM swat_sebou.swat_scenarios s
+        LEFT JOIN swat_sebou.swat_import_files f ON f.scenario_id = s.id
+        WHERE s.id = ANY(:sids)
+        GROUP BY s.id
+    """), {"sids": list(scenario_ids)}).all()
+    versions = {sid: ":0" for sid in scenario_ids}
+    versions.update({r[0]: r[1] for r in rows})
+    return versions
+
+
+def mapping_version(conn) -> str:
+    """
+    Version du rattachement stations ↔ tronçons (empreinte du contenu de
+    swat_station_reach) : un rattachement modifié change les paires obs/sim.
+    """
+    return conn.execute(text("""
+        SELECT COUNT(*) || ':' || COALESCE(md5(string_agg(station_id || '>' || reach, ',' ORDER BY station_id)), '')
+        FROM swat_sebou.swat_station_reach
+    """)).scalar()
+
+
+def observed_version(conn, table: str, date_col: str) -> str:
+    """
+    Version d'une table d'observations : son compteur public.layer_versions
+    (déclencheur posé par ensure_swat_schema). À défaut — aucun import SWAT
+    depuis — nombre de lignes et dernière date : ajouts et suppressions sont
+    vus, pas une valeur corrigée en place.
+    """
+    version = read_version(conn, table)
+    if version is None:
+        version = conn.execute(text(
+            f"SELECT COUNT(*) || ':' || COALESCE(MAX({date_col})::text, '') FROM {table}"
+        )).scalar()
+    return version
+
+
+_MISSING = object()
+
+
+def lookup(namespace: str, key, version: str, default=None):
+    k = (namespace, key, version)
+    with _lock:
+        if k in _entries:
+            _entries.move_to_end(k)
+            return _entries[k]
+    return default
+
+
+def store(namespace: str, key, version: str, value) -> None:
+    with _lock:
+        _entries[(namespace, key, version)] = value
+        while len(_entries) > CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def cached(namespace: str, key, version: str, compute):
+    """Retourne la valeur en cache pour (namespace, key, version), sinon la calcule."""
+    value = lookup(namespace, key, version, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        store(namespace, key, version, value)
+    return value
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
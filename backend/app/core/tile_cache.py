@@ -0,0 +1,205 @@
+# backend/app/core/tile_cache.py
+"""
+Cache disque des tuiles vectorielles (MVT).
+
+    <TILE_CACHE_DIR>/<schéma.table>/<version>/<z>/<x>/<y>.mvt
+
+La version d'une couche est un compteur par table (public.layer_versions)
+incrémenté par un déclencheur à chaque INSERT, UPDATE, DELETE ou TRUNCATE
+validé, quelle qu'en soit l'origine (API, ETL, psql) : toute écriture change
+la version et les tuiles sont régénérées. Le compteur démarre à l'horodatage
+(ms) de sa création, il ne revient donc jamais à une valeur déjà servie.
+
+Table, fonction et déclencheurs sont posés une fois, par le propriétaire des
+tables (jamais par une requête de l'API) :
+
+    python -m app.core.tile_cache --install [--layers communes douars ...]
+
+Une couche sans compteur est servie sans cache.
+
+La version est relue au plus toutes les TILE_VERSION_TTL secondes. Les
+écritures passant par l'API (routers/raw.py) touchent un fichier témoin
+<TILE_CACHE_DIR>/<schéma.table>/.written : chaque worker qui partage le
+dossier de cache relit alors la version à la tuile suivante. Les autres
+écritures (ETL, psql) sont vues au plus TILE_VERSION_TTL s plus tard. Lors
+d'un changement, seules les versions antérieures à la précédente sont
+supprimées : un worker qui sert encore la précédente ne perd pas son
+dossier. Un accès en cache = un stat du témoin et une lecture de fichier.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+
+TILE_CACHE = os.getenv("TILE_CACHE", "1") == "1"
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sebou_tiles"))
+VERSION_TTL = float(os.getenv("TILE_VERSION_TTL", "30"))
+WRITTEN = ".written"
+
+VERSIONS_DDL = """
+CREATE TABLE IF NOT EXISTS public.layer_versions (
+    source text PRIMARY KEY,
+    version bigint NOT NULL
+);
+CREATE OR REPLACE FUNCTION public.bump_layer_version() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO public.layer_versions (source, version)
+    VALUES (TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME, (extract(epoch FROM clock_timestamp()) * 1000)::bigint)
+    ON CONFLICT (source) DO UPDATE SET version = public.layer_versions.version + 1;
+    RETURN NULL;
+END;
+$$;
+"""
+
+_lock = threading.Lock()
+# table -> (horodatage de lecture, version)
+_versions: dict[str, tuple[float, str | None]] = {}
+_ready = False
+
+
+# ==========================================================
+# 1. Installation (ligne de commande, ETL)
+# ==========================================================
+def install(tables: list[str]) -> None:
+    """Pose compteur et déclencheurs de version sur les tables (idempotent)."""
+    from app.db.session import engine
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql(VERSIONS_DDL)
+        for table in tables:
+            trigger = f"trg_layer_version_{table.split('.')[-1]}"
+            if not conn.execute(text("SELECT 1 FROM pg_trigger WHERE tgrelid = CAST(:t AS regclass) AND tgname = :n"),
+                                {"t": table, "n": trigger}).first():
+                conn.exec_driver_sql(f"""
+                    CREATE TRIGGER {trigger}
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                    FOR EACH STATEMENT EXECUTE FUNCTION public.bump_layer_version()
+                """)
+            conn.execute(text("""
+                INSERT INTO public.layer_versions (source, version)
+                VALUES (:t, (extract(epoch FROM clock_timestamp()) * 1000)::bigint)
+                ON CONFLICT (source) DO NOTHING
+            """), {"t": table})
+            print(f"🔖 Version suivie : {table}")
+
+
+# ==========================================================
+# 2. Version d'une couche
+# ==========================================================
+def read_version(db, table: str) -> str | None:
+    """Version de la table lue en base (sans mémoire) ; None si elle n'est pas suivie."""
+    global _ready
+    if not _ready:
+        _ready = db.execute(text("SELECT to_regclass('public.layer_versions') IS NOT NULL")).scalar()
+        if not _ready:
+            return None
+    version = db.execute(text("SELECT version FROM public.layer_versions WHERE source = :t"),
+                         {"t": table}).scalar()
+    return None if version is None else str(version)
+
+
+def _written_at(table: str) -> float:
+    try:
+        return os.stat(os.path.join(TILE_CACHE_DIR, table, WRITTEN)).st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def layer_version(db, table: str) -> str | None:
+    """
+    Version courante de la table, mémorisée VERSION_TTL s ou jusqu'à la
+    prochaine écriture signalée par invalidate_table(). None : pas de cache.
+    """
+    now = time.time()
+    with _lock:
+        hit = _versions.get(table)
+    if hit and now - hit[0] < VERSION_TTL and _written_at(table) < hit[0]:
+        return hit[1]
+    version = read_version(db, table)
+    with _lock:
+        previous = _versions.get(table)
+        _versions[table] = (now, version)
+    if previous and previous[1] and version and previous[1] != version:
+        _prune(table, keep={version, previous[1]})
+    return version
+
+
+def invalidate_table(schema: str, table: str) -> None:
+    """Signale une écriture par l'API à tous les workers : la version est relue à la prochaine tuile."""
+    path = os.path.join(TILE_CACHE_DIR, f"{schema}.{table}", WRITTEN)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a"):
+            os.utime(path)
+    except OSError as e:
+        print(f"⚠️ Témoin d'écriture {path} : {e}")
+
+
+# ==========================================================
+# 3. Fichiers
+# ==========================================================
+def tile_path(table: str, version: str, z: int, x: int, y: int) -> str:
+    return os.path.join(TILE_CACHE_DIR, table, version, str(z), str(x), f"{y}.mvt")
+
+
+def read_tile(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_tile(path: str, data: bytes) -> None:
+    """
+    Écriture atomique (fichier temporaire puis renommage) : jamais de tuile
+    tronquée. Si le dossier de version disparaît entre-temps (nettoyage par
+    un autre worker), la tuile n'est simplement pas mise en cache.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except FileNotFoundError:
+        pass
+
+
+def _prune(table: str, keep: set) -> None:
+    """Supprime les versions d'une table antérieures à celles de `keep` (courante et précédente)."""
+    root = os.path.join(TILE_CACHE_DIR, table)
+    if not os.path.isdir(root):
+        return
+    oldest = min(int(v) for v in keep)
+    for name in os.listdir(root):
+        if name.isdigit() and int(name) < oldest:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+# ==========================================================
+# 4. Ligne de commande
+# ==========================================================
+def main(argv: list[str] | None = None) -> None:
+    from app.routers.layers import LAYER_MAP, _resolve_key
+
+    parser = argparse.ArgumentParser(description="Suivi des versions des couches pour le cache de tuiles.")
+    parser.add_argument("--install", action="store_true", help="Poser compteur et déclencheurs de version")
+    parser.add_argument("--layers", nargs="*", default=None, help="Couches ou alias (défaut : toutes)")
+    args = parser.parse_args(argv)
+    if not args.install:
+        parser.error("rien à faire : --install attendu")
+
+    tables = ([LAYER_MAP[_resolve_key(k)]["table"] for k in args.layers] if args.layers
+              else [cfg["table"] for cfg in LAYER_MAP.values()])
+    install(list(dict.fromkeys(tables)))
+
+
+if __name__ == "__main__":
+    main()
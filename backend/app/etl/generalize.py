@@ -0,0 +1,287 @@
+# backend/app/etl/generalize.py
+"""
+Pyramide de généralisation des couches polygones et lignes de LAYER_MAP.
+
+    python -m app.etl.generalize [--layers communes douars ...]
+    python -m app.etl.generalize --watch [--interval 30]
+
+Pour chaque table, une copie simplifiée par niveau (public.geo_generalized,
+en EPSG:3857) : la tolérance d'un niveau vaut un pixel au zoom maximal qu'il
+couvre (PYRAMID_LEVELS). Les découpages administratifs et les bassins sont
+simplifiés comme une couverture (ST_CoverageSimplify) : les frontières
+communes restent communes, sans trou ni chevauchement. Les lignes et les
+autres polygones le sont entité par entité (ST_SimplifyPreserveTopology).
+Les entités sont repérées par la clé primaire de la table (à défaut par un
+id_col unique et non nul) ; sans clé fiable, la table n'a pas de pyramide.
+
+Chaque table garde la version de la source (compteur public.layer_versions,
+voir app.core.tile_cache) pour laquelle la pyramide a été calculée. Le calcul
+n'a jamais lieu dans l'API : --watch tourne dans un processus à part et
+recalcule les pyramides dont la source a changé depuis (écriture par
+routers/raw.py, ETL ou psql, que le déclencheur de version signale). En
+attendant, les routeurs servent le dernier niveau calculé ; les entités
+ajoutées depuis y gardent leur géométrie source. Une pyramide recalculée
+incrémente la version de sa source : les tuiles mises en cache avec
+l'ancienne sont régénérées. Une table dont la version n'est pas suivie n'est
+recalculée qu'à la demande (première forme de la commande).
+"""
+
+import argparse
+import math
+import time
+
+from sqlalchemy import text
+
+from app.core.tile_cache import invalidate_table, read_version
+from app.db.session import engine
+
+# Zoom maximal couvert par chaque niveau ; au-delà, géométrie source
+PYRAMID_LEVELS = (6, 8, 10, 12)
+# Résolution (m/pixel) au zoom 0 pour des tuiles de 256 pixels
+ZOOM0_RESOLUTION = 156543.03392804097
+# Couvertures de polygones à frontières partagées
+COVERAGE_PREFIXES = ("public.adm_", "public.bassin_sebou", "public.sous_bassin_sebou")
+
+PYRAMID_DDL = """
+CREATE TABLE IF NOT EXISTS public.geo_generalized (
+    source text NOT NULL,
+    level smallint NOT NULL,
+    fid text NOT NULL,
+    geom geometry(Geometry, 3857),
+    PRIMARY KEY (source, level, fid)
+);
+CREATE INDEX IF NOT EXISTS ix_geo_generalized_geom ON public.geo_generalized USING gist (geom);
+CREATE TABLE IF NOT EXISTS public.geo_generalized_sources (
+    source text PRIMARY KEY,
+    version text NOT NULL,
+    levels smallint NOT NULL,
+    mode text NOT NULL,
+    key_col text,
+    built_at timestamptz NOT NULL DEFAULT now()
+);
+ALTER TABLE public.geo_generalized_sources ADD COLUMN IF NOT EXISTS key_col text;
+"""
+
+_ready = False
+# Colonne clé de chaque pyramide en service (lue avec sa version)
+_keys: dict[str, str] = {}
+
+
+# ==========================================================
+# 1. Niveaux
+# ==========================================================
+def level_tolerance(level: int) -> float:
+    """Tolérance (m, EPSG:3857) du niveau : un pixel à son zoom maximal."""
+    return ZOOM0_RESOLUTION / 2 ** PYRAMID_LEVELS[level]
+
+
+def zoom_level(zoom: float | None = None, resolution: float | None = None) -> int | None:
+    """Niveau adapté à un zoom ou à une résolution (m/pixel) ; None = géométrie source."""
+    if zoom is None and resolution:
+        zoom = max(0.0, math.log2(ZOOM0_RESOLUTION / resolution))
+    if zoom is None:
+        return None
+    for level, max_zoom in enumerate(PYRAMID_LEVELS):
+        if zoom <= max_zoom:
+            return level
+    return None
+
+
+def pyramid_sources() -> dict[str, tuple[str, str]]:
+    """Tables généralisables : {schema.table: (colonne id, colonne géométrie)} d'après LAYER_MAP."""
+    from app.routers.layers import LAYER_MAP
+
+    return {cfg["table"]: (cfg["id_col"], cfg["geom_col"]) for cfg in LAYER_MAP.values()}
+
+
+# ==========================================================
+# 2. Construction
+# ==========================================================
+def ensure_pyramid_tables() -> None:
+    global _ready
+    with engine.begin() as conn:
+        conn.exec_driver_sql(PYRAMID_DDL)
+    _ready = True
+
+
+def key_column(conn, table: str) -> str | None:
+    """
+    Colonne identifiant sans ambiguïté chaque entité : clé primaire (une
+    colonne) de la table, sinon l'id_col de LAYER_MAP s'il est unique et non
+    nul sur les entités géométriques. None si aucune ne convient.
+    """
+    id_col, geom_col = pyramid_sources()[table]
+    pk = conn.execute(text("""
+        SELECT a.attname
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = CAST(:t AS regclass) AND i.indisprimary
+    """), {"t": table}).scalars().all()
+    if len(pk) == 1:
+        return pk[0]
+    unique = conn.execute(text(f"""
+        SELECT COUNT(*) = COUNT({id_col}) AND COUNT(*) = COUNT(DISTINCT {id_col})
+        FROM {table}
+        WHERE {geom_col} IS NOT NULL
+    """)).scalar()
+    return id_col if unique else None
+
+
+def build_source(table: str) -> dict:
+    """(Re)calcule tous les niveaux d'une table, dans une transaction."""
+    _, geom_col = pyramid_sources()[table]
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        version = read_version(conn, table)
+        dim = conn.execute(text(f"SELECT MAX(ST_Dimension({geom_col})) FROM {table}")).scalar()
+        conn.execute(text("DELETE FROM public.geo_generalized WHERE source = :src"), {"src": table})
+        mode = "points" if not dim else ("coverage" if dim == 2 and table.startswith(COVERAGE_PREFIXES) else "feature")
+        id_col = key_column(conn, table) if mode != "points" else None
+        if mode != "points" and id_col is None:
+            # Pas de clé fiable : une géométrie par code serait attribuée à tous ses doublons
+            print(f"⚠️ {table} : ni clé primaire ni identifiant unique, pyramide non construite")
+            mode = "unkeyed"
+        levels = len(PYRAMID_LEVELS) if id_col else 0
+        for level in range(levels):
+            params = {"src": table, "level": level, "tol": level_tolerance(level)}
+            geom = f"ST_Transform({geom_col}, 3857)"
+            if mode == "coverage":
+                try:
+                    with conn.begin_nested():
+                        _insert_level(conn, table, id_col, geom_col, f"ST_CoverageSimplify({geom}, :tol) OVER ()", params)
+                    continue
+                except Exception as e:  # PostGIS < 3.4 : pas de ST_CoverageSimplify
+                    print(f"⚠️ {table} : simplification de couverture indisponible ({e.__class__.__name__}), "
+                          f"simplification par entité")
+                    mode = "feature"
+            _insert_level(conn, table, id_col, geom_col, f"ST_SimplifyPreserveTopology({geom}, :tol)", params)
+        if version and levels:
+            # Nouvelle pyramide = nouvelles tuiles. Si la source a changé pendant
+            # le calcul, la version n'est pas touchée : la pyramide reste périmée.
+            bumped = conn.execute(text("""
+                UPDATE public.layer_versions SET version = version + 1
+                WHERE source = :src AND version = CAST(:version AS bigint)
+                RETURNING version
+            """), {"src": table, "version": version}).scalar()
+            if bumped is not None:
+                version = str(bumped)
+        conn.execute(text("""
+            INSERT INTO public.geo_generalized_sources (source, version, levels, mode, key_col, built_at)
+            VALUES (:src, :version, :levels, :mode, :key_col, now())
+            ON CONFLICT (source) DO UPDATE
+            SET version = EXCLUDED.version, levels = EXCLUDED.levels, mode = EXCLUDED.mode,
+                key_col = EXCLUDED.key_col, built_at = now()
+        """), {"src": table, "version": version or "", "levels": levels, "mode": mode, "key_col": id_col})
+    if levels:
+        invalidate_table(*table.split(".", 1))
+    stats = {"source": table, "version": version, "levels": levels, "mode": mode,
+             "seconds": round(time.perf_counter() - t0, 2)}
+    print(f"🗜️ Pyramide {table} : {levels} niveaux ({mode}) en {stats['seconds']} s")
+    return stats
+
+
+def _insert_level(conn, table: str, id_col: str, geom_col: str, simplified: str, params: dict) -> None:
+    conn.execute(text(f"""
+        INSERT INTO public.geo_generalized (source, level, fid, geom)
+        SELECT :src, :level, {id_col}::text, {simplified}
+        FROM {table}
+        WHERE {geom_col} IS NOT NULL
+    """), params)
+
+
+def stale_sources(conn) -> list[str]:
+    """Tables suivies dont la pyramide manque ou date d'une autre version de la source."""
+    if not conn.execute(text("SELECT to_regclass('public.layer_versions') IS NOT NULL")).scalar():
+        return []
+    return conn.execute(text("""
+        SELECT v.source
+        FROM public.layer_versions v
+        LEFT JOIN public.geo_generalized_sources s ON s.source = v.source
+        WHERE v.source = ANY(:sources) AND s.version IS DISTINCT FROM v.version::text
+        ORDER BY v.source
+    """), {"sources": list(pyramid_sources())}).scalars().all()
+
+
+def watch(interval: float = 30.0) -> None:
+    """Boucle de maintenance : recalcule les pyramides périmées, une table à la fois."""
+    print(f"👀 Surveillance des pyramides toutes les {interval:g} s")
+    while True:
+        with engine.connect() as conn:
+            stale = stale_sources(conn)
+        for table in stale:
+            try:
+                build_source(table)
+            except Exception as e:
+                print(f"❌ Pyramide {table} : {e}")
+        time.sleep(interval)
+
+
+# ==========================================================
+# 3. Lecture (routeurs)
+# ==========================================================
+def available_level(db, table: str, zoom: float | None = None, resolution: float | None = None) -> int | None:
+    """
+    Niveau de pyramide utilisable pour ce zoom / cette résolution, ou None
+    (géométrie source) si le zoom est fin ou la table non généralisée. Une
+    pyramide périmée reste servie jusqu'à son recalcul (--watch).
+    """
+    level = zoom_level(zoom, resolution)
+    if level is None or table not in pyramid_sources() or not _tables_ready(db):
+        return None
+    row = db.execute(text("SELECT levels, key_col FROM public.geo_generalized_sources WHERE source = :src"),
+                     {"src": table}).first()
+    if row is None or level >= row.levels or not row.key_col:
+        return None
+    _keys[table] = row.key_col
+    return level
+
+
+def _tables_ready(db) -> bool:
+    global _ready
+    if not _ready:
+        _ready = db.execute(text("SELECT to_regclass('public.geo_generalized_sources') IS NOT NULL")).scalar()
+    return _ready
+
+
+def generalized_join(table: str, alias: str = "t", outer: bool = True) -> str:
+    """
+    Jointure vers la géométrie généralisée `g.geom` (paramètres :gen_source,
+    :gen_level), sur la clé de la pyramide lue par available_level(). En
+    jointure externe, une entité absente de la pyramide garde sa géométrie
+    source (COALESCE côté appelant) au lieu de disparaître.
+    """
+    key_col = _keys[table]
+    return (f"{'LEFT ' if outer else ''}JOIN public.geo_generalized g ON g.source = :gen_source "
+            f"AND g.level = :gen_level AND g.fid = {alias}.{key_col}::text")
+
+
+def generalized_missing(table: str, alias: str = "t") -> str:
+    """Condition « entité absente de la pyramide » (ajoutée depuis son calcul), mêmes paramètres."""
+    return (f"NOT EXISTS (SELECT 1 FROM public.geo_generalized m WHERE m.source = :gen_source "
+            f"AND m.level = :gen_level AND m.fid = {alias}.{_keys[table]}::text)")
+
+
+# ==========================================================
+# 4. Ligne de commande
+# ==========================================================
+def main(argv: list[str] | None = None) -> None:
+    from app.routers.layers import LAYER_MAP, _resolve_key
+
+    parser = argparse.ArgumentParser(description="Calcul de la pyramide de généralisation des couches.")
+    parser.add_argument("--layers", nargs="*", default=None, help="Couches ou alias (défaut : toutes)")
+    parser.add_argument("--watch", action="store_true", help="Recalculer en continu les pyramides périmées")
+    parser.add_argument("--interval", type=float, default=30.0, help="Attente (s) entre deux passages de --watch")
+    args = parser.parse_args(argv)
+
+    ensure_pyramid_tables()
+    if args.watch:
+        watch(args.interval)
+        return
+    tables = ([LAYER_MAP[_resolve_key(k)]["table"] for k in args.layers] if args.layers
+              else list(pyramid_sources()))
+    for table in dict.fromkeys(tables):
+        build_source(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,102 @@
 # backend/app/etl/import_swat_final.py
 """
-Importation des résultats SWAT (output.sub & output.rch) vers PostgreSQL.
+Importation des résultats SWAT (output.sub, output.rch, output.rsv, output.sed
+& watout.dat) vers PostgreSQL.
 Compatible avec le schéma swat_sebou.
 """
 
+import os
+
 import pandas as pd
 from sqlalchemy import text
 from app.db.session import engine, SessionLocal
 from datetime import datetime
 
+from app.etl.swat_calendar import SwatCalendar, dates_from_year_day
+from app.etl.swat_copy import CopyWriter
+from app.etl.swat_cube import CUBE_DIR, refresh_cube
+from app.etl.swat_fig import read_fig, reservoir_subbasins, routing_graph, saveconc_reach
+from app.etl.swat_manifest import load_manifest, plan_files, record_file
+from app.etl.swat_packed import PACKED_SERIES, packing_step, refresh_packed
+from app.etl.swat_parser import SWAT_LAYOUTS, iter_swat_records
+from app.etl.swat_schema import ensure_swat_schema
+from app.etl.swat_summary import refresh_subbasin_summary
+
+# Colonnes cibles (DB) -> colonnes produites par le parser SWAT
+SUB_COLUMNS = {
+    "scenario_id": "scenario_id", "subbasin": "sub", "date": "date",
+    "precip": "precip", "surq": "surq", "gw_q": "gw_q", "wyld": "wyld",
+    "sedp": "sedp", "orgn": "orgn", "solp": "solp",
+}
+RCH_COLUMNS = {
+    "scenario_id": "scenario_id", "reach": "rch", "date": "date",
+    "flow_in": "flow_in", "flow_out": "flow_out", "sed_in": "sed_in", "sed_out": "sed_out",
+    "no3_out": "no3_out", "orgp_out": "orgp_out", "chla_out": "chla_out",
+}
+RSV_COLUMNS = {
+    "scenario_id": "scenario_id", "res": "res", "date": "date",
+    "volume": "volume", "flow_in": "flow_in", "flow_out": "flow_out",
+    "precip": "precip", "evap": "evap", "seepage": "seepage",
+    "sed_in": "sed_in", "sed_out": "sed_out", "sed_conc": "sed_conc",
+}
+SED_COLUMNS = {
+    "scenario_id": "scenario_id", "reach": "rch", "date": "date",
+    **{c: c for c in ("sed_in", "sed_out", "sand_in", "sand_out", "silt_in", "silt_out",
+                      "clay_in", "clay_out", "smag_in", "smag_out", "lag_in", "lag_out",
+                      "gra_in", "gra_out", "ch_bnk", "ch_bed", "ch_dep", "fp_dep", "tss")},
+}
+WATOUT_COLUMNS = {
+    "scenario_id": "scenario_id", "reach": "reach", "date": "date",
+    **{c: c for c in ("flow", "sed", "orgn", "orgp", "no3", "nh3", "no2", "minp", "cbod",
+                      "disox", "chla", "solpst", "sorpst", "bactp", "bactlp", "temp")},
+}
+
+# Fichiers de sortie importables -> table cible et correspondance des colonnes.
+#   - "dating" : "calendar" (colonne MON + file.cio) ou "year_day" (colonnes année / jour)
+#   - "outlet" : le tronçon n'est pas dans le fichier, il est déduit de fig.fig (saveconc)
+#   - "on_swap" : appelée (cx, scen_id) dans la transaction, après la bascule du scénario
+RESULT_TARGETS = {
+    "output.sub": {"table": "swat_sebou.swat_subbasin_results", "columns": SUB_COLUMNS,
+                   "on_swap": refresh_subbasin_summary},
+    "output.rch": {"table": "swat_sebou.swat_reach_results", "columns": RCH_COLUMNS},
+    "output.rsv": {"table": "swat_sebou.swat_reservoir_results", "columns": RSV_COLUMNS},
+    "output.sed": {"table": "swat_sebou.swat_sediment_results", "columns": SED_COLUMNS},
+    "watout.dat": {"table": "swat_sebou.swat_outlet_results", "columns": WATOUT_COLUMNS,
+                   "dating": "year_day", "outlet": True},
+}
+
 
 # ==========================================================
 # 1. Création ou récupération du scénario
 # ==========================================================
-def ensure_scenario(scenario_name: str, timestep="daily") -> int:
-    """Crée un scénario dans swat_sebou.swat_scenarios s’il n’existe pas."""
+def ensure_scenario(scenario_name: str, timestep="daily", start_date=None, end_date=None) -> int:
+    """
+    Crée un scénario dans swat_sebou.swat_scenarios s’il n’existe pas.
+    Si la période simulée est connue (file.cio), elle est enregistrée.
+    """
+    params = {"name": scenario_name, "timestep": timestep,
+              "start_date": start_date, "end_date": end_date}
     with SessionLocal() as db:
         row = db.execute(text("""
             SELECT id FROM swat_sebou.swat_scenarios WHERE name = :name
         """), {"name": scenario_name}).first()
         if row:
+            if start_date:
+                db.execute(text("""
+                    UPDATE swat_sebou.swat_scenarios
+                    SET timestep = :timestep, start_date = :start_date, end_date = :end_date
+                    WHERE id = :id
+                """), {**params, "id": row[0]})
+                db.commit()
             return row[0]
 
         # Sinon on le crée
         db.execute(text("""
             INSERT INTO swat_sebou.swat_scenarios (name, timestep, start_date, end_date)
-            VALUES (:name, :timestep, CURRENT_DATE, CURRENT_DATE)
-        """), {"name": scenario_name, "timestep": timestep})
+            VALUES (:name, :timestep,
+                    COALESCE(CAST(:start_date AS date), CURRENT_DATE),
+                    COALESCE(CAST(:end_date AS date), CURRENT_DATE))
+        """), params)
         db.commit()
 
         # Récupération de l’ID
@@ -36,100 +106,201 @@ def ensure_scenario(scenario_name: str, timestep="daily") -> int:
 
 
 # ==========================================================
-# 2. Importer output.sub
+# 2. Blocs du parser -> DataFrames prêts pour COPY
 # ==========================================================
-def import_output_sub(filepath: str, scenario_name: str):
+def iter_result_frames(filepath: str, kind: str, scen_id: int, columns: dict,
+                       calendar: SwatCalendar, constants: dict | None = None):
+    """
+    Convertit chaque bloc lu par `iter_swat_records` en DataFrame aux colonnes
+    de la table cible (mémoire constante, un bloc à la fois). Les dates sont
+    celles du calendrier de simulation ; les lignes de synthèse sont écartées.
+    `constants` : colonnes de valeur fixe absentes du fichier (ex. tronçon de watout.dat).
+    """
+    unit = SWAT_LAYOUTS[kind]["keys"][0][0]
+    year_day = RESULT_TARGETS.get(kind, {}).get("dating") == "year_day"
+    calendar.reset()
+    for batch in iter_swat_records(filepath, kind):
+        df = pd.DataFrame(batch)
+        if year_day:
+            df["date"] = dates_from_year_day(df["year"], df["day"])
+        else:
+            df = calendar.assign(df, unit)
+        df["scenario_id"] = scen_id
+        for col, value in (constants or {}).items():
+            df[col] = value
+        yield df[list(columns.values())]
+
+
+def target_constants(kind: str, txtinout: str) -> dict:
+    """Colonnes fixes d'un fichier : tronçon de sortie d'un fichier saveconc (fig.fig)."""
+    if not RESULT_TARGETS.get(kind, {}).get("outlet"):
+        return {}
+    fig = os.path.join(txtinout, "fig.fig")
+    reach = saveconc_reach(read_fig(fig), kind) if os.path.exists(fig) else None
+    if reach is None:
+        raise ValueError(f"Tronçon de {kind} introuvable dans {fig} (commande saveconc)")
+    return {"reach": reach}
+
+
+def load_calendar(filepath: str, cio_path: str | None = None) -> SwatCalendar:
+    """Calendrier du run : file.cio du dossier TxtInOut contenant `filepath`."""
+    return SwatCalendar.from_txtinout(cio_path or os.path.dirname(os.path.abspath(filepath)))
+
+
+def _import_results(filepath: str, scenario_name: str, kind: str, table: str, columns: dict,
+                    cio_path: str | None = None) -> dict:
     print(f"Lecture de {filepath} ...")
-    scen_id = ensure_scenario(scenario_name, "daily")
-
-    # 🔹 Sauter 10 lignes d’en-tête, la ligne 11 contient les noms de colonnes
-    df = pd.read_fwf(
-        filepath,
-        skiprows=10,
-        names=[
-            "TAG", "SUB", "MON", "AREA", "PRECIP", "SNOMELT", "PET", "ET",
-            "SW", "PERC", "SURQ", "GW_Q", "WYLD", "SYLD",
-            "ORGN", "ORGP", "NSURQ", "SOLP", "SEDP"
-        ],
-        widths=[8, 8, 6] + [10] * 16,
-        comment=" "
-    )
-
-    # 🔹 Garde uniquement les lignes où SUB est un nombre
-    df = df[pd.to_numeric(df["SUB"], errors="coerce").notna()]
-    df["SUB"] = df["SUB"].astype(int)
-
-    # 🔹 Ajoute la date fictive et le scénario
-    df["date"] = pd.date_range("2000-01-01", periods=len(df), freq="D")
-    df["scenario_id"] = scen_id
-
-    print(f"{len(df)} lignes valides lues pour output.sub")
+    ensure_swat_schema()
+    calendar = load_calendar(filepath, cio_path)
+    scen_id = ensure_scenario(scenario_name, calendar.timestep, calendar.start, calendar.end)
+
+    # 🔹 Fichier inchangé depuis le dernier import de ce scénario : rien à faire
+    changed, unchanged = plan_files([(kind, filepath)], load_manifest(scen_id))
+    if unchanged:
+        fp = unchanged[0][1]
+        if fp["touched"]:
+            with CopyWriter() as writer:
+                record_file(writer.cx, scen_id, kind, fp, None)
+        print(f"⏭️ {kind} inchangé pour {scenario_name} : import ignoré.")
+        return {"table": table, "rows": 0, "skipped": True}
+
+    _, _, fp = changed[0]
+    constants = target_constants(kind, cio_path or os.path.dirname(os.path.abspath(filepath)))
+
+    # 🔹 COPY dans une table de transit puis bascule atomique du scénario
+    with CopyWriter() as writer:
+        staging = writer.create_staging(table, list(columns))
+        for df in iter_result_frames(filepath, kind, scen_id, columns, calendar, constants):
+            writer.copy_frame(staging, list(columns), df)
+        rows = writer.swap_scenario(table, staging, list(columns), scen_id)
+        if RESULT_TARGETS.get(kind, {}).get("on_swap"):
+            RESULT_TARGETS[kind]["on_swap"](writer.cx, scen_id)
+        if PACKED_SERIES and kind in RESULT_TARGETS:
+            refresh_packed(writer.cx, scen_id, table, columns, packing_step(RESULT_TARGETS[kind], calendar.timestep))
+        record_file(writer.cx, scen_id, kind, fp, rows)
+    stats = writer.report(staging, kind)
+    if CUBE_DIR:
+        # Le cube du scénario suit les lignes qui viennent d'être validées
+        refresh_cube(scen_id, table, columns)
+
+    print(f"{stats['rows']} lignes valides lues pour {kind}")
+    print(f"✅ Données {kind} importées avec succès.")
+    return stats
+
+
+def import_output_sub(filepath: str, scenario_name: str, cio_path: str | None = None):
+    return _import_results(filepath, scenario_name, "output.sub",
+                           "swat_sebou.swat_subbasin_results", SUB_COLUMNS, cio_path)
 
-    # 🔹 Insertion SQL dans la table cible
-    with engine.begin() as conn:
-        conn.execute(text("""
-            INSERT INTO swat_sebou.swat_subbasin_results
-            (scenario_id, subbasin, date, precip, surq, gw_q, wyld, sedp, orgn, solp)
-            VALUES (:scenario_id, :SUB, :date, :PRECIP, :SURQ, :GW_Q, :WYLD, :SEDP, :ORGN, :SOLP)
-        """), df.to_dict(orient="records"))
-
-    print("✅ Données output.sub importées avec succès.")
 
+# ==========================================================
+# 3. Importer output.rch
+# ==========================================================
+def import_output_rch(filepath: str, scenario_name: str, cio_path: str | None = None):
+    return _import_results(filepath, scenario_name, "output.rch",
+                           "swat_sebou.swat_reach_results", RCH_COLUMNS, cio_path)
 
 
 
 # ==========================================================
-# 3. Importer output.rch
+# 4. Importer output.rsv (+ réservoirs de fig.fig)
 # ==========================================================
-def import_output_rch(filepath: str, scenario_name: str):
-    print(f"Lecture de {filepath} ...")
-    scen_id = ensure_scenario(scenario_name, "daily")
-
-    # 🔹 Sauter 10 lignes d’en-tête (comme output.sub)
-    # 🔹 Colonnes principales du fichier SWAT 2025 (simplifiées aux plus utiles)
-    col_names = [
-        "TAG", "RCH", "MON", "AREA", "FLOW_IN", "FLOW_OUT", "EVAP", "TLOSS",
-        "SED_IN", "SED_OUT", "SEDCONC",
-        "ORGN_IN", "ORGN_OUT", "ORGP_IN", "ORGP_OUT",
-        "NO3_IN", "NO3_OUT", "NH4_IN", "NH4_OUT",
-        "NO2_IN", "NO2_OUT", "MINP_IN", "MINP_OUT",
-        "CHLA_IN", "CHLA_OUT", "CBOD_IN", "CBOD_OUT",
-        "DISOX_IN", "DISOX_OUT", "TOT_N", "TOT_P", "NO3CONC", "WTMP"
-    ]
-
-    # 🔹 Lecture flexible : largeur approximative (6 premières + colonnes de 10)
-    df = pd.read_fwf(
-        filepath,
-        skiprows=10,
-        names=col_names,
-        widths=[8, 8, 5, 10] + [10] * (len(col_names) - 4),
-        comment=" "
-    )
+def sync_reservoirs(cx, txtinout: str) -> int:
+    """
+    Enregistre les réservoirs déclarés dans fig.fig (numéro, sous-bassin) sur
+    la connexion DBAPI `cx`. Le lien vers public.barrages_abhs déjà saisi est conservé.
+    """
+    fig = os.path.join(txtinout, "fig.fig")
+    if not os.path.exists(fig):
+        return 0
+    reservoirs = reservoir_subbasins(read_fig(fig))
+    with cx.cursor() as cur:
+        for res, subbasin in reservoirs.items():
+            cur.execute("""
+                INSERT INTO swat_sebou.swat_reservoirs (res, subbasin)
+                VALUES (%s, %s)
+                ON CONFLICT (res) DO UPDATE SET subbasin = EXCLUDED.subbasin
+            """, (res, subbasin))
+    return len(reservoirs)
+
+
+def import_output_rsv(filepath: str, scenario_name: str, cio_path: str | None = None):
+    stats = _import_results(filepath, scenario_name, "output.rsv",
+                            "swat_sebou.swat_reservoir_results", RSV_COLUMNS, cio_path)
+    with CopyWriter() as writer:
+        sync_reservoirs(writer.cx, cio_path or os.path.dirname(os.path.abspath(filepath)))
+    return stats
 
-    # 🔹 Ne garder que les lignes où RCH est numérique
-    df = df[pd.to_numeric(df["RCH"], errors="coerce").notna()]
-    df["RCH"] = df["RCH"].astype(int)
 
-    # 🔹 Ajouter une date fictive pour le moment
-    df["date"] = pd.date_range("2000-01-01", periods=len(df), freq="D")
-    df["scenario_id"] = scen_id
+# ==========================================================
+# 5. Importer output.sed & watout.dat
+# ==========================================================
+def import_output_sed(filepath: str, scenario_name: str, cio_path: str | None = None):
+    return _import_results(filepath, scenario_name, "output.sed",
+                           "swat_sebou.swat_sediment_results", SED_COLUMNS, cio_path)
 
-    print(f"{len(df)} lignes valides lues pour output.rch")
 
-    # 🔹 Insertion SQL simplifiée (choix de quelques colonnes principales)
-    with engine.begin() as conn:
-        conn.execute(text("""
-            INSERT INTO swat_sebou.swat_reach_results
-            (scenario_id, reach, date, flow_in, flow_out, sed_in, sed_out, no3_out, orgp_out, chla_out)
-            VALUES (:scenario_id, :RCH, :date, :FLOW_IN, :FLOW_OUT, :SED_IN, :SED_OUT, :NO3_OUT, :ORGP_OUT, :CHLA_OUT)
-        """), df.to_dict(orient="records"))
+def import_watout(filepath: str, scenario_name: str, cio_path: str | None = None):
+    return _import_results(filepath, scenario_name, "watout.dat",
+                           "swat_sebou.swat_outlet_results", WATOUT_COLUMNS, cio_path)
 
-    print("✅ Données output.rch importées avec succès.")
 
+# ==========================================================
+# 6. Topologie de routage (fig.fig)
+# ==========================================================
+def subbasin_areas(txtinout: str) -> dict[int, float]:
+    """Surface (SUB_KM) de chaque sous-bassin, lue dans les fichiers .sub."""
+    from app.etl.swat_inputs import parse_input_file
+
+    areas = {}
+    for name in os.listdir(txtinout):
+        if name.lower().endswith("0000.sub") and name[:9].isdigit():
+            res = parse_input_file(os.path.join(txtinout, name))
+            areas.update({res["subbasin"]: v for p, _, v in res["params"] if p == "SUB_KM"})
+    return areas
+
+
+def import_routing(txtinout: str, scen_id: int, manifest: dict | None = None) -> bool:
+    """
+    Enregistre le graphe de routage du scénario : tronçon aval (swat_reaches)
+    et fermeture amont précalculée (swat_reach_upstream). Ignoré si fig.fig
+    n'a pas changé depuis le dernier import. Retourne True si la table a été réécrite.
+    """
+    fig = os.path.join(txtinout, "fig.fig")
+    if not os.path.exists(fig):
+        return False
+    changed, unchanged = plan_files([("fig.fig", fig)], manifest if manifest is not None else load_manifest(scen_id))
+    if unchanged:
+        if unchanged[0][1]["touched"]:
+            with CopyWriter() as writer:
+                record_file(writer.cx, scen_id, "fig.fig", unchanged[0][1], None)
+        return False
+
+    graph = routing_graph(read_fig(fig))
+    areas = subbasin_areas(txtinout)
+    closure = pd.DataFrame(
+        [(scen_id, reach, up, areas.get(up)) for reach, ups in graph["upstream"].items() for up in sorted(ups)],
+        columns=["scenario_id", "reach", "upstream", "area_km2"],
+    )
+    reaches = pd.DataFrame(
+        [(scen_id, reach, down, areas.get(reach),
+          sum(areas.get(u, 0.0) for u in graph["upstream"][reach]) or None)
+         for reach, down in sorted(graph["downstream"].items())],
+        columns=["scenario_id", "reach", "downstream", "area_km2", "drainage_km2"],
+    ).astype({"downstream": "Int64"})
+
+    with CopyWriter() as writer:
+        for table, df in (("swat_sebou.swat_reaches", reaches), ("swat_sebou.swat_reach_upstream", closure)):
+            staging = writer.create_staging(table, list(df.columns))
+            writer.copy_frame(staging, list(df.columns), df)
+            writer.swap_scenario(table, staging, list(df.columns), scen_id)
+        record_file(writer.cx, scen_id, "fig.fig", changed[0][2], len(closure))
+    print(f"🔀 Routage : {len(reaches)} tronçons, {len(closure)} liens amont")
+    return True
 
 
 # ==========================================================
-# 4. Vérification finale de l'importation
+# 7. Vérification finale de l'importation
 # ==========================================================
 from sqlalchemy import text
 
@@ -154,19 +325,23 @@ def check_import_summary():
         null_no3 = conn.execute(text("SELECT COUNT(*) FROM swat_sebou.swat_reach_results WHERE no3_out IS NULL")).scalar()
         print(f"🔍 Lignes sans valeur de NO3 : {null_no3}")
 
+        # Réservoirs
+        res_count = conn.execute(text("SELECT COUNT(DISTINCT res) FROM swat_sebou.swat_reservoir_results")).scalar()
+        res_rows = conn.execute(text("SELECT COUNT(*) FROM swat_sebou.swat_reservoir_results")).scalar()
+        print(f"🏞️ Réservoirs : {res_count} unités, {res_rows} lignes au total")
+
+        # Sédiments et exutoire
+        sed_rows = conn.execute(text("SELECT COUNT(*) FROM swat_sebou.swat_sediment_results")).scalar()
+        out_rows = conn.execute(text("SELECT COUNT(*) FROM swat_sebou.swat_outlet_results")).scalar()
+        print(f"🟤 Sédiments : {sed_rows} lignes | 🚰 Exutoire (watout) : {out_rows} lignes")
+
         print("\n✅ Vérification terminée : les données SWAT sont bien présentes dans la base.\n")
 
 # ==========================================================
-# 4. Point d’entrée principal
+# 8. Point d’entrée principal
 # ==========================================================
 if __name__ == "__main__":
-    # 🟢 Mets ici ton dossier SWAT réel :
-    BASE_PATH = r"C:\dev\sad_sebou0210\sad_sebou0210\TxtInOut"
-
-    # Nom du scénario (personnalisable)
-    scenario_name = "Baseline_2010"
-
-    import_output_sub(f"{BASE_PATH}\\output.sub", scenario_name)
-    import_output_rch(f"{BASE_PATH}\\output.rch", scenario_name)
-
-    print("✅ Import SWAT terminé avec succès.")
+    # Import complet d’un dossier TxtInOut : voir app.etl.import_swat_run
+    #   python -m app.etl.import_swat_final <dossier TxtInOut> <scénario>
+    from app.etl.import_swat_run import main
+    main()
@@ -0,0 +1,216 @@
+# backend/app/etl/import_swat_run.py
+"""
+Import complet d'un dossier TxtInOut SWAT.
+
+    python -m app.etl.import_swat_run <dossier TxtInOut> <scénario> [--workers N]
+
+Chaque fichier de sortie est lu, daté et sérialisé en CSV dans un pool de
+processus ; un writer unique consomme les blocs via une file bornée et les
+envoie par COPY sur une seule connexion, dans une seule transaction.
+"""
+
+import argparse
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from queue import Empty
+
+from app.etl.import_swat_final import (
+    RESULT_TARGETS, ensure_scenario, import_routing, iter_result_frames, sync_reservoirs, target_constants,
+)
+from app.etl.swat_calendar import SwatCalendar
+from app.etl.swat_climate import import_forcing
+from app.etl.swat_copy import CopyWriter, frame_to_csv
+from app.etl.swat_cube import CUBE_DIR, refresh_cube
+from app.etl.swat_manifest import load_manifest, plan_files, record_file
+from app.etl.swat_packed import PACKED_SERIES, packing_step, refresh_packed
+from app.etl.swat_schema import ensure_swat_schema
+
+# Nombre maximal de blocs en attente entre les lecteurs et le writer
+QUEUE_SIZE = int(os.getenv("SWAT_IMPORT_QUEUE_SIZE", "8"))
+
+
+# ==========================================================
+# 1. Fichiers à importer
+# ==========================================================
+def discover_outputs(txtinout: str) -> list[tuple[str, str]]:
+    """Liste (type, chemin) des sorties SWAT importables présentes dans le dossier."""
+    names = {n.lower(): n for n in os.listdir(txtinout)}
+    return [(kind, os.path.join(txtinout, names[kind])) for kind in RESULT_TARGETS if kind in names]
+
+
+# ==========================================================
+# 2. Lecteur (processus du pool)
+# ==========================================================
+def _parse_file(kind: str, path: str, scen_id: int, cio: dict, queue, stop,
+                constants: dict | None = None) -> None:
+    """Lit un fichier et pousse ses blocs CSV dans la file (arrêt si `stop`)."""
+    t0 = time.perf_counter()
+    rows = 0
+    try:
+        columns = RESULT_TARGETS[kind]["columns"]
+        for df in iter_result_frames(path, kind, scen_id, columns, SwatCalendar(cio), constants):
+            if stop.is_set():
+                return
+            queue.put(("chunk", kind, frame_to_csv(df), len(df)))
+            rows += len(df)
+        queue.put(("done", kind, {"rows": rows, "parse_s": time.perf_counter() - t0}))
+    except Exception:
+        queue.put(("error", kind, traceback.format_exc()))
+
+
+def _drain(queue, futures) -> None:
+    """Vide la file jusqu'à la fin des lecteurs (évite un blocage sur put)."""
+    while not all(f.done() for f in futures):
+        try:
+            queue.get(timeout=0.1)
+        except Empty:
+            pass
+
+
+# ==========================================================
+# 3. Pipeline : N lecteurs -> 1 writer
+# ==========================================================
+def import_txtinout(txtinout: str, scenario_name: str, workers: int | None = None,
+                    queue_size: int = QUEUE_SIZE, progress=None) -> dict:
+    """
+    Importe toutes les sorties reconnues de `txtinout` pour le scénario donné.
+
+    L'import est idempotent : les fichiers inchangés depuis le dernier import
+    du scénario sont ignorés ; les autres sont copiés dans des tables de
+    transit puis basculés dans la même transaction (pas d'état partiel visible).
+    Retourne le rapport par fichier : lignes, temps de lecture, temps de COPY.
+    `progress(report)`, si fourni, reçoit ce rapport à chaque bloc écrit.
+    """
+    t0 = time.perf_counter()
+    files = discover_outputs(txtinout)
+    if not files:
+        raise FileNotFoundError(f"Aucune sortie SWAT importable dans {txtinout}")
+
+    ensure_swat_schema()
+    calendar = SwatCalendar.from_txtinout(txtinout)
+    scen_id = ensure_scenario(scenario_name, calendar.timestep, calendar.start, calendar.end)
+    workers = workers or min(len(files), os.cpu_count() or 1)
+    manifest = load_manifest(scen_id)
+    import_routing(txtinout, scen_id, manifest)
+    import_forcing(txtinout, scen_id, manifest)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        changed, unchanged = plan_files(files, manifest, hasher=pool.map)
+        report = {kind: {"file": path, "status": "skipped", "rows": 0, "parse_s": None, "copy_s": 0.0}
+                  for kind, path in files}
+        for kind, _ in unchanged:
+            print(f"⏭️ {kind} inchangé : ignoré")
+        for kind, _, _ in changed:
+            report[kind]["status"] = "pending"
+        if progress:
+            progress(report)
+
+        if not changed:
+            touched = [(kind, fp) for kind, fp in unchanged if fp["touched"]]
+            if touched:
+                with CopyWriter() as writer:
+                    for kind, fp in touched:
+                        record_file(writer.cx, scen_id, kind, fp, None)
+            print(f"✅ {scenario_name} déjà à jour ({time.perf_counter() - t0:.3f} s)")
+            return {"scenario_id": scen_id, "seconds": round(time.perf_counter() - t0, 3),
+                    "rows": 0, "files": report}
+
+        print(f"🚀 Import {scenario_name} (id={scen_id}) : {len(changed)} fichiers modifiés, "
+              f"{workers} lecteurs, calendrier {calendar.timestep} {calendar.start} → {calendar.end}")
+
+        with Manager() as manager:
+            queue = manager.Queue(maxsize=queue_size)
+            stop = manager.Event()
+            futures = [pool.submit(_parse_file, kind, path, scen_id, calendar.cio, queue, stop,
+                                   target_constants(kind, txtinout))
+                       for kind, path, _ in changed]
+            fingerprints = {kind: fp for kind, _, fp in changed}
+            try:
+                with CopyWriter() as writer:
+                    staging = {kind: writer.create_staging(RESULT_TARGETS[kind]["table"],
+                                                           list(RESULT_TARGETS[kind]["columns"]))
+                               for kind in fingerprints}
+                    pending = len(changed)
+                    while pending:
+                        try:
+                            msg = queue.get(timeout=1)
+                        except Empty:
+                            for f in futures:
+                                if f.done() and f.exception():
+                                    raise f.exception()
+                            continue
+
+                        status, kind = msg[0], msg[1]
+                        target = RESULT_TARGETS.get(kind)
+                        if status == "chunk":
+                            t = time.perf_counter()
+                            writer.copy_csv(staging[kind], list(target["columns"]), msg[2], msg[3])
+                            report[kind]["copy_s"] += time.perf_counter() - t
+                            report[kind]["rows"] += msg[3]
+                            print(f"   … {kind} : {report[kind]['rows']} lignes écrites")
+                            if progress:
+                                progress(report)
+                        elif status == "done":
+                            pending -= 1
+                            # Fichier complet : bascule du scénario depuis la table de transit
+                            t = time.perf_counter()
+                            rows = writer.swap_scenario(target["table"], staging[kind],
+                                                        list(target["columns"]), scen_id)
+                            if target.get("on_swap"):
+                                target["on_swap"](writer.cx, scen_id)
+                            if PACKED_SERIES:
+                                refresh_packed(writer.cx, scen_id, target["table"], target["columns"],
+                                               packing_step(target, calendar.timestep))
+                            record_file(writer.cx, scen_id, kind, fingerprints[kind], rows)
+                            report[kind].update(status="imported", parse_s=msg[2]["parse_s"])
+                            report[kind]["copy_s"] += time.perf_counter() - t
+                            print(f"📄 {kind} lu en {msg[2]['parse_s']:.2f} s ({msg[2]['rows']} lignes)")
+                            if progress:
+                                progress(report)
+                        else:
+                            raise RuntimeError(f"Échec de lecture de {kind} :\n{msg[2]}")
+
+                    for kind, fp in unchanged:
+                        if fp["touched"]:
+                            record_file(writer.cx, scen_id, kind, fp, None)
+                    if "output.rsv" in fingerprints:
+                        sync_reservoirs(writer.cx, txtinout)
+            except BaseException:
+                stop.set()
+                _drain(queue, futures)
+                raise
+
+    if CUBE_DIR:
+        # Cubes mmap des tables modifiées, depuis les lignes qui viennent d'être validées
+        for kind in fingerprints:
+            refresh_cube(scen_id, RESULT_TARGETS[kind]["table"], RESULT_TARGETS[kind]["columns"])
+
+    total = time.perf_counter() - t0
+    rows = sum(r["rows"] for r in report.values())
+    print("\n📊 Bilan par fichier")
+    for kind, r in report.items():
+        rate = round(r["rows"] / r["copy_s"]) if r["copy_s"] else r["rows"]
+        print(f"   {kind:<12} {r['status']:<9} {r['rows']:>10} lignes | lecture {r['parse_s'] or 0:7.2f} s "
+              f"| COPY {r['copy_s']:7.2f} s ({rate} lignes/s)")
+    print(f"✅ {rows} lignes importées en {total:.2f} s ({round(rows / total) if total else rows} lignes/s)")
+    return {"scenario_id": scen_id, "seconds": round(total, 3), "rows": rows, "files": report}
+
+
+# ==========================================================
+# 4. Ligne de commande
+# ==========================================================
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Import d'un run SWAT (dossier TxtInOut) dans swat_sebou.")
+    parser.add_argument("txtinout", help="Dossier TxtInOut du run SWAT")
+    parser.add_argument("scenario", help="Nom du scénario")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus de lecture")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Blocs en attente max.")
+    args = parser.parse_args(argv)
+    import_txtinout(args.txtinout, args.scenario, args.workers, args.queue_size)
+
+
+if __name__ == "__main__":
+    main()
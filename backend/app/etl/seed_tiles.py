@@ -0,0 +1,137 @@
+# backend/app/etl/seed_tiles.py
+"""
+Pré-génération des tuiles vectorielles sur l'emprise du bassin du Sebou.
+
+    python -m app.etl.seed_tiles [--layers douars communes ...] [--min-zoom 5] [--max-zoom 12] [--workers 4]
+
+Les tuiles sont écrites dans le cache disque de l'API (app.core.tile_cache),
+sous la version courante de chaque couche : l'API les sert ensuite sans
+requête. La reprise est naturelle : une tuile déjà présente pour la version
+courante n'est pas recalculée. Zoom par zoom, seules les tuiles filles d'une
+tuile non vide sont générées ; les autres (quasi toujours vides) restent
+générées à la demande par l'API.
+"""
+
+import argparse
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from app.core.tile_cache import layer_version, read_tile, tile_path, write_tile
+from app.db.session import SessionLocal
+from app.routers.layers import LAYER_MAP, MVT_MAX_ZOOM, _resolve_key, render_tile
+
+BASIN_TABLE = "public.bassin_sebou"
+
+
+# ==========================================================
+# 1. Emprise et grille
+# ==========================================================
+def basin_bbox(db) -> tuple[float, float, float, float]:
+    """Emprise (lon_min, lat_min, lon_max, lat_max) du bassin, en WGS84."""
+    row = db.execute(text(f"""
+        SELECT ST_XMin(e), ST_YMin(e), ST_XMax(e), ST_YMax(e)
+        FROM (SELECT ST_Extent(ST_Transform(geom, 4326)) AS e FROM {BASIN_TABLE}) s
+    """)).first()
+    if row is None or row[0] is None:
+        raise RuntimeError(f"{BASIN_TABLE} est vide : emprise inconnue")
+    return tuple(row)
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> tuple[int, int]:
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def bbox_tiles(bbox: tuple, z: int) -> set[tuple[int, int]]:
+    lon_min, lat_min, lon_max, lat_max = bbox
+    x0, y0 = lonlat_to_tile(lon_min, lat_max, z)
+    x1, y1 = lonlat_to_tile(lon_max, lat_min, z)
+    return {(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)}
+
+
+# ==========================================================
+# 2. Génération
+# ==========================================================
+_local = threading.local()
+
+
+def _session():
+    if not hasattr(_local, "db"):
+        _local.db = SessionLocal()
+    return _local.db
+
+
+def _seed_tile(key: str, table: str, version: str, z: int, x: int, y: int) -> tuple[bool, bool]:
+    """Génère une tuile si elle manque. Retourne (générée, non vide)."""
+    path = tile_path(table, version, z, x, y)
+    tile = read_tile(path)
+    if tile is not None:
+        return False, len(tile) > 0
+    tile = render_tile(_session(), key, z, x, y)
+    write_tile(path, tile)
+    return True, len(tile) > 0
+
+
+def seed_layer(key: str, bbox: tuple, min_zoom: int, max_zoom: int, pool: ThreadPoolExecutor) -> dict:
+    table = LAYER_MAP[key]["table"]
+    stats = {"rendered": 0, "cached": 0, "empty": 0}
+    with SessionLocal() as db:
+        version = layer_version(db, table)
+    if version is None:
+        print(f"⚠️ {key} : version non suivie, rien à pré-générer (python -m app.core.tile_cache --install)")
+        return stats
+    t0 = time.perf_counter()
+    parents = None
+    for z in range(min_zoom, max_zoom + 1):
+        tiles = bbox_tiles(bbox, z)
+        if parents is not None:
+            tiles = {(x, y) for x, y in tiles if (x // 2, y // 2) in parents}
+        tiles = sorted(tiles)
+        results = pool.map(lambda t: _seed_tile(key, table, version, z, *t), tiles)
+        parents = set()
+        for (x, y), (rendered, filled) in zip(tiles, results):
+            stats["rendered" if rendered else "cached"] += 1
+            if filled:
+                parents.add((x, y))
+            else:
+                stats["empty"] += 1
+        print(f"   … {key} z{z} : {len(tiles)} tuiles ({len(parents)} non vides)")
+        if not parents:
+            break
+    print(f"🗺️ {key} (version {version}) : {stats['rendered']} générées, {stats['cached']} déjà en cache, "
+          f"{stats['empty']} vides en {time.perf_counter() - t0:.1f} s")
+    return stats
+
+
+# ==========================================================
+# 3. Ligne de commande
+# ==========================================================
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pré-génération des tuiles MVT sur le bassin du Sebou.")
+    parser.add_argument("--layers", nargs="*", default=None, help="Couches ou alias (défaut : toutes)")
+    parser.add_argument("--min-zoom", type=int, default=5)
+    parser.add_argument("--max-zoom", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Requêtes en parallèle")
+    args = parser.parse_args(argv)
+    if not 0 <= args.min_zoom <= args.max_zoom <= MVT_MAX_ZOOM:
+        parser.error(f"zooms attendus : 0 <= min <= max <= {MVT_MAX_ZOOM}")
+
+    keys = [_resolve_key(k) for k in args.layers] if args.layers else list(LAYER_MAP)
+    with SessionLocal() as db:
+        bbox = basin_bbox(db)
+    print(f"🚀 Pré-génération z{args.min_zoom}-{args.max_zoom} de {len(keys)} couches sur {bbox}")
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for key in keys:
+            seed_layer(key, bbox, args.min_zoom, args.max_zoom, pool)
+
+
+if __name__ == "__main__":
+    main()
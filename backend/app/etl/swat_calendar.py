@@ -0,0 +1,125 @@
+# backend/app/etl/swat_calendar.py
+"""
+Calendrier réel d'une simulation SWAT, lu dans TxtInOut/file.cio.
+
+Les sorties SWAT ne contiennent pas de date complète : la colonne MON porte
+le mois (IPRINT=0), le jour julien (IPRINT=1) ou l'année (IPRINT=2), suivie
+des lignes de synthèse annuelles et de la moyenne finale. On reconstruit ici
+la date de chaque ligne à partir de NBYR, IYR, IDAF, IPRINT et NYSKIP, et on
+écarte les lignes de synthèse.
+"""
+
+import os
+import re
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+TIMESTEPS = {0: "monthly", 1: "daily", 2: "annual"}
+
+
+# ==========================================================
+# 1. Lecture de file.cio
+# ==========================================================
+def read_file_cio(path: str) -> dict:
+    """
+    Lit les paramètres de calendrier de file.cio (`path` = fichier ou dossier
+    TxtInOut). Retourne {"nbyr", "iyr", "idaf", "idal", "iprint", "nyskip"}.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, "file.cio")
+    wanted = {"NBYR", "IYR", "IDAF", "IDAL", "IPRINT", "NYSKIP"}
+    cio: dict[str, int] = {}
+    with open(path, encoding="latin-1") as fh:
+        for line in fh:
+            m = re.match(r"\s*(-?\d+)\s*\|\s*([A-Z_]+)\s*:", line)
+            if m and m.group(2) in wanted:
+                cio[m.group(2).lower()] = int(m.group(1))
+    missing = {k.lower() for k in wanted} - set(cio)
+    if missing:
+        raise ValueError(f"Paramètres absents de {path} : {', '.join(sorted(missing))}")
+    return cio
+
+
+# ==========================================================
+# 2. Calendrier
+# ==========================================================
+class SwatCalendar:
+    """
+    Attribue une date aux lignes des sorties SWAT, bloc par bloc.
+
+    Les lignes d'une même unité (sous-bassin, tronçon, réservoir) se suivent
+    dans l'ordre chronologique : la k-ième ligne périodique d'une unité tombe
+    sur la k-ième période après le début de l'impression. Un compteur par
+    unité est conservé d'un bloc à l'autre.
+    """
+
+    def __init__(self, cio: dict):
+        self.cio = cio
+        self.timestep = TIMESTEPS.get(cio["iprint"], "monthly")
+        first_year = cio["iyr"] + cio["nyskip"]
+        # Avec NYSKIP > 0 l'impression démarre au 1er janvier de l'année suivante
+        self.start = (date(first_year, 1, 1) + timedelta(days=cio["idaf"] - 1)
+                      if cio["nyskip"] == 0 else date(first_year, 1, 1))
+        last_year = cio["iyr"] + cio["nbyr"] - 1
+        self.end = date(last_year, 1, 1) + timedelta(days=(cio["idal"] or 365) - 1)
+        self._seen: dict[int, int] = {}
+
+    @classmethod
+    def from_txtinout(cls, path: str) -> "SwatCalendar":
+        return cls(read_file_cio(path))
+
+    def reset(self) -> None:
+        self._seen.clear()
+
+    def _rank(self, units: np.ndarray) -> np.ndarray:
+        """Rang chronologique de chaque ligne au sein de son unité."""
+        s = pd.Series(units)
+        rank = (s.groupby(units).cumcount().to_numpy(dtype=np.int64)
+                + s.map(self._seen).fillna(0).to_numpy(dtype=np.int64))
+        for unit, count in zip(*np.unique(units, return_counts=True)):
+            self._seen[int(unit)] = self._seen.get(int(unit), 0) + int(count)
+        return rank
+
+    def assign(self, frame: pd.DataFrame, unit: str, period: str = "mon") -> pd.DataFrame:
+        """
+        Ajoute la colonne `date` et supprime les lignes de synthèse
+        (totaux annuels, moyenne de simulation).
+        """
+        mon = frame[period].to_numpy(dtype=np.float64)
+        integral = np.equal(np.mod(mon, 1), 0)
+
+        if self.timestep == "annual":
+            keep = integral & (mon >= 1000)
+            out = frame.loc[keep].copy()
+            out["date"] = pd.to_datetime(out[period].astype(int).astype(str) + "-01-01")
+            return out
+
+        limit = 12 if self.timestep == "monthly" else 366
+        keep = integral & (mon >= 1) & (mon <= limit)
+        out = frame.loc[keep].copy()
+        rank = self._rank(out[unit].to_numpy())
+        mon = mon[keep].astype(np.int64)
+
+        if self.timestep == "monthly":
+            months = np.datetime64(self.start.strftime("%Y-%m"), "M") + rank
+            dates = months.astype("datetime64[D]")
+            check = months.astype(np.int64) % 12 + 1
+        else:
+            dates = np.datetime64(self.start.isoformat(), "D") + rank
+            check = (dates - dates.astype("datetime64[Y]").astype("datetime64[D]")).astype(np.int64) + 1
+
+        if len(check) and not np.array_equal(check, mon):
+            bad = int(np.argmax(check != mon))
+            raise ValueError(
+                f"Calendrier incohérent ({self.timestep}) : ligne {bad} MON={mon[bad]}, attendu {check[bad]}"
+            )
+        out["date"] = dates
+        return out
+
+
+def dates_from_year_day(year: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Dates à partir des colonnes année / jour julien (watout.dat)."""
+    years = np.asarray(year, dtype=np.int64) - 1970
+    return years.astype("datetime64[Y]").astype("datetime64[D]") + (np.asarray(day, dtype=np.int64) - 1)
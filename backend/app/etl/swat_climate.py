@@ -0,0 +1,153 @@
+# backend/app/etl/swat_climate.py
+"""
+Forçages climatiques SWAT (pcpN.pcp, tmpN.tmp) : lecture vectorisée et chargement.
+
+    python -m app.etl.swat_climate <dossier TxtInOut> <scénario>
+
+Format : 4 lignes d'en-tête (Station / Lati / Long / Elev), puis une ligne par
+jour : date AAAAJJJ sur 7 caractères suivie d'un champ de 5 caractères par
+station (.pcp : pluie en mm ; .tmp : Tmax puis Tmin en °C). -99 = valeur manquante.
+Toutes les stations sont décodées d'un coup sur une matrice d'octets.
+"""
+
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from numpy.lib.recfunctions import structured_to_unstructured
+
+from app.etl.swat_calendar import dates_from_year_day
+from app.etl.swat_copy import CopyWriter, iter_frame_chunks
+from app.etl.swat_parser import _decode_block
+
+FIELD_WIDTH = 5
+MISSING = -99.0
+FORCING_FILES = re.compile(r"^(pcp|tmp)\d+\.(pcp|tmp)$", re.IGNORECASE)
+FORCING_COLUMNS = ["scenario_id", "source", "station", "date", "pcp", "tmax", "tmin"]
+STATION_COLUMNS = ["scenario_id", "source", "station", "name", "lat", "lon", "elev"]
+
+
+# ==========================================================
+# 1. Lecture
+# ==========================================================
+def _header_values(line: bytes) -> list[float]:
+    return [float(v) for v in line.split()[1:]]
+
+
+def read_forcing(path: str) -> dict:
+    """
+    Lit un fichier .pcp ou .tmp. Retourne {"source", "kind", "stations", "dates", "values"} :
+      - stations : DataFrame (station, name, lat, lon, elev) ;
+      - values   : {"pcp": (jours, stations)} ou {"tmax": ..., "tmin": ...}, NaN si manquant.
+    """
+    with open(path, "rb") as fh:
+        lines = fh.read().splitlines()
+    source = os.path.basename(path).lower()
+    kind = source.rsplit(".", 1)[1]
+
+    names = [n.strip() for n in lines[0].decode("latin-1").split(None, 1)[1].split(",") if n.strip()]
+    lat, lon, elev = (_header_values(lines[i]) for i in (1, 2, 3))
+    n = len(lat)
+    stations = pd.DataFrame({
+        "station": np.arange(1, n + 1),
+        "name": (names + [None] * n)[:n],
+        "lat": lat, "lon": lon, "elev": (elev + [np.nan] * n)[:n],
+    })
+
+    data = [l for l in lines[4:] if l.strip()]
+    per_station = 2 if kind == "tmp" else 1
+    fields = [("yyyyddd", 0, 7)] + [
+        (f"v{i}", 7 + i * FIELD_WIDTH, 7 + (i + 1) * FIELD_WIDTH) for i in range(n * per_station)
+    ]
+    dtype = np.dtype([("yyyyddd", "i8")] + [(f"v{i}", "f8") for i in range(n * per_station)])
+    rec = _decode_block(data, fields, dtype)
+
+    grid = structured_to_unstructured(rec[[f"v{i}" for i in range(n * per_station)]], dtype=np.float64)
+    grid[grid <= MISSING] = np.nan
+    dates = dates_from_year_day(rec["yyyyddd"] // 1000, rec["yyyyddd"] % 1000)
+    values = {"pcp": grid} if kind == "pcp" else {"tmax": grid[:, 0::2], "tmin": grid[:, 1::2]}
+    return {"source": source, "kind": kind, "stations": stations, "dates": dates, "values": values}
+
+
+def forcing_frame(forcing: dict, scen_id: int) -> pd.DataFrame:
+    """Grille (jours × stations) -> lignes (scénario, fichier, station, date, pcp, tmax, tmin)."""
+    dates = forcing["dates"]
+    n_days, n_st = len(dates), len(forcing["stations"])
+    df = pd.DataFrame({
+        "scenario_id": scen_id,
+        "source": forcing["source"],
+        "station": np.tile(np.arange(1, n_st + 1), n_days),
+        "date": np.repeat(dates, n_st),
+    })
+    for col in ("pcp", "tmax", "tmin"):
+        grid = forcing["values"].get(col)
+        df[col] = grid.ravel() if grid is not None else np.nan
+    return df[FORCING_COLUMNS]
+
+
+def list_forcing_files(txtinout: str) -> list[tuple[str, str]]:
+    """(nom en minuscules, chemin) des fichiers pcpN.pcp / tmpN.tmp du dossier."""
+    return sorted((n.lower(), os.path.join(txtinout, n)) for n in os.listdir(txtinout) if FORCING_FILES.match(n))
+
+
+# ==========================================================
+# 2. Chargement dans swat_sebou
+# ==========================================================
+def import_forcing(txtinout: str, scen_id: int, manifest: dict | None = None) -> int:
+    """
+    Charge les forçages modifiés depuis le dernier import du scénario
+    (swat_climate_stations, swat_climate_forcing). Retourne le nombre de lignes écrites.
+    """
+    from app.etl.swat_manifest import load_manifest, plan_files, record_file
+
+    files = list_forcing_files(txtinout)
+    if not files:
+        return 0
+    changed, unchanged = plan_files(files, manifest if manifest is not None else load_manifest(scen_id))
+    total = 0
+    with CopyWriter() as writer:
+        for kind, fp in unchanged:
+            if fp["touched"]:
+                record_file(writer.cx, scen_id, kind, fp, None)
+        for source, path, fp in changed:
+            forcing = read_forcing(path)
+            stations = forcing["stations"].assign(scenario_id=scen_id, source=source)[STATION_COLUMNS]
+            rows = forcing_frame(forcing, scen_id)
+            with writer.cx.cursor() as cur:
+                cur.execute("DELETE FROM swat_sebou.swat_climate_forcing WHERE scenario_id = %s AND source = %s",
+                            (scen_id, source))
+                cur.execute("DELETE FROM swat_sebou.swat_climate_stations WHERE scenario_id = %s AND source = %s",
+                            (scen_id, source))
+            writer.copy_frame("swat_sebou.swat_climate_stations", STATION_COLUMNS, stations)
+            for chunk in iter_frame_chunks(rows):
+                writer.copy_frame("swat_sebou.swat_climate_forcing", FORCING_COLUMNS, chunk)
+            record_file(writer.cx, scen_id, source, fp, len(rows))
+            total += len(rows)
+            print(f"🌦️ {source} : {len(stations)} stations, {len(forcing['dates'])} jours, {len(rows)} lignes")
+    return total
+
+
+# ==========================================================
+# 3. Ligne de commande
+# ==========================================================
+def main(argv: list[str] | None = None) -> None:
+    from app.etl.import_swat_final import ensure_scenario
+    from app.etl.swat_calendar import SwatCalendar
+    from app.etl.swat_schema import ensure_swat_schema
+
+    parser = argparse.ArgumentParser(description="Import des forçages climatiques SWAT (pcp/tmp).")
+    parser.add_argument("txtinout", help="Dossier TxtInOut du run SWAT")
+    parser.add_argument("scenario", help="Nom du scénario")
+    args = parser.parse_args(argv)
+
+    ensure_swat_schema()
+    calendar = SwatCalendar.from_txtinout(args.txtinout)
+    scen_id = ensure_scenario(args.scenario, calendar.timestep, calendar.start, calendar.end)
+    rows = import_forcing(args.txtinout, scen_id)
+    print(f"✅ {rows} lignes de forçage importées" if rows else "⏭️ Forçages inchangés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# backend/app/etl/swat_copy.py
+"""
+Chargement en masse des résultats SWAT via COPY FROM STDIN.
+
+Remplace les INSERT « executemany » (un aller-retour par ligne) par un flux
+CSV envoyé par blocs bornés : la mémoire reste constante et un run journalier
+de 25 ans sur les 27 sous-bassins se charge en quelques secondes.
+"""
+
+import io
+import os
+import time
+from typing import Iterable, Iterator, Sequence
+
+import pandas as pd
+
+from app.db.session import engine
+from app.etl.swat_schema import PARTITIONED_TABLES, ensure_year_partitions
+
+# Nombre de lignes envoyées par COPY (borne la mémoire du tampon CSV)
+COPY_CHUNK_ROWS = int(os.getenv("SWAT_COPY_CHUNK_ROWS", "50000"))
+
+
+# ==========================================================
+# 1. Découpage / sérialisation
+# ==========================================================
+def iter_frame_chunks(df: pd.DataFrame, chunk_rows: int = COPY_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Découpe un DataFrame en tranches de `chunk_rows` lignes (sans copie)."""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def frame_to_csv(chunk: pd.DataFrame) -> str:
+    """
+    Sérialise un bloc en CSV au format COPY (NULL = champ vide), colonnes dans
+    l'ordre du DataFrame. Peut être appelée dans un processus de parsing pour
+    décharger le writer.
+    """
+    buf = io.StringIO()
+    chunk.to_csv(buf, header=False, index=False, na_rep="", date_format="%Y-%m-%d")
+    return buf.getvalue()
+
+
+# ==========================================================
+# 2. Writer COPY (une connexion, une transaction)
+# ==========================================================
+class CopyWriter:
+    """
+    Writer unique : toutes les tables sont alimentées sur la même connexion
+    et validées ensemble par `commit()` (ou à la sortie du bloc `with`).
+
+    - `cx` : connexion DBAPI (psycopg2) existante ; si absente, une connexion
+      est prise sur l'engine et fermée par `close()`.
+    """
+
+    def __init__(self, cx=None):
+        self.own = cx is None
+        self.cx = engine.raw_connection() if self.own else cx
+        self.stats: dict[str, dict] = {}
+
+    def copy_csv(self, table: str, columns: Sequence[str], data: str, rows: int) -> None:
+        """Envoie un bloc CSV déjà sérialisé dans `table`."""
+        if not rows:
+            return
+        t = time.perf_counter()
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        with self.cx.cursor() as cur:
+            cur.copy_expert(sql, io.StringIO(data))
+        st = self.stats.setdefault(table, {"table": table, "rows": 0, "seconds": 0.0})
+        st["rows"] += rows
+        st["seconds"] += time.perf_counter() - t
+
+    def copy_frame(self, table: str, columns: Sequence[str], chunk: pd.DataFrame) -> None:
+        """`columns` : colonnes cibles, dans l'ordre des colonnes de `chunk`."""
+        self.copy_csv(table, columns, frame_to_csv(chunk), len(chunk))
+
+    def create_staging(self, table: str, columns: Sequence[str]) -> str:
+        """
+        Crée une table temporaire vide aux colonnes de `table` (détruite au
+        commit) : les blocs y sont copiés avant d'être basculés d'un coup.
+        """
+        staging = "stg_" + table.split(".")[-1]
+        with self.cx.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {staging}")
+            cur.execute(f"""
+                CREATE TEMP TABLE {staging} ON COMMIT DROP AS
+                SELECT {', '.join(columns)} FROM {table} WITH NO DATA
+            """)
+        return staging
+
+    def swap_scenario(self, table: str, staging: str, columns: Sequence[str], scen_id: int) -> int:
+        """
+        Remplace les lignes du scénario dans `table` par le contenu de `staging`.
+        Tout se fait dans la transaction du writer : les lecteurs voient soit
+        l'ancienne version complète, soit la nouvelle, jamais un état partiel.
+        Les partitions annuelles manquantes sont créées d'après les dates
+        effectivement lues (watout.dat porte ses propres années).
+        """
+        cols = ", ".join(columns)
+        with self.cx.cursor() as cur:
+            if table in PARTITIONED_TABLES and "date" in columns:
+                cur.execute(f"SELECT DISTINCT EXTRACT(YEAR FROM date)::int FROM {staging} "
+                            f"WHERE date IS NOT NULL ORDER BY 1")
+                ensure_year_partitions(cur, table, [r[0] for r in cur.fetchall()])
+            cur.execute(f"DELETE FROM {table} WHERE scenario_id = %s", (scen_id,))
+            cur.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {staging}")
+            rows = cur.rowcount
+            cur.execute(f"DROP TABLE {staging}")
+        return rows
+
+    def report(self, table: str, label: str | None = None) -> dict:
+        """Statistiques d'une table : {"table", "rows", "seconds", "rows_per_s"}."""
+        st = dict(self.stats.get(table, {"table": table, "rows": 0, "seconds": 0.0}))
+        st["seconds"] = round(st["seconds"], 3)
+        st["rows_per_s"] = round(st["rows"] / st["seconds"]) if st["seconds"] > 0 else st["rows"]
+        print(f"⚡ {label or table} : {st['rows']} lignes copiées en {st['seconds']} s "
+              f"({st['rows_per_s']} lignes/s)")
+        return st
+
+    def commit(self) -> None:
+        if self.own:
+            self.cx.commit()
+
+    def rollback(self) -> None:
+        if self.own:
+            self.cx.rollback()
+
+    def close(self) -> None:
+        if self.own:
+            self.cx.close()
+
+    def __enter__(self) -> "CopyWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+
+
+# ==========================================================
+# 3. Raccourcis
+# ==========================================================
+def copy_frames(
+    table: str,
+    columns: Sequence[str],
+    frames: Iterable[pd.DataFrame],
+    cx=None,
+    label: str | None = None,
+) -> dict:
+    """
+    Envoie une suite de DataFrames dans `table` via COPY FROM STDIN.
+
+    - `columns` : colonnes cibles, dans l'ordre des colonnes du DataFrame.
+    - `cx` : connexion DBAPI existante ; sinon la transaction est validée ici.
+
+    Retourne {"table", "rows", "seconds", "rows_per_s"}.
+    """
+    with CopyWriter(cx) as writer:
+        for chunk in frames:
+            writer.copy_frame(table, columns, chunk)
+    return writer.report(table, label)
+
+
+def copy_dataframe(table: str, columns: Sequence[str], df: pd.DataFrame,
+                   chunk_rows: int = COPY_CHUNK_ROWS, cx=None, label: str | None = None) -> dict:
+    """Raccourci : COPY d'un DataFrame complet par blocs de `chunk_rows` lignes."""
+    return copy_frames(table, columns, iter_frame_chunks(df, chunk_rows), cx=cx, label=label)
@@ -0,0 +1,209 @@
+# backend/app/etl/swat_cube.py
+"""
+Cubes de résultats SWAT sur disque (optionnels) : lecture par tranches sans copie.
+
+Activés par SWAT_CUBE_DIR. Pour chaque scénario et table de résultats :
+
+    <SWAT_CUBE_DIR>/<scénario>/<table>.<version>.npy   float64, forme (variables, unités, dates), NaN = absent
+    <SWAT_CUBE_DIR>/<scénario>/<table>.<version>.json  index : variables, unités, dates (ISO)
+    <SWAT_CUBE_DIR>/<scénario>/<table>.current         version en service
+
+Les cubes sont réécrits à la fin de l'import d'un fichier modifié (à partir
+des lignes validées en base) et ouverts en mmap par l'API : la série d'une
+variable et d'une unité est une vue contiguë du fichier. Sans cube, l'API
+lit la base comme avant.
+
+Une version n'est jamais modifiée : le cube et son index sont écrits sous un
+nouveau nom, puis le pointeur `.current` est remplacé atomiquement. Un
+lecteur ouvre donc toujours un cube et l'index qui lui correspond.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+CUBE_DIR = os.getenv("SWAT_CUBE_DIR")
+
+_lock = threading.Lock()
+_open: dict = {}
+
+
+def cube_dir(scen_id: int, root: str | None = None) -> str:
+    return os.path.join(root or CUBE_DIR, str(scen_id))
+
+
+def cube_pointer(scen_id: int, table: str, root: str | None = None) -> str:
+    return os.path.join(cube_dir(scen_id, root), table.split(".")[-1] + ".current")
+
+
+def cube_paths(scen_id: int, table: str, version: str, root: str | None = None) -> tuple[str, str]:
+    base = os.path.join(cube_dir(scen_id, root), f"{table.split('.')[-1]}.{version}")
+    return base + ".npy", base + ".json"
+
+
+def current_version(scen_id: int, table: str, root: str | None = None) -> str | None:
+    try:
+        with open(cube_pointer(scen_id, table, root)) as fh:
+            return fh.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+# ==========================================================
+# 1. Écriture (fin d'import)
+# ==========================================================
+def write_cube(conn, scen_id: int, table: str, columns: dict, root: str | None = None) -> tuple | None:
+    """
+    Construit le cube d'une table de résultats pour un scénario. `columns` est
+    la table de correspondance de l'import (scenario_id, unité, date, variables...).
+    Retourne la forme écrite, ou None si le scénario n'a aucune ligne.
+    """
+    unit_col, variables = list(columns)[1], list(columns)[3:]
+    rows = conn.execute(text(f"""
+        SELECT {unit_col}, date, {", ".join(variables)}
+        FROM {table}
+        WHERE scenario_id = :sid
+    """), {"sid": scen_id}).all()
+    if not rows:
+        drop_cube(scen_id, table, root)
+        return None
+
+    df = pd.DataFrame(rows, columns=["unit", "date", *variables])
+    units = np.sort(df["unit"].unique())
+    dates = np.unique(df["date"].to_numpy(dtype="datetime64[D]"))
+    ui = np.searchsorted(units, df["unit"].to_numpy())
+    di = np.searchsorted(dates, df["date"].to_numpy(dtype="datetime64[D]"))
+
+    cube = np.full((len(variables), len(units), len(dates)), np.nan)
+    for k, var in enumerate(variables):
+        cube[k, ui, di] = df[var].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # Nouvelle version (cube + index), puis bascule atomique du pointeur
+    version = f"{time.time_ns()}-{os.getpid()}"
+    npy_path, idx_path = cube_paths(scen_id, table, version, root)
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    np.save(npy_path, cube)
+    with open(idx_path, "w") as fh:
+        json.dump({"table": table, "unit_col": unit_col, "variables": variables,
+                   "units": units.tolist(), "dates": [str(d) for d in dates]}, fh)
+    pointer = cube_pointer(scen_id, table, root)
+    previous = current_version(scen_id, table, root)
+    with open(pointer + ".tmp", "w") as fh:
+        fh.write(version)
+    os.replace(pointer + ".tmp", pointer)
+    # La version précédente reste lisible par les requêtes en cours ; les plus anciennes partent
+    _prune(scen_id, table, keep={version, previous}, root=root)
+    print(f"🧊 Cube {table.split('.')[-1]} : {cube.shape} (scénario {scen_id})")
+    return cube.shape
+
+
+def refresh_cube(scen_id: int, table: str, columns: dict) -> tuple | None:
+    """
+    Après la bascule d'une table : retire le cube en service (l'API relit la
+    base), puis le reconstruit depuis les lignes validées.
+    """
+    from app.db.session import engine
+
+    drop_cube(scen_id, table)
+    with engine.connect() as conn:
+        return write_cube(conn, scen_id, table, columns)
+
+
+def drop_cube(scen_id: int, table: str, root: str | None = None) -> None:
+    """Retire le pointeur (lecture en base dès maintenant) ; les fichiers suivent au prochain nettoyage."""
+    pointer = cube_pointer(scen_id, table, root)
+    if os.path.exists(pointer):
+        os.remove(pointer)
+
+
+def _prune(scen_id: int, table: str, keep: set, root: str | None = None) -> None:
+    folder, prefix = cube_dir(scen_id, root), table.split(".")[-1] + "."
+    for name in os.listdir(folder):
+        if not name.startswith(prefix) or not name.endswith((".npy", ".json")):
+            continue
+        version = name[len(prefix):].rsplit(".", 1)[0]
+        if version not in keep:
+            try:
+                os.remove(os.path.join(folder, name))
+            except FileNotFoundError:
+                pass
+
+
+# ==========================================================
+# 2. Lecture (API)
+# ==========================================================
+class Cube:
+    """Cube ouvert en mmap avec ses index (positions des variables, unités et dates)."""
+
+    def __init__(self, data: np.ndarray, index: dict):
+        self.data = data
+        self.variables = {v: k for k, v in enumerate(index["variables"])}
+        self.units = {u: k for k, u in enumerate(index["units"])}
+        self.dates = np.array(index["dates"], dtype="datetime64[D]")
+
+    def date_range(self, date_start=None, date_end=None) -> slice:
+        lo = np.searchsorted(self.dates, np.datetime64(date_start, "D")) if date_start else 0
+        hi = np.searchsorted(self.dates, np.datetime64(date_end, "D"), side="right") if date_end else len(self.dates)
+        return slice(lo, hi)
+
+    def series(self, variable: str, unit: int, window: slice) -> np.ndarray | None:
+        """Vue (sans copie) d'une série, None si l'unité n'est pas dans le cube."""
+        u = self.units.get(unit)
+        return None if u is None else self.data[self.variables[variable], u, window]
+
+    def present(self, units: list[int], window: slice) -> np.ndarray:
+        """Masque des dates de la fenêtre où au moins une des unités a une valeur."""
+        pos = [self.units[u] for u in units if u in self.units]
+        if not pos:
+            return np.zeros(window.stop - window.start, dtype=bool)
+        return ~np.isnan(self.data[:, pos, window]).all(axis=(0, 1))
+
+
+def open_cube(scen_id: int, table: str) -> Cube | None:
+    """Cube en service du scénario (mis en cache par version), None si absent."""
+    if not CUBE_DIR:
+        return None
+    version = current_version(scen_id, table)
+    if version is None:
+        return None
+    key = (scen_id, table)
+    with _lock:
+        hit = _open.get(key)
+        if hit and hit[0] == version:
+            return hit[1]
+    npy_path, idx_path = cube_paths(scen_id, table, version)
+    try:
+        with open(idx_path) as fh:
+            index = json.load(fh)
+        data = np.load(npy_path, mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+    if data.shape != (len(index["variables"]), len(index["units"]), len(index["dates"])):
+        return None
+    cube = Cube(data, index)
+    with _lock:
+        _open[key] = (version, cube)
+    return cube
+
+
+# ==========================================================
+# 3. Ligne de commande
+# ==========================================================
+if __name__ == "__main__":
+    # (Re)construction des cubes de scénarios déjà importés : python -m app.etl.swat_cube <id> [<id> ...]
+    import sys
+
+    from app.db.session import engine
+    from app.etl.import_swat_final import RESULT_TARGETS
+
+    if not CUBE_DIR:
+        sys.exit("SWAT_CUBE_DIR n'est pas défini")
+    with engine.connect() as conn:
+        for sid in map(int, sys.argv[1:]):
+            for target in RESULT_TARGETS.values():
+                write_cube(conn, sid, target["table"], target["columns"])
@@ -0,0 +1,113 @@
+# backend/app/etl/swat_fig.py
+"""
+Lecture de TxtInOut/fig.fig (configuration du bassin SWAT).
+
+Chaque commande occupe une ligne (nom, code, hydrogramme de sortie, entrées),
+éventuellement suivie d'une ligne de noms de fichiers de 13 caractères.
+"""
+
+import os
+import re
+
+# Codes de commande SWAT (icode) utiles ici
+FIG_COMMANDS = {1: "subbasin", 2: "route", 3: "routres", 5: "add", 14: "saveconc", 0: "finish"}
+
+
+def read_fig(path: str) -> list[dict]:
+    """
+    Lit fig.fig (`path` = fichier ou dossier TxtInOut) et retourne la liste
+    des commandes : {"command", "icode", "hyd", "inum1", "inum2", "inum3", "files"}.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, "fig.fig")
+    commands: list[dict] = []
+    with open(path, encoding="latin-1") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            if line[0].isspace():
+                # Ligne de fichiers rattachée à la commande précédente
+                if commands:
+                    names = line.strip()
+                    commands[-1]["files"] = [names[i:i + 13] for i in range(0, len(names), 13)]
+                continue
+            tokens = line.split()
+            ints = [int(t) for t in tokens[1:6] if re.fullmatch(r"-?\d+", t)]
+            ints += [0] * (5 - len(ints))
+            commands.append({
+                "command": tokens[0].lower(), "icode": ints[0], "hyd": ints[1],
+                "inum1": ints[2], "inum2": ints[3], "inum3": ints[4], "files": [],
+            })
+    return commands
+
+
+def _subbasin_of(filename: str) -> int | None:
+    """'000170000.res' -> 17 (les 5 premiers chiffres portent le sous-bassin)."""
+    m = re.match(r"(\d{5})\d{4}\.", filename)
+    return int(m.group(1)) if m else None
+
+
+def reservoir_subbasins(commands: list[dict]) -> dict[int, int | None]:
+    """Réservoir (inum1 des commandes routres) -> sous-bassin de son fichier .res."""
+    return {
+        c["inum1"]: (_subbasin_of(c["files"][0]) if c["files"] else None)
+        for c in commands if c["icode"] == 3
+    }
+
+
+def hydrograph_reach(commands: list[dict], hyd: int) -> int | None:
+    """
+    Tronçon (= sous-bassin) qui produit l'hydrogramme `hyd` : route -> tronçon
+    routé, routres -> sous-bassin du réservoir, subbasin -> sous-bassin.
+    """
+    for c in commands:
+        if c["hyd"] != hyd or c["icode"] == 14:
+            continue
+        if c["icode"] in (1, 2):
+            return c["inum1"]
+        if c["icode"] == 3:
+            return _subbasin_of(c["files"][0]) if c["files"] else None
+        return None
+    return None
+
+
+def saveconc_reach(commands: list[dict], filename: str) -> int | None:
+    """Tronçon dont l'hydrogramme est enregistré dans `filename` (commande saveconc)."""
+    for c in commands:
+        if c["icode"] == 14 and filename.lower() in (f.lower() for f in c["files"]):
+            return hydrograph_reach(commands, c["hyd"])
+    return None
+
+
+def routing_graph(commands: list[dict]) -> dict:
+    """
+    Graphe de routage des tronçons (un tronçon = un sous-bassin) :
+      - "upstream"   : {tronçon: ensemble des sous-bassins contributeurs, lui compris} ;
+      - "downstream" : {tronçon: tronçon aval direct, ou None à l'exutoire}.
+    Chaque hydrogramme mémorise les sous-bassins qui l'alimentent et les
+    derniers tronçons routés ; les commandes add les fusionnent.
+    """
+    subs: dict[int, frozenset] = {}
+    last: dict[int, frozenset] = {}
+    upstream: dict[int, set] = {}
+    downstream: dict[int, int | None] = {}
+
+    for c in commands:
+        icode, hyd = c["icode"], c["hyd"]
+        if icode == 1:
+            subs[hyd], last[hyd] = frozenset({c["inum1"]}), frozenset()
+        elif icode == 2:
+            reach, inflow = c["inum1"], c["inum2"]
+            upstream[reach] = set(subs.get(inflow, ())) | {reach}
+            downstream.setdefault(reach, None)
+            for r in last.get(inflow, ()):
+                if r != reach:
+                    downstream[r] = reach
+            subs[hyd], last[hyd] = frozenset(upstream[reach]), frozenset({reach})
+        elif icode == 3:
+            subs[hyd], last[hyd] = subs.get(c["inum2"], frozenset()), last.get(c["inum2"], frozenset())
+        elif icode == 5:
+            a, b = c["inum1"], c["inum2"]
+            subs[hyd] = subs.get(a, frozenset()) | subs.get(b, frozenset())
+            last[hyd] = last.get(a, frozenset()) | last.get(b, frozenset())
+    return {"upstream": upstream, "downstream": downstream}
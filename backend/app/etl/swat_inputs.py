@@ -0,0 +1,381 @@
+# backend/app/etl/swat_inputs.py
+"""
+Paramètres d'entrée SWAT (TxtInOut) : lecture, instantané binaire, chargement
+dans swat_sebou et comparaison de deux dossiers.
+
+    python -m app.etl.swat_inputs load <dossier TxtInOut> <scénario> [--workers N]
+    python -m app.etl.swat_inputs diff <dossier A> <dossier B> [--rtol 1e-9]
+
+Fichiers lus :
+  - par HRU         : .hru .sol .mgt .gw .chm .sdr .sep  (000SSHHHH, HHHH > 0)
+  - par sous-bassin : .sub .rte .swq .pnd .wgn .wus      (000SS0000)
+
+Chaque valeur devient une ligne (type de fichier, sous-bassin, HRU, paramètre,
+indice, valeur) ; l'indice vaut 0 pour un scalaire, sinon le numéro de couche
+de sol ou de mois. Le HRU vaut 0 pour les fichiers de sous-bassin.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.etl.swat_copy import CopyWriter, iter_frame_chunks
+
+HRU_FILES = ("hru", "sol", "mgt", "gw", "chm", "sdr", "sep")
+SUBBASIN_FILES = ("sub", "rte", "swq", "pnd", "wgn", "wus")
+
+# Dossier des instantanés binaires (un fichier .npz par état du dossier TxtInOut)
+CACHE_DIR = os.getenv("SWAT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sebou_swat_cache"))
+
+PARAM_COLUMNS = ["file_type", "subbasin", "hru", "param", "idx", "value"]
+HRU_COLUMNS = ["hru", "subbasin", "hru_sub", "landuse", "soil", "slope", "hydgrp"]
+
+# Libellés des lignes par couche (.sol / .chm) -> nom de paramètre SWAT
+LAYER_LABELS = {
+    "Maximum rooting depth": "SOL_ZMX",
+    "Porosity fraction from which anions are excluded": "ANION_EXCL",
+    "Crack volume potential of soil": "SOL_CRK",
+    "Depth": "SOL_Z",
+    "Bulk Density Moist": "SOL_BD",
+    "Ave. AW Incl. Rock Frag": "SOL_AWC",
+    "Ksat.": "SOL_K",
+    "Organic Carbon": "SOL_CBN",
+    "Clay": "CLAY",
+    "Silt": "SILT",
+    "Sand": "SAND",
+    "Rock Fragments": "ROCK",
+    "Soil Albedo": "SOL_ALB",
+    "Erosion K": "USLE_K",
+    "Salinity": "SOL_EC",
+    "Soil pH": "SOL_PH",
+    "Soil CACO3": "SOL_CAL",
+    "Soil NO3": "SOL_NO3",
+    "Soil organic N": "SOL_ORGN",
+    "Soil labile P": "SOL_LABP",
+    "Soil organic P": "SOL_ORGP",
+    "Phosphorus perc coef": "PPERCO_SUB",
+}
+
+# Lignes mensuelles (12 valeurs) du générateur climatique .wgn, dans l'ordre du fichier
+WGN_ROWS = ("TMPMX", "TMPMN", "TMPSTDMX", "TMPSTDMN", "PCPMM", "PCPSTD", "PCPSKW",
+            "PR_W1", "PR_W2", "PCPD", "RAINHHMX", "SOLARAV", "DEWPT", "WNDAV")
+# .wus : 4 paramètres mensuels, 6 mois par ligne
+WUS_ROWS = ("WUPND", "WURCH", "WUSHAL", "WUDEEP")
+
+_NUMBER = re.compile(r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+_HEADER = re.compile(r"HRU:(\d+)\s+Subbasin:(\d+)\s+HRU:(\d+)\s+Luse:(\S+)\s+Soil:\s*(\S+)\s+Slope:?\s*(\S+)")
+
+
+# ==========================================================
+# 1. Lecture d'un fichier
+# ==========================================================
+def _numbers(tokens) -> list[float] | None:
+    """Valeurs numériques d'une ligne, ou None si un jeton n'est pas un nombre."""
+    return [float(t) for t in tokens] if tokens and all(_NUMBER.match(t) for t in tokens) else None
+
+
+def _layer_label(label: str) -> str | None:
+    for prefix, name in LAYER_LABELS.items():
+        if label.startswith(prefix):
+            return name
+    return None
+
+
+def _parse_lines(lines: list[str], ftype: str) -> list[tuple[str, int, float]]:
+    """
+    Paramètres (nom, indice, valeur) d'un fichier d'entrée :
+      - « valeur | NOM : description »                 -> scalaire ;
+      - « | NOM : description » puis lignes de nombres -> tableau (ELEVB, RFINC...) ;
+      - « Libellé [unité] : v1 v2 ... »                -> valeurs par couche (.sol, .chm) ;
+      - .wgn / .wus : lignes mensuelles positionnelles.
+    Les lignes non numériques (titres, noms de fichiers, opérations) sont ignorées.
+    """
+    out: list[tuple[str, int, float]] = []
+    if ftype in ("wgn", "wus"):
+        names = WGN_ROWS if ftype == "wgn" else WUS_ROWS
+        per_row = 12 if ftype == "wgn" else 6
+        rows = []
+        for line in lines[1:]:
+            if "=" in line:
+                # LATITUDE = .. LONGITUDE = .. / ELEV [m] = .. / RAIN_YRS = ..
+                for key, val in re.findall(r"([A-Z_]+)[^=]*=\s*([-+.\d]+)", line):
+                    out.append(("W" + key if key in ("LATITUDE", "LONGITUDE", "ELEV") else key, 0, float(val)))
+                continue
+            vals = _numbers(line.split())
+            if vals and len(vals) == per_row:
+                rows.append(vals)
+        for r, vals in enumerate(rows):
+            name = names[r * per_row // 12] if r * per_row // 12 < len(names) else None
+            if name is None:
+                break
+            offset = (r * per_row) % 12
+            out.extend((name, offset + i + 1, v) for i, v in enumerate(vals))
+        return out
+
+    pending: str | None = None
+    counts: dict[str, int] = {}
+    for line in lines[1:]:
+        if "|" in line:
+            left, right = line.split("|", 1)
+            m = re.match(r"\s*([A-Za-z][A-Za-z0-9_]*)", right)
+            name = m.group(1).upper() if m else None
+            pending = None
+            if not left.strip():
+                pending = name
+            elif name:
+                vals = _numbers(left.split())
+                if vals and len(vals) == 1:
+                    out.append((name, 0, vals[0]))
+            continue
+
+        if ":" in line and ftype in ("sol", "chm"):
+            label, values = line.split(":", 1)
+            name = _layer_label(label.strip())
+            vals = _numbers(values.split())
+            pending = None
+            if name and vals:
+                if len(vals) == 1 and name in ("SOL_ZMX", "ANION_EXCL", "SOL_CRK"):
+                    out.append((name, 0, vals[0]))
+                else:
+                    out.extend((name, i + 1, v) for i, v in enumerate(vals))
+            continue
+
+        vals = _numbers(line.split())
+        if vals is None:
+            pending = None
+        elif pending:
+            start = counts.get(pending, 0)
+            out.extend((pending, start + i + 1, v) for i, v in enumerate(vals))
+            counts[pending] = start + len(vals)
+    return out
+
+
+def _hru_header(lines: list[str]) -> dict:
+    """Métadonnées HRU de l'en-tête (.hru, .sol) : numéro global, occupation, sol, pente."""
+    m = _HEADER.search(lines[0]) if lines else None
+    if not m:
+        return {}
+    meta = {"hru": int(m.group(1)), "subbasin": int(m.group(2)), "hru_sub": int(m.group(3)),
+            "landuse": m.group(4), "soil": m.group(5), "slope": m.group(6)}
+    for line in lines[1:4]:
+        g = re.match(r"\s*Soil Hydrologic Group:\s*(\S+)", line)
+        if g:
+            meta["hydgrp"] = g.group(1)
+    return meta
+
+
+def parse_input_file(path: str) -> dict:
+    """
+    Lit un fichier d'entrée SWAT. Retourne {"file_type", "subbasin", "hru",
+    "meta", "params"} où `params` est la liste (nom, indice, valeur).
+    """
+    name = os.path.basename(path)
+    stem, ftype = name.lower().rsplit(".", 1)
+    subbasin, hru_sub = int(stem[:5]), int(stem[5:9])
+    with open(path, encoding="latin-1") as fh:
+        lines = fh.read().splitlines()
+    meta = _hru_header(lines) if hru_sub else {}
+    return {
+        "file_type": ftype,
+        "subbasin": subbasin,
+        "hru": meta.get("hru", 0),
+        "meta": meta,
+        "params": _parse_lines(lines, ftype),
+    }
+
+
+# ==========================================================
+# 2. Dossier complet -> instantané
+# ==========================================================
+def list_input_files(txtinout: str) -> list[str]:
+    """Fichiers d'entrée par HRU et par sous-bassin (nommés 000SSHHHH.ext)."""
+    wanted = set(HRU_FILES) | set(SUBBASIN_FILES)
+    return sorted(
+        os.path.join(txtinout, n) for n in os.listdir(txtinout)
+        if re.fullmatch(r"\d{9}\.[a-z]+", n.lower()) and n.lower().rsplit(".", 1)[1] in wanted
+    )
+
+
+def snapshot_key(files: list[str]) -> str:
+    """Clé de l'instantané : empreinte des (nom, taille, date de modification)."""
+    h = hashlib.sha256()
+    for path in files:
+        st = os.stat(path)
+        h.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _snapshot_path(txtinout: str, key: str) -> str:
+    folder = hashlib.sha1(os.path.abspath(txtinout).encode()).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"inputs_{folder}_{key[:16]}.npz")
+
+
+def _build(files: list[str], workers: int | None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Lecture parallèle de tous les fichiers -> (paramètres, HRU)."""
+    cols = {c: [] for c in PARAM_COLUMNS}
+    hrus: dict[int, dict] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for res in pool.map(parse_input_file, files, chunksize=64):
+            n = len(res["params"])
+            if res["meta"]:
+                hrus.setdefault(res["hru"], {}).update(res["meta"])
+            if not n:
+                continue
+            names, idx, values = zip(*res["params"])
+            cols["file_type"].extend([res["file_type"]] * n)
+            cols["subbasin"].extend([res["subbasin"]] * n)
+            cols["hru"].extend([res["hru"]] * n)
+            cols["param"].extend(names)
+            cols["idx"].extend(idx)
+            cols["value"].extend(values)
+
+    params = pd.DataFrame({
+        "file_type": np.array(cols["file_type"], dtype="U4"),
+        "subbasin": np.array(cols["subbasin"], dtype=np.int32),
+        "hru": np.array(cols["hru"], dtype=np.int32),
+        "param": np.array(cols["param"], dtype="U16"),
+        "idx": np.array(cols["idx"], dtype=np.int16),
+        "value": np.array(cols["value"], dtype=np.float64),
+    })
+    hru = pd.DataFrame([{c: h.get(c) for c in HRU_COLUMNS} for h in hrus.values()], columns=HRU_COLUMNS)
+    return params, hru.sort_values("hru", ignore_index=True)
+
+
+def _to_array(col: pd.Series) -> np.ndarray:
+    """Colonne -> tableau NumPy sans objets Python (chaînes en unicode fixe)."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.to_numpy()
+    return col.fillna("").to_numpy(dtype=str)
+
+
+def load_inputs(txtinout: str, workers: int | None = None, use_cache: bool = True) -> dict:
+    """
+    Paramètres d'entrée d'un dossier TxtInOut : {"key", "params", "hrus", "cached"}.
+    L'instantané .npz est réutilisé tant qu'aucun fichier n'a changé (taille, date).
+    """
+    files = list_input_files(txtinout)
+    if not files:
+        raise FileNotFoundError(f"Aucun fichier d'entrée SWAT dans {txtinout}")
+    key = snapshot_key(files)
+    path = _snapshot_path(txtinout, key)
+
+    if use_cache and os.path.exists(path):
+        with np.load(path, allow_pickle=False) as z:
+            params = pd.DataFrame({c: z["p_" + c] for c in PARAM_COLUMNS})
+            hrus = pd.DataFrame({c: z["h_" + c] for c in HRU_COLUMNS})
+        return {"key": key, "params": params, "hrus": hrus, "cached": True}
+
+    params, hrus = _build(files, workers)
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        prefix = os.path.basename(path).rsplit("_", 1)[0] + "_"
+        for old in os.listdir(CACHE_DIR):
+            if old.startswith(prefix):
+                os.remove(os.path.join(CACHE_DIR, old))
+        arrays = {"p_" + c: _to_array(params[c]) for c in PARAM_COLUMNS}
+        arrays.update({"h_" + c: _to_array(hrus[c]) for c in HRU_COLUMNS})
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+    return {"key": key, "params": params, "hrus": hrus, "cached": False}
+
+
+# ==========================================================
+# 3. Chargement dans swat_sebou
+# ==========================================================
+def import_inputs(txtinout: str, scenario_name: str, workers: int | None = None) -> dict:
+    """
+    Charge les paramètres d'entrée d'un dossier pour un scénario (remplacement
+    atomique). Ignoré si l'instantané n'a pas changé depuis le dernier chargement.
+    """
+    from app.etl.import_swat_final import ensure_scenario
+    from app.etl.swat_calendar import SwatCalendar
+    from app.etl.swat_manifest import load_manifest, record_file
+    from app.etl.swat_schema import ensure_swat_schema
+
+    t0 = time.perf_counter()
+    ensure_swat_schema()
+    calendar = SwatCalendar.from_txtinout(txtinout)
+    scen_id = ensure_scenario(scenario_name, calendar.timestep, calendar.start, calendar.end)
+    store = load_inputs(txtinout, workers)
+
+    known = load_manifest(scen_id).get("inputs")
+    if known and known["sha256"] == store["key"]:
+        print(f"⏭️ Paramètres d'entrée inchangés pour {scenario_name} : chargement ignoré")
+        return {"scenario_id": scen_id, "rows": 0, "skipped": True}
+
+    params = store["params"].assign(scenario_id=scen_id)
+    hrus = store["hrus"].assign(scenario_id=scen_id)
+    param_cols = ["scenario_id"] + PARAM_COLUMNS
+    hru_cols = ["scenario_id"] + HRU_COLUMNS
+    files = list_input_files(txtinout)
+    fp = {"sha256": store["key"], "size": sum(os.path.getsize(f) for f in files),
+          "mtime_ns": max(os.stat(f).st_mtime_ns for f in files)}
+
+    with CopyWriter() as writer:
+        stg_hru = writer.create_staging("swat_sebou.swat_hrus", hru_cols)
+        writer.copy_frame(stg_hru, hru_cols, hrus[hru_cols])
+        writer.swap_scenario("swat_sebou.swat_hrus", stg_hru, hru_cols, scen_id)
+
+        stg = writer.create_staging("swat_sebou.swat_input_params", param_cols)
+        for chunk in iter_frame_chunks(params[param_cols]):
+            writer.copy_frame(stg, param_cols, chunk)
+        rows = writer.swap_scenario("swat_sebou.swat_input_params", stg, param_cols, scen_id)
+        record_file(writer.cx, scen_id, "inputs", fp, rows)
+    writer.report(stg, "paramètres d'entrée")
+    print(f"✅ {len(hrus)} HRU, {rows} paramètres chargés en {time.perf_counter() - t0:.2f} s "
+          f"(instantané {'réutilisé' if store['cached'] else 'reconstruit'})")
+    return {"scenario_id": scen_id, "rows": rows, "hrus": len(hrus), "skipped": False}
+
+
+# ==========================================================
+# 4. Comparaison de deux dossiers
+# ==========================================================
+def diff_params(a: pd.DataFrame, b: pd.DataFrame, rtol: float = 1e-9) -> pd.DataFrame:
+    """
+    Paramètres différents entre deux jeux (mêmes colonnes que PARAM_COLUMNS) :
+    colonnes value_a / value_b, NaN si le paramètre est absent d'un côté.
+    """
+    keys = ["file_type", "subbasin", "hru", "param", "idx"]
+    m = a.merge(b, on=keys, how="outer", suffixes=("_a", "_b"))
+    va, vb = m["value_a"].to_numpy(), m["value_b"].to_numpy()
+    same = np.isclose(va, vb, rtol=rtol, atol=0.0) | (np.isnan(va) & np.isnan(vb))
+    return m.loc[~same, keys + ["value_a", "value_b"]].sort_values(keys, ignore_index=True)
+
+
+def diff_txtinout(dir_a: str, dir_b: str, rtol: float = 1e-9, workers: int | None = None) -> pd.DataFrame:
+    return diff_params(load_inputs(dir_a, workers)["params"], load_inputs(dir_b, workers)["params"], rtol)
+
+
+# ==========================================================
+# 5. Ligne de commande
+# ==========================================================
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Paramètres d'entrée SWAT (TxtInOut).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_load = sub.add_parser("load", help="Charger un dossier dans swat_sebou")
+    p_load.add_argument("txtinout")
+    p_load.add_argument("scenario")
+    p_load.add_argument("--workers", type=int, default=None)
+    p_diff = sub.add_parser("diff", help="Comparer deux dossiers TxtInOut")
+    p_diff.add_argument("dir_a")
+    p_diff.add_argument("dir_b")
+    p_diff.add_argument("--rtol", type=float, default=1e-9)
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        import_inputs(args.txtinout, args.scenario, args.workers)
+    else:
+        diff = diff_txtinout(args.dir_a, args.dir_b, args.rtol)
+        print(diff.to_string(index=False) if len(diff) else "✅ Aucun paramètre différent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# backend/app/etl/swat_jobs.py
+"""
+File d'imports SWAT en arrière-plan (archives TxtInOut déposées via l'API).
+
+    python -m app.etl.swat_jobs [--poll 5] [--once]
+
+L'API ne fait qu'enregistrer l'archive dans SWAT_JOBS_DIR/<job> et la ligne
+du travail dans swat_sebou.swat_import_jobs (état « queued »). Les imports
+tournent dans des processus à part, lancés par la commande ci-dessus : chaque
+processus réclame le plus ancien travail en file (FOR UPDATE SKIP LOCKED),
+le décompresse, lance import_txtinout() (qui a ses propres processus de
+lecture) puis nettoie. Un processus traite un travail à la fois ; au plus
+SWAT_IMPORT_JOBS travaux (1 par défaut) tournent en même temps, tous
+processus confondus. SWAT_JOBS_DIR doit être partagé entre l'API et ces
+processus (même hôte ou volume commun).
+
+L'état des travaux (file, progression, temps et lignes par fichier) est lu
+dans la table par tous les processus API. Un travail en dépôt ou en cours
+dont le processus a disparu (redémarrage) est marqué en échec au prochain
+dépôt ou à la prochaine réclamation sur le même hôte.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+import traceback
+import uuid
+import zipfile
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.db.session import engine
+
+JOBS_DIR = os.getenv("SWAT_JOBS_DIR", os.path.join(tempfile.gettempdir(), "sebou_swat_jobs"))
+MAX_RUNNING = int(os.getenv("SWAT_IMPORT_JOBS", "1"))
+MAX_QUEUED = int(os.getenv("SWAT_IMPORT_QUEUE", "20"))
+# Taille décompressée maximale d'une archive (protection contre les archives piégées)
+MAX_UNZIPPED_BYTES = int(os.getenv("SWAT_UPLOAD_MAX_BYTES", str(4 * 1024 ** 3)))
+HISTORY = 100
+ACTIVE = ("uploading", "queued", "running")
+# États tenus par un processus précis (owner) : orphelins s'il disparaît
+OWNED = ("uploading", "running")
+JOBS_TABLE = "swat_sebou.swat_import_jobs"
+
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ==========================================================
+# 1. Archive -> dossier TxtInOut
+# ==========================================================
+def extract_archive(zip_path: str, dest: str) -> str:
+    """Décompresse l'archive dans `dest` et retourne le dossier qui contient file.cio."""
+    with zipfile.ZipFile(zip_path) as zf:
+        members = zf.infolist()
+        if sum(m.file_size for m in members) > MAX_UNZIPPED_BYTES:
+            raise ValueError(f"Archive trop volumineuse une fois décompressée (> {MAX_UNZIPPED_BYTES} octets)")
+        root = os.path.realpath(dest)
+        for m in members:
+            target = os.path.realpath(os.path.join(root, m.filename))
+            if target != root and not target.startswith(root + os.sep):
+                raise ValueError(f"Chemin interdit dans l'archive : {m.filename}")
+        zf.extractall(root)
+    for dirpath, _, filenames in os.walk(root):
+        if any(f.lower() == "file.cio" for f in filenames):
+            return dirpath
+    raise FileNotFoundError("file.cio introuvable dans l'archive : ce n'est pas un dossier TxtInOut")
+
+
+# ==========================================================
+# 2. File de travaux
+# ==========================================================
+def job_dir(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _reap(conn) -> None:
+    """Travaux en dépôt ou en cours d'un processus disparu de cet hôte : marqués en échec."""
+    host = socket.gethostname()
+    rows = conn.execute(text(f"""
+        SELECT id, owner FROM {JOBS_TABLE}
+        WHERE status = ANY(:owned) AND owner LIKE :host
+    """), {"owned": list(OWNED), "host": f"{host}:%"}).all()
+    dead = [r.id for r in rows if not _alive(int(r.owner.rsplit(":", 1)[1]))]
+    if dead:
+        conn.execute(text(f"""
+            UPDATE {JOBS_TABLE}
+            SET status = 'failed', error = 'Processus interrompu pendant le dépôt ou l''import', finished_at = now()
+            WHERE id = ANY(:ids)
+        """), {"ids": dead})
+        for job_id in dead:
+            shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def new_job(scenario: str) -> dict:
+    """Réserve un travail (et son dossier) avant le dépôt de l'archive."""
+    job_id = uuid.uuid4().hex
+    with engine.begin() as conn:
+        # Un seul dépôt à la fois compte la file, tous processus confondus
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:t))"), {"t": JOBS_TABLE})
+        _reap(conn)
+        queued = conn.execute(text(f"SELECT COUNT(*) FROM {JOBS_TABLE} WHERE status = ANY(:active)"),
+                              {"active": list(ACTIVE)}).scalar()
+        if queued >= MAX_QUEUED + MAX_RUNNING:
+            raise QueueFull(f"{queued} imports déjà en attente")
+        conn.execute(text(f"""
+            INSERT INTO {JOBS_TABLE} (id, scenario, status, owner, submitted_at)
+            VALUES (:id, :scenario, 'uploading', :owner, :now)
+        """), {"id": job_id, "scenario": scenario, "owner": _owner(), "now": _now()})
+        # Historique borné : les plus anciens travaux terminés sont oubliés
+        conn.execute(text(f"""
+            DELETE FROM {JOBS_TABLE}
+            WHERE status <> ALL(:active)
+              AND id NOT IN (SELECT id FROM {JOBS_TABLE} ORDER BY submitted_at DESC LIMIT :history)
+        """), {"active": list(ACTIVE), "history": HISTORY})
+    os.makedirs(job_dir(job_id), exist_ok=True)
+    return get_job(job_id)
+
+
+def submit(job_id: str, workers: int | None = None) -> dict:
+    """Met en file l'archive déposée (job_dir/run.zip) : un processus d'import la réclamera."""
+    _update(job_id, status="queued", workers=workers)
+    return get_job(job_id)
+
+
+def discard(job_id: str, error: str) -> None:
+    """Abandonne un travail dont le dépôt a échoué."""
+    _update(job_id, status="failed", error=error, finished_at=_now())
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def _update(job_id: str, **fields) -> None:
+    params = {"id": job_id, **fields}
+    sets = []
+    for col in fields:
+        if col == "files":
+            params[col] = json.dumps(fields[col], default=str)
+            sets.append(f"{col} = CAST(:{col} AS jsonb)")
+        else:
+            sets.append(f"{col} = :{col}")
+    with engine.begin() as conn:
+        conn.execute(text(f"UPDATE {JOBS_TABLE} SET {', '.join(sets)} WHERE id = :id"), params)
+
+
+def _public(job: dict) -> dict:
+    files = job["files"] or {}
+    active = [f for f in files.values() if f["status"] != "skipped"]
+    done = sum(1 for f in active if f["status"] == "imported")
+    job = {k: v for k, v in job.items() if k != "owner"}
+    return {**job, "files": files,
+            "progress": {"files_total": len(active), "files_done": done,
+                         "ratio": round(done / len(active), 3) if active else (1.0 if job["status"] == "done" else 0.0)}}
+
+
+def get_job(job_id: str) -> dict | None:
+    with engine.connect() as conn:
+        row = conn.execute(text(f"SELECT * FROM {JOBS_TABLE} WHERE id = :id"), {"id": job_id}).mappings().first()
+    return _public(dict(row)) if row else None
+
+
+def list_jobs() -> list[dict]:
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT * FROM {JOBS_TABLE} ORDER BY submitted_at DESC LIMIT :n"),
+                            {"n": HISTORY}).mappings().all()
+    return [_public(dict(r)) for r in rows]
+
+
+# ==========================================================
+# 3. Processus d'import
+# ==========================================================
+def claim_job() -> dict | None:
+    """
+    Réclame le plus ancien travail en file, s'il reste une place parmi les
+    SWAT_IMPORT_JOBS imports simultanés. None si rien à faire.
+    """
+    with engine.begin() as conn:
+        # Compte des imports en cours et réclamation sont atomiques entre processus
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:t))"), {"t": JOBS_TABLE})
+        _reap(conn)
+        running = conn.execute(text(f"SELECT COUNT(*) FROM {JOBS_TABLE} WHERE status = 'running'")).scalar()
+        if running >= MAX_RUNNING:
+            return None
+        row = conn.execute(text(f"""
+            UPDATE {JOBS_TABLE}
+            SET status = 'running', owner = :owner, started_at = :now
+            WHERE id = (
+                SELECT id FROM {JOBS_TABLE}
+                WHERE status = 'queued'
+                ORDER BY submitted_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, scenario, workers
+        """), {"owner": _owner(), "now": _now()}).mappings().first()
+    return dict(row) if row else None
+
+
+def run_job(job: dict) -> None:
+    from app.etl.import_swat_run import import_txtinout
+
+    job_id = job["id"]
+    zip_path = os.path.join(job_dir(job_id), "run.zip")
+    t0 = time.perf_counter()
+
+    def progress(report: dict) -> None:
+        files = {k: dict(v) for k, v in report.items()}
+        _update(job_id, files=files, rows=sum(f["rows"] for f in files.values()))
+
+    try:
+        txtinout = extract_archive(zip_path, os.path.join(job_dir(job_id), "run"))
+        os.remove(zip_path)
+        # Les processus de lecture forkés n'héritent pas des connexions du pool
+        engine.dispose()
+        result = import_txtinout(txtinout, job["scenario"], job["workers"], progress=progress)
+        progress(result["files"])
+        _update(job_id, status="done", scenario_id=result["scenario_id"], rows=result["rows"])
+    except Exception as exc:
+        print(f"❌ Import {job_id} en échec :\n{traceback.format_exc()}")
+        _update(job_id, status="failed", error=f"{type(exc).__name__}: {exc}")
+    finally:
+        _update(job_id, finished_at=_now(), seconds=round(time.perf_counter() - t0, 3))
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def work(poll: float = 5.0, once: bool = False) -> None:
+    """Boucle d'un processus d'import : réclame et exécute les travaux un par un."""
+    print(f"🚀 Processus d'import SWAT {_owner()} (au plus {MAX_RUNNING} imports simultanés)")
+    while True:
+        job = claim_job()
+        if job:
+            print(f"📦 Import {job['id']} ({job['scenario']})")
+            run_job(job)
+            continue
+        if once:
+            return
+        time.sleep(poll)
+
+
+# ==========================================================
+# 4. Ligne de commande
+# ==========================================================
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Processus d'import des archives SWAT déposées via l'API.")
+    parser.add_argument("--poll", type=float, default=5.0, help="Attente (s) quand la file est vide")
+    parser.add_argument("--once", action="store_true", help="S'arrêter dès que la file est vide")
+    args = parser.parse_args(argv)
+    work(args.poll, args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# backend/app/etl/swat_manifest.py
+"""
+Empreintes des fichiers SWAT importés (table swat_sebou.swat_import_files).
+
+Un fichier déjà importé pour un scénario est ignoré si sa taille et sa date
+de modification n'ont pas bougé (coût : un stat), ou, à défaut, si son
+SHA-256 est identique. Seuls les fichiers réellement modifiés sont rechargés.
+"""
+
+import hashlib
+import os
+
+from sqlalchemy import text
+
+from app.db.session import engine
+
+HASH_BLOCK = 1 << 20
+
+
+def file_stat(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 du contenu, lu par blocs de 1 Mo."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(scen_id: int) -> dict[str, dict]:
+    """Empreintes enregistrées pour un scénario : {file_name: {...}}."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT file_name, sha256, size, mtime_ns, rows
+            FROM swat_sebou.swat_import_files
+            WHERE scenario_id = :sid
+        """), {"sid": scen_id}).mappings().all()
+    return {r["file_name"]: dict(r) for r in rows}
+
+
+def plan_files(files: list[tuple[str, str]], manifest: dict[str, dict], hasher=map) -> tuple[list, list]:
+    """
+    Sépare les fichiers (type, chemin) en :
+      - `changed`   : [(type, chemin, empreinte)] à recharger ;
+      - `unchanged` : [(type, empreinte)] identiques au dernier import.
+    `hasher` permet de calculer les SHA-256 en parallèle (ex. pool.map).
+    """
+    stats = {kind: file_stat(path) for kind, path in files}
+    unchanged, to_hash = [], []
+    for kind, path in files:
+        known = manifest.get(kind)
+        if known and (known["size"], known["mtime_ns"]) == (stats[kind]["size"], stats[kind]["mtime_ns"]):
+            unchanged.append((kind, {**stats[kind], "sha256": known["sha256"], "touched": False}))
+        else:
+            to_hash.append((kind, path))
+
+    changed = []
+    for (kind, path), sha in zip(to_hash, hasher(file_sha256, [p for _, p in to_hash])):
+        fp = {**stats[kind], "sha256": sha}
+        known = manifest.get(kind)
+        if known and known["sha256"] == sha:
+            # Même contenu, fichier simplement « touché » : on mémorise la nouvelle date
+            unchanged.append((kind, {**fp, "touched": True}))
+        else:
+            changed.append((kind, path, fp))
+    return changed, unchanged
+
+
+def record_file(cx, scen_id: int, kind: str, fp: dict, rows: int | None) -> None:
+    """Enregistre (ou remplace) l'empreinte d'un fichier, sur la connexion DBAPI `cx`."""
+    with cx.cursor() as cur:
+        cur.execute("""
+            INSERT INTO swat_sebou.swat_import_files
+                (scenario_id, file_name, sha256, size, mtime_ns, rows, imported_at)
+            VALUES (%s, %s, %s, %s, %s, %s, now())
+            ON CONFLICT (scenario_id, file_name) DO UPDATE SET
+                sha256 = EXCLUDED.sha256, size = EXCLUDED.size, mtime_ns = EXCLUDED.mtime_ns,
+                rows = COALESCE(EXCLUDED.rows, swat_sebou.swat_import_files.rows),
+                imported_at = CASE WHEN EXCLUDED.rows IS NULL
+                                   THEN swat_sebou.swat_import_files.imported_at ELSE now() END
+        """, (scen_id, kind, fp["sha256"], fp["size"], fp["mtime_ns"], rows))
@@ -0,0 +1,127 @@
+# backend/app/etl/swat_packed.py
+"""
+Stockage compact des séries SWAT (swat_sebou.swat_packed_series).
+
+Une ligne par (scénario, table, unité, variable, année) portant les valeurs de
+l'année dans un tableau float4[] : l'élément i est daté start_date + (i-1) pas
+(jour, mois ou année), NULL là où la table d'origine n'a pas de valeur.
+
+Écrit dans la transaction d'import juste après la bascule d'un fichier quand
+SWAT_PACKED_SERIES=1 ; les tables ligne à ligne restent la référence pour les
+agrégats (synthèses, différences, métriques). Lecture par les fonctions SQL
+swat_sebou.packed_unnest() et swat_sebou.packed_window().
+
+C'est une copie de lecture, en plus des tables ligne à ligne : elle allège
+les lectures de séries (une ligne par année au lieu d'une par pas de temps)
+mais ajoute du volume en base. Les séries de l'API (api/v1/swat.py) ne la
+consultent que si SWAT_PACKED_SERIES=1 dans le processus de l'API aussi ;
+sinon aucune requête n'est faite sur swat_packed_series.
+"""
+
+import os
+
+PACKED_SERIES = os.getenv("SWAT_PACKED_SERIES", "0") == "1"
+
+# Pas de temps du calendrier SWAT -> pas des tableaux
+PACKED_STEPS = {"daily": "day", "monthly": "month", "annual": "year"}
+
+PACKED_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION swat_sebou.packed_unnest(p_vals real[], p_start date, p_step text)
+RETURNS TABLE (date date, value real)
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT (p_start + (v.i - 1) * ('1 ' || p_step)::interval)::date, v.value
+    FROM unnest(p_vals) WITH ORDINALITY AS v(value, i)
+$$;
+
+CREATE OR REPLACE FUNCTION swat_sebou.packed_window(
+    p_scenario int, p_source text, p_units int[], p_variables text[],
+    p_start date DEFAULT NULL, p_end date DEFAULT NULL)
+RETURNS TABLE (unit int, variable text, date date, value real)
+LANGUAGE sql STABLE AS $$
+    SELECT p.unit, p.variable, u.date, u.value
+    FROM swat_sebou.swat_packed_series p
+    CROSS JOIN LATERAL swat_sebou.packed_unnest(p.vals, p.start_date, p.step) u
+    WHERE p.scenario_id = p_scenario
+      AND p.source = p_source
+      AND (p_units IS NULL OR p.unit = ANY(p_units))
+      AND p.variable = ANY(p_variables)
+      AND (p_start IS NULL OR p.year >= EXTRACT(YEAR FROM p_start))
+      AND (p_end IS NULL OR p.year <= EXTRACT(YEAR FROM p_end))
+      AND (p_start IS NULL OR u.date >= p_start)
+      AND (p_end IS NULL OR u.date <= p_end)
+$$;
+"""
+
+
+def packed_source(table: str) -> str:
+    """Nom court de la table d'origine (colonne source)."""
+    return table.split(".")[-1]
+
+
+def packing_step(target: dict, timestep: str) -> str:
+    """Pas des tableaux d'une cible d'import (watout.dat est toujours journalier)."""
+    return "day" if target.get("dating") == "year_day" else PACKED_STEPS[timestep]
+
+
+def pack_sql(table: str, columns: dict) -> str:
+    """INSERT ... SELECT des tableaux annuels d'un scénario (paramètres %(sid)s, %(source)s, %(step)s)."""
+    unit_col, variables = list(columns)[1], list(columns)[3:]
+    values = ", ".join(f"('{v}', r.{v})" for v in variables)
+    return f"""
+        WITH v AS (
+            SELECT r.{unit_col} AS unit, x.variable, EXTRACT(YEAR FROM r.date)::int AS year,
+                   r.date, x.value::real AS value
+            FROM {table} r
+            CROSS JOIN LATERAL (VALUES {values}) AS x(variable, value)
+            WHERE r.scenario_id = %(sid)s
+        ),
+        b AS (
+            SELECT unit, variable, year, MIN(date) AS start_date, MAX(date) AS end_date
+            FROM v
+            GROUP BY unit, variable, year
+        )
+        INSERT INTO swat_sebou.swat_packed_series
+            (scenario_id, source, unit, variable, year, step, start_date, vals)
+        SELECT %(sid)s, %(source)s, b.unit, b.variable, b.year, %(step)s, b.start_date,
+               array_agg(v.value ORDER BY g.d)
+        FROM b
+        CROSS JOIN LATERAL generate_series(b.start_date::timestamp, b.end_date::timestamp, ('1 ' || %(step)s)::interval) AS g(d)
+        LEFT JOIN v ON v.unit = b.unit AND v.variable = b.variable AND v.date = g.d::date
+        GROUP BY b.unit, b.variable, b.year, b.start_date
+    """
+
+
+def refresh_packed(cx, scen_id: int, table: str, columns: dict, step: str) -> int:
+    """Réécrit les tableaux du scénario pour une table, sur la connexion DBAPI `cx` (sans commit)."""
+    source = packed_source(table)
+    with cx.cursor() as cur:
+        cur.execute("DELETE FROM swat_sebou.swat_packed_series WHERE scenario_id = %s AND source = %s",
+                    (scen_id, source))
+        cur.execute(pack_sql(table, columns), {"sid": scen_id, "source": source, "step": step})
+        rows = cur.rowcount
+    print(f"📦 Séries compactes {source} : {rows} tableaux (scénario {scen_id})")
+    return rows
+
+
+if __name__ == "__main__":
+    # Compactage de scénarios déjà importés : python -m app.etl.swat_packed <id> [<id> ...]
+    import sys
+
+    from sqlalchemy import text
+
+    from app.db.session import engine
+    from app.etl.import_swat_final import RESULT_TARGETS
+    from app.etl.swat_schema import ensure_swat_schema
+
+    ensure_swat_schema()
+    cx = engine.raw_connection()
+    try:
+        for sid in map(int, sys.argv[1:]):
+            with engine.connect() as conn:
+                timestep = conn.execute(text("SELECT timestep FROM swat_sebou.swat_scenarios WHERE id = :sid"),
+                                        {"sid": sid}).scalar()
+            for target in RESULT_TARGETS.values():
+                refresh_packed(cx, sid, target["table"], target["columns"], packing_step(target, timestep or "monthly"))
+        cx.commit()
+    finally:
+        cx.close()
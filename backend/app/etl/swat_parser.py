@@ -0,0 +1,195 @@
+# backend/app/etl/swat_parser.py
+"""
+Lecture en flux des sorties SWAT à largeur fixe.
+
+Les fichiers (output.sub, output.rch, output.sed, output.rsv, watout.dat,
+hyd.out) sont lus par blocs de lignes et décodés directement en tableaux
+structurés NumPy : la mémoire reste constante quelle que soit la taille du
+fichier, et chaque bloc peut être envoyé tel quel à un writer (COPY, cube...).
+"""
+
+import os
+import re
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+# Nombre de lignes décodées par bloc
+PARSE_CHUNK_ROWS = int(os.getenv("SWAT_PARSE_CHUNK_ROWS", "100000"))
+
+# ==========================================================
+# 1. Description des formats (positions en caractères, 0-based)
+# ==========================================================
+# - header     : premier mot de la ligne d'en-tête des colonnes
+# - tag        : préfixe des lignes de données (None = toutes les lignes)
+# - keys       : champs identifiants (nom, début, fin, dtype)
+# - values_at  : début du premier champ numérique dans les lignes de données
+# - header_at  : début du même champ dans la ligne d'en-tête
+# - width      : largeur commune des champs numériques
+# - names      : noms imposés (sinon déduits de la ligne d'en-tête)
+SWAT_LAYOUTS: dict[str, dict] = {
+    "output.sub": {
+        "header": "SUB", "tag": b"BIGSUB",
+        "keys": [("sub", 6, 11, "i4"), ("gis", 11, 20, "i4"), ("mon", 20, 25, "f8")],
+        "values_at": 25, "header_at": 24, "width": 10,
+    },
+    "output.rch": {
+        "header": "RCH", "tag": b"REACH",
+        "keys": [("rch", 6, 10, "i4"), ("gis", 11, 19, "i4"), ("mon", 20, 25, "f8")],
+        "values_at": 25, "header_at": 25, "width": 12,
+    },
+    "output.sed": {
+        "header": "RCH", "tag": b"REACH",
+        "keys": [("rch", 5, 12, "i4"), ("gis", 12, 21, "i4"), ("mon", 21, 27, "f8")],
+        "values_at": 27, "header_at": 25, "width": 12,
+    },
+    "output.rsv": {
+        "header": "RES", "tag": b"RES",
+        "keys": [("res", 3, 14, "i4"), ("mon", 14, 19, "f8")],
+        "values_at": 19, "header_at": 19, "width": 12,
+    },
+    "watout.dat": {
+        "header": "Year", "tag": None,
+        "keys": [("year", 0, 5, "i4"), ("day", 5, 10, "i4"), ("step", 10, 17, "i4")],
+        "values_at": 17, "header_at": 15, "width": 11,
+    },
+    "hyd.out": {
+        "header": "icode", "tag": None,
+        "keys": [("icode", 0, 9, "i4"), ("ic", 9, 18, "i4"), ("inum1", 18, 27, "i4"),
+                 ("inum2", 27, 36, "i4"), ("inum3", 36, 45, "i4"), ("subed", 45, 54, "i4")],
+        "values_at": 76, "header_at": None, "width": 12,
+        "names": ["flow", "sed", "orgn", "orgp", "no3", "solp", "solpst", "sorpst"],
+    },
+}
+
+SUPPORTED_FILES = tuple(SWAT_LAYOUTS)
+
+
+def _column_name(label: str) -> str:
+    """'PRECIPmm' -> 'precip', 'LAT Q(mm)' -> 'lat_q', 'FLOWm^3/s' -> 'flow'."""
+    m = re.match(r"[A-Z0-9_ ]+", label.strip())
+    name = m.group(0) if m else label.strip()
+    return re.sub(r"\W+", "_", name.strip()).lower()
+
+
+def _header_names(header: str, spec: dict) -> list[str]:
+    """Noms des colonnes numériques, découpés dans la ligne d'en-tête."""
+    if spec.get("names"):
+        return list(spec["names"])
+    start, width = spec["header_at"], spec["width"]
+    header = header.rstrip()
+    names: list[str] = []
+    for pos in range(start, len(header), width):
+        name = _column_name(header[pos:pos + width]) or f"col{len(names)}"
+        while name in names:
+            name += "_"
+        names.append(name)
+    return names
+
+
+def resolve_kind(path: str, kind: str | None = None) -> str:
+    kind = (kind or os.path.basename(path)).lower()
+    if kind not in SWAT_LAYOUTS:
+        raise ValueError(f"Format SWAT non supporté : {kind} (attendu : {', '.join(SUPPORTED_FILES)})")
+    return kind
+
+
+# ==========================================================
+# 2. Décodage vectorisé d'un bloc de lignes
+# ==========================================================
+def _to_float(col: np.ndarray) -> np.ndarray:
+    """Conversion bytes -> float64 ; les champs vides/illisibles deviennent NaN."""
+    try:
+        return col.astype(np.float64)
+    except ValueError:
+        out = np.full(col.shape, np.nan)
+        for i, v in enumerate(col):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                pass
+        return out
+
+
+def _decode_block(lines: list[bytes], fields: list[tuple], dtype: np.dtype) -> np.ndarray:
+    width = max(len(l) for l in lines)
+    raw = np.array(lines, dtype=f"S{width}").view("S1").reshape(len(lines), width)
+    out = np.empty(len(lines), dtype=dtype)
+    for name, a, b in fields:
+        col = np.ascontiguousarray(raw[:, a:b]).view(f"S{b - a}").ravel()
+        values = _to_float(col)
+        if out.dtype[name].kind == "i":
+            values = np.nan_to_num(values, nan=-1)
+        out[name] = values
+    return out
+
+
+def _value_bounds(spec: dict, n: int, first: bytes) -> list[tuple[int, int]]:
+    """
+    Bornes des champs numériques. Les valeurs Fortran étant alignées à droite,
+    la fin de chaque mot de la première ligne de données marque la fin d'un
+    champ : on s'en sert quand le nombre de mots correspond (certaines versions
+    de SWAT élargissent les dernières colonnes), sinon largeur fixe.
+    """
+    pos, width = spec["values_at"], spec["width"]
+    ends = [m.end() for m in re.finditer(rb"\S+", first) if m.end() > pos]
+    if len(ends) == n:
+        return list(zip([pos] + ends[:-1], ends))
+    return [(pos + i * width, pos + (i + 1) * width) for i in range(n)]
+
+
+def _layout(spec: dict, names: list[str], first: bytes) -> tuple[list[tuple], np.dtype]:
+    fields = [(k, a, b) for k, a, b, _ in spec["keys"]]
+    dtypes = [(k, t) for k, _, _, t in spec["keys"]]
+    for name, (a, b) in zip(names, _value_bounds(spec, len(names), first)):
+        fields.append((name, a, b))
+        dtypes.append((name, "f8"))
+    return fields, np.dtype(dtypes)
+
+
+# ==========================================================
+# 3. Générateur de blocs
+# ==========================================================
+def iter_swat_records(path: str, kind: str | None = None,
+                      chunk_rows: int = PARSE_CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """
+    Lit un fichier de sortie SWAT et produit des tableaux structurés NumPy de
+    `chunk_rows` lignes au plus. Les colonnes numériques sont nommées d'après
+    la ligne d'en-tête (en minuscules, sans unité).
+    """
+    spec = SWAT_LAYOUTS[resolve_kind(path, kind)]
+    tag = spec["tag"]
+    with open(path, "rb") as fh:
+        header = None
+        for line in fh:
+            text = line.decode("latin-1")
+            if text.split()[:1] == [spec["header"]]:
+                header = text
+                break
+        if header is None:
+            raise ValueError(f"En-tête '{spec['header']}' introuvable dans {path}")
+
+        names = _header_names(header, spec)
+        fields = dtype = None
+        block: list[bytes] = []
+        for line in fh:
+            line = line.rstrip(b"\r\n")
+            if not line.strip() or (tag and not line.startswith(tag)):
+                continue
+            if fields is None:
+                fields, dtype = _layout(spec, names, line)
+            block.append(line)
+            if len(block) >= chunk_rows:
+                yield _decode_block(block, fields, dtype)
+                block = []
+        if block:
+            yield _decode_block(block, fields, dtype)
+
+
+def read_swat_frame(path: str, kind: str | None = None) -> pd.DataFrame:
+    """Lecture complète en DataFrame (petits fichiers, analyses ponctuelles)."""
+    batches = list(iter_swat_records(path, kind))
+    if not batches:
+        return pd.DataFrame()
+    return pd.DataFrame(np.concatenate(batches))
@@ -0,0 +1,88 @@
+# backend/app/etl/swat_schema.py
+"""
+Outils de schéma pour l'ETL SWAT : création du schéma swat_sebou et des
+partitions annuelles des tables de résultats.
+"""
+
+from sqlalchemy import text
+
+from app.core.tile_cache import install
+from app.db.base import Base
+from app.db.session import engine
+import app.models.swat  # noqa: F401  (enregistre les modèles SWAT dans Base.metadata)
+from app.etl.swat_packed import PACKED_FUNCTIONS
+
+SCHEMA = "swat_sebou"
+
+# Tables de résultats partitionnées par plage de dates (une partition par année)
+PARTITIONED_TABLES = (
+    "swat_sebou.swat_subbasin_results",
+    "swat_sebou.swat_reach_results",
+    "swat_sebou.swat_sediment_results",
+    "swat_sebou.swat_outlet_results",
+)
+
+# Débits journaliers observés : table, colonne station, colonne date, colonne débit
+OBSERVED_DEBIT = ("public.mesures_debit_jr", "station_id", "date_jr", "debit_jr")
+
+
+def ensure_swat_schema() -> None:
+    """Crée le schéma et les tables SWAT manquantes (sans toucher à l'existant)."""
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+    tables = [t for t in Base.metadata.sorted_tables if t.schema == SCHEMA]
+    Base.metadata.create_all(engine, tables=tables, checkfirst=True)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(PACKED_FUNCTIONS)
+    ensure_comparison_indexes()
+
+
+def ensure_comparison_indexes() -> None:
+    """
+    Index (station, date) de la table des débits observés, si elle existe :
+    côté SWAT, la clé (scénario, tronçon, date) de swat_reach_results sert
+    à la jointure simulé/observé. Pose aussi son compteur de version (voir
+    app.core.tile_cache) : les métriques en cache suivent les observations.
+    """
+    table, station_col, date_col, _ = OBSERVED_DEBIT
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT to_regclass(:t)"), {"t": table}).scalar()
+        if exists:
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table.split('.')[-1]}_station_date "
+                f"ON {table} ({station_col}, {date_col})"
+            ))
+    if exists:
+        install([table])
+
+
+def ensure_year_partitions(cur, table: str, years) -> None:
+    """
+    Crée les partitions annuelles `<table>_y<année>` manquantes, dans la
+    transaction de `cur` (curseur psycopg2 du writer). Chaque partition est
+    créée à part puis attachée (ATTACH PARTITION ne prend qu'un verrou SHARE
+    UPDATE EXCLUSIVE sur la table mère : les lecteurs ne sont pas bloqués
+    jusqu'à la fin de l'import). Sans effet (avec avertissement) si la table
+    n'est pas partitionnée : voir la révision alembic 0006.
+    """
+    if table not in PARTITIONED_TABLES:
+        return
+    schema, name = table.split(".", 1)
+    cur.execute("""
+        SELECT c.relkind = 'p' FROM pg_catalog.pg_class c
+        JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %s AND c.relname = %s
+    """, (schema, name))
+    row = cur.fetchone()
+    if not row or not row[0]:
+        print(f"⚠️ {table} n'est pas partitionnée (alembic upgrade head) : partitions annuelles ignorées")
+        return
+    for year in years:
+        cur.execute("SELECT to_regclass(%s)", (f"{table}_y{year}",))
+        if cur.fetchone()[0]:
+            continue
+        cur.execute(f"CREATE TABLE {table}_y{year} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cur.execute(f"""
+            ALTER TABLE {table} ATTACH PARTITION {table}_y{year}
+            FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+        """)
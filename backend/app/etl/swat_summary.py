@@ -0,0 +1,88 @@
+# backend/app/etl/swat_summary.py
+"""
+Synthèse par scénario, sous-bassin et paramètre (swat_sebou.swat_subbasin_summary).
+
+Recalculée dans la transaction d'import, juste après la bascule de output.sub :
+moyenne, min, max, quantiles 10/50/90 et climatologie mensuelle (12 moyennes).
+Les cartes choroplèthes lisent une ligne par sous-bassin au lieu d'agréger
+toute la table des résultats.
+"""
+
+# Paramètres synthétisés (colonnes de swat_subbasin_results) : liste blanche de l'API
+SUMMARY_PARAMS = ("precip", "surq", "gw_q", "wyld", "sedp", "orgn", "solp")
+
+
+def summary_select_sql(params=SUMMARY_PARAMS) -> str:
+    """
+    SELECT de la synthèse d'un scénario (paramètre %(sid)s), une ligne par
+    paramètre et sous-bassin. Lu tel quel par l'API pour un scénario importé
+    avant la synthèse.
+    """
+    values = ", ".join(f"('{p}', r.{p})" for p in params)
+    return f"""
+        WITH v AS (
+            SELECT r.subbasin, EXTRACT(MONTH FROM r.date)::int AS month, x.param, x.value
+            FROM swat_sebou.swat_subbasin_results r
+            CROSS JOIN LATERAL (VALUES {values}) AS x(param, value)
+            WHERE r.scenario_id = %(sid)s
+        ),
+        stats AS (
+            SELECT subbasin, param,
+                   AVG(value) AS mean, MIN(value) AS min, MAX(value) AS max,
+                   percentile_cont(0.1) WITHIN GROUP (ORDER BY value) AS p10,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY value) AS p50,
+                   percentile_cont(0.9) WITHIN GROUP (ORDER BY value) AS p90,
+                   COUNT(value) AS n
+            FROM v
+            GROUP BY subbasin, param
+        ),
+        monthly AS (
+            SELECT k.subbasin, k.param, array_agg(m.value ORDER BY k.month) AS monthly
+            FROM (SELECT s.subbasin, s.param, g.month
+                  FROM stats s CROSS JOIN generate_series(1, 12) AS g(month)) k
+            LEFT JOIN (SELECT subbasin, param, month, AVG(value) AS value
+                       FROM v GROUP BY subbasin, param, month) m
+              USING (subbasin, param, month)
+            GROUP BY k.subbasin, k.param
+        )
+        SELECT %(sid)s AS scenario_id, s.param, s.subbasin, s.mean, s.min, s.max,
+               s.p10, s.p50, s.p90, s.n, m.monthly
+        FROM stats s
+        JOIN monthly m USING (subbasin, param)
+    """
+
+
+def summary_sql(params=SUMMARY_PARAMS) -> str:
+    """INSERT ... SELECT de la synthèse d'un scénario (paramètre %(sid)s)."""
+    return f"""
+        INSERT INTO swat_sebou.swat_subbasin_summary
+            (scenario_id, param, subbasin, mean, min, max, p10, p50, p90, n, monthly)
+        {summary_select_sql(params)}
+    """
+
+
+def refresh_subbasin_summary(cx, scen_id: int) -> int:
+    """Recalcule la synthèse du scénario sur la connexion DBAPI `cx` (sans commit)."""
+    with cx.cursor() as cur:
+        cur.execute("DELETE FROM swat_sebou.swat_subbasin_summary WHERE scenario_id = %s", (scen_id,))
+        cur.execute(summary_sql(), {"sid": scen_id})
+        rows = cur.rowcount
+    print(f"📐 Synthèse sous-bassins : {rows} lignes (scénario {scen_id})")
+    return rows
+
+
+if __name__ == "__main__":
+    # Recalcul pour des scénarios déjà importés : python -m app.etl.swat_summary <id> [<id> ...]
+    import sys
+
+    from app.db.session import engine
+    from app.etl.swat_schema import ensure_swat_schema
+
+    ensure_swat_schema()
+    cx = engine.raw_connection()
+    try:
+        for sid in map(int, sys.argv[1:]):
+            refresh_subbasin_summary(cx, sid)
+        cx.commit()
+    finally:
+        cx.close()
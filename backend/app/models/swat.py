@@ -1,7 +1,8 @@
 # backend/app/models/swat.py
-from sqlalchemy import String, Integer, Text, Date, ForeignKey, CheckConstraint, BigInteger, Double
+from sqlalchemy import String, Integer, SmallInteger, Text, Date, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, BigInteger, Double, REAL, Index, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from datetime import date
+from datetime import date, datetime
 from app.db.base import Base
 
 class SwatModel(Base):
@@ -27,12 +28,19 @@ class SwatScenario(Base):
 
 class SwatSubbasinResult(Base):
     __tablename__ = "swat_subbasin_results"
-    __table_args__ = {"schema": "swat_sebou"}
+    # Partitionnée par année (RANGE sur date) : la clé primaire inclut donc la date
+    __table_args__ = (
+        # Clé naturelle couvrante : séries lues par parcours d'index seul, imports en upsert
+        UniqueConstraint("scenario_id", "subbasin", "date", name="uq_swat_subbasin_results_key",
+                         postgresql_include=["precip", "surq", "gw_q", "wyld", "sedp", "orgn", "solp"]),
+        Index("ix_swat_subbasin_results_date_brin", "date", postgresql_using="brin"),
+        {"schema": "swat_sebou", "postgresql_partition_by": "RANGE (date)"},
+    )
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), nullable=False)
     subbasin: Mapped[int] = mapped_column(Integer, nullable=False)
-    date: Mapped[date] = mapped_column(Date, nullable=False)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
 
     precip: Mapped[float | None] = mapped_column(Double)
     surq:   Mapped[float | None] = mapped_column(Double)
@@ -44,12 +52,20 @@ class SwatSubbasinResult(Base):
 
 class SwatReachResult(Base):
     __tablename__ = "swat_reach_results"
-    __table_args__ = {"schema": "swat_sebou"}
+    # Partitionnée par année (RANGE sur date) : la clé primaire inclut donc la date
+    __table_args__ = (
+        # Clé naturelle couvrante (séries, comparaison aux stations de jaugeage)
+        UniqueConstraint("scenario_id", "reach", "date", name="uq_swat_reach_results_key",
+                         postgresql_include=["flow_in", "flow_out", "sed_in", "sed_out",
+                                             "no3_out", "orgp_out", "chla_out"]),
+        Index("ix_swat_reach_results_date_brin", "date", postgresql_using="brin"),
+        {"schema": "swat_sebou", "postgresql_partition_by": "RANGE (date)"},
+    )
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), nullable=False)
     reach: Mapped[int] = mapped_column(Integer, nullable=False)
-    date: Mapped[date] = mapped_column(Date, nullable=False)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
 
     flow_in:  Mapped[float | None] = mapped_column(Double)
     flow_out: Mapped[float | None] = mapped_column(Double)
@@ -58,3 +74,267 @@ class SwatReachResult(Base):
     no3_out:  Mapped[float | None] = mapped_column(Double)
     orgp_out: Mapped[float | None] = mapped_column(Double)
     chla_out: Mapped[float | None] = mapped_column(Double)
+
+class SwatImportFile(Base):
+    """Empreinte des fichiers importés par scénario (imports incrémentaux)."""
+    __tablename__ = "swat_import_files"
+    __table_args__ = {"schema": "swat_sebou"}
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    file_name: Mapped[str] = mapped_column(Text, primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    mtime_ns: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    rows: Mapped[int | None] = mapped_column(BigInteger)
+    imported_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+class SwatImportJob(Base):
+    """Imports d'archives TxtInOut déposées via l'API (file partagée entre l'API et les processus d'import)."""
+    __tablename__ = "swat_import_jobs"
+    __table_args__ = (
+        CheckConstraint("status IN ('uploading', 'queued', 'running', 'done', 'failed')",
+                        name="ck_swat_import_jobs_status"),
+        Index("ix_swat_import_jobs_submitted", "submitted_at"),
+        {"schema": "swat_sebou"},
+    )
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    scenario: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False)
+    # hôte:pid du processus qui dépose puis importe l'archive (travaux orphelins après redémarrage)
+    owner: Mapped[str] = mapped_column(Text, nullable=False)
+    submitted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    seconds: Mapped[float | None] = mapped_column(Double)
+    scenario_id: Mapped[int | None] = mapped_column(Integer)
+    # Processus de lecture demandés au dépôt (None : un par fichier)
+    workers: Mapped[int | None] = mapped_column(Integer)
+    rows: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    files: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default="{}")
+    error: Mapped[str | None] = mapped_column(Text)
+
+class SwatReservoir(Base):
+    """Réservoirs du modèle (commandes routres de fig.fig) et barrage ABHS correspondant."""
+    __tablename__ = "swat_reservoirs"
+    __table_args__ = {"schema": "swat_sebou"}
+
+    res: Mapped[int] = mapped_column(Integer, primary_key=True)
+    subbasin: Mapped[int | None] = mapped_column(Integer)
+    # public.barrages_abhs.id (renseigné à la main : le modèle ne connaît pas les barrages)
+    barrage_id: Mapped[int | None] = mapped_column(Integer, index=True)
+
+class SwatStationReach(Base):
+    """Station de jaugeage (public.stations_abhs) contrôlant un tronçon du modèle."""
+    __tablename__ = "swat_station_reach"
+    __table_args__ = (
+        Index("ix_swat_station_reach_reach", "reach", "station_id"),
+        {"schema": "swat_sebou"},
+    )
+
+    station_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    reach: Mapped[int] = mapped_column(Integer, nullable=False)
+
+class SwatReservoirResult(Base):
+    __tablename__ = "swat_reservoir_results"
+    __table_args__ = {"schema": "swat_sebou"}
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    res: Mapped[int] = mapped_column(Integer, primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    volume:   Mapped[float | None] = mapped_column(Double)
+    flow_in:  Mapped[float | None] = mapped_column(Double)
+    flow_out: Mapped[float | None] = mapped_column(Double)
+    precip:   Mapped[float | None] = mapped_column(Double)
+    evap:     Mapped[float | None] = mapped_column(Double)
+    seepage:  Mapped[float | None] = mapped_column(Double)
+    sed_in:   Mapped[float | None] = mapped_column(Double)
+    sed_out:  Mapped[float | None] = mapped_column(Double)
+    sed_conc: Mapped[float | None] = mapped_column(Double)
+
+class SwatSedimentResult(Base):
+    __tablename__ = "swat_sediment_results"
+    # Clé naturelle (scénario, tronçon, date) : sert d'index aux séries temporelles
+    __table_args__ = (
+        Index("ix_swat_sediment_results_date_brin", "date", postgresql_using="brin"),
+        {"schema": "swat_sebou", "postgresql_partition_by": "RANGE (date)"},
+    )
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    reach: Mapped[int] = mapped_column(Integer, primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    sed_in:   Mapped[float | None] = mapped_column(Double)
+    sed_out:  Mapped[float | None] = mapped_column(Double)
+    sand_in:  Mapped[float | None] = mapped_column(Double)
+    sand_out: Mapped[float | None] = mapped_column(Double)
+    silt_in:  Mapped[float | None] = mapped_column(Double)
+    silt_out: Mapped[float | None] = mapped_column(Double)
+    clay_in:  Mapped[float | None] = mapped_column(Double)
+    clay_out: Mapped[float | None] = mapped_column(Double)
+    smag_in:  Mapped[float | None] = mapped_column(Double)
+    smag_out: Mapped[float | None] = mapped_column(Double)
+    lag_in:   Mapped[float | None] = mapped_column(Double)
+    lag_out:  Mapped[float | None] = mapped_column(Double)
+    gra_in:   Mapped[float | None] = mapped_column(Double)
+    gra_out:  Mapped[float | None] = mapped_column(Double)
+    ch_bnk:   Mapped[float | None] = mapped_column(Double)
+    ch_bed:   Mapped[float | None] = mapped_column(Double)
+    ch_dep:   Mapped[float | None] = mapped_column(Double)
+    fp_dep:   Mapped[float | None] = mapped_column(Double)
+    tss:      Mapped[float | None] = mapped_column(Double)
+
+class SwatOutletResult(Base):
+    """Débit et qualité journaliers enregistrés par saveconc (watout.dat)."""
+    __tablename__ = "swat_outlet_results"
+    __table_args__ = (
+        Index("ix_swat_outlet_results_date_brin", "date", postgresql_using="brin"),
+        {"schema": "swat_sebou", "postgresql_partition_by": "RANGE (date)"},
+    )
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    reach: Mapped[int] = mapped_column(Integer, primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    flow:   Mapped[float | None] = mapped_column(Double)
+    sed:    Mapped[float | None] = mapped_column(Double)
+    orgn:   Mapped[float | None] = mapped_column(Double)
+    orgp:   Mapped[float | None] = mapped_column(Double)
+    no3:    Mapped[float | None] = mapped_column(Double)
+    nh3:    Mapped[float | None] = mapped_column(Double)
+    no2:    Mapped[float | None] = mapped_column(Double)
+    minp:   Mapped[float | None] = mapped_column(Double)
+    cbod:   Mapped[float | None] = mapped_column(Double)
+    disox:  Mapped[float | None] = mapped_column(Double)
+    chla:   Mapped[float | None] = mapped_column(Double)
+    solpst: Mapped[float | None] = mapped_column(Double)
+    sorpst: Mapped[float | None] = mapped_column(Double)
+    bactp:  Mapped[float | None] = mapped_column(Double)
+    bactlp: Mapped[float | None] = mapped_column(Double)
+    temp:   Mapped[float | None] = mapped_column(Double)
+
+class SwatHru(Base):
+    """HRU d'un scénario (en-têtes des fichiers .hru/.sol de TxtInOut)."""
+    __tablename__ = "swat_hrus"
+    __table_args__ = (
+        Index("ix_swat_hrus_subbasin", "scenario_id", "subbasin"),
+        Index("ix_swat_hrus_landuse", "scenario_id", "landuse"),
+        Index("ix_swat_hrus_soil", "scenario_id", "soil"),
+        {"schema": "swat_sebou"},
+    )
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    hru: Mapped[int] = mapped_column(Integer, primary_key=True)
+    subbasin: Mapped[int] = mapped_column(Integer, nullable=False)
+    hru_sub: Mapped[int] = mapped_column(Integer, nullable=False)
+    landuse: Mapped[str | None] = mapped_column(Text)
+    soil: Mapped[str | None] = mapped_column(Text)
+    slope: Mapped[str | None] = mapped_column(Text)
+    hydgrp: Mapped[str | None] = mapped_column(String(4))
+
+class SwatInputParam(Base):
+    """Paramètres d'entrée SWAT (une valeur par ligne ; hru = 0 pour les fichiers de sous-bassin)."""
+    __tablename__ = "swat_input_params"
+    __table_args__ = (
+        Index("ix_swat_input_params_subbasin", "scenario_id", "subbasin", "hru"),
+        Index("ix_swat_input_params_hru", "scenario_id", "hru"),
+        {"schema": "swat_sebou"},
+    )
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    file_type: Mapped[str] = mapped_column(String(4), primary_key=True)
+    param: Mapped[str] = mapped_column(String(16), primary_key=True)
+    subbasin: Mapped[int] = mapped_column(Integer, primary_key=True)
+    hru: Mapped[int] = mapped_column(Integer, primary_key=True)
+    idx: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    value: Mapped[float | None] = mapped_column(Double)
+
+class SwatReach(Base):
+    """Topologie de routage d'un scénario (fig.fig) : tronçon aval et surfaces."""
+    __tablename__ = "swat_reaches"
+    __table_args__ = {"schema": "swat_sebou"}
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    reach: Mapped[int] = mapped_column(Integer, primary_key=True)
+    downstream: Mapped[int | None] = mapped_column(Integer)
+    area_km2: Mapped[float | None] = mapped_column(Double)
+    drainage_km2: Mapped[float | None] = mapped_column(Double)
+
+class SwatReachUpstream(Base):
+    """Fermeture transitive amont : un couple (tronçon, sous-bassin contributeur) par ligne."""
+    __tablename__ = "swat_reach_upstream"
+    __table_args__ = (
+        Index("ix_swat_reach_upstream_upstream", "scenario_id", "upstream"),
+        {"schema": "swat_sebou"},
+    )
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    reach: Mapped[int] = mapped_column(Integer, primary_key=True)
+    upstream: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Surface du sous-bassin amont (pondération des agrégations)
+    area_km2: Mapped[float | None] = mapped_column(Double)
+
+class SwatClimateStation(Base):
+    """Stations des forçages SWAT (en-tête des fichiers pcpN.pcp / tmpN.tmp)."""
+    __tablename__ = "swat_climate_stations"
+    __table_args__ = {"schema": "swat_sebou"}
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    source: Mapped[str] = mapped_column(Text, primary_key=True)
+    station: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str | None] = mapped_column(Text)
+    lat: Mapped[float | None] = mapped_column(Double)
+    lon: Mapped[float | None] = mapped_column(Double)
+    elev: Mapped[float | None] = mapped_column(Double)
+
+class SwatClimateForcing(Base):
+    """Forçages journaliers : pluie (pcp) ou températures (tmax, tmin) selon le fichier source."""
+    __tablename__ = "swat_climate_forcing"
+    __table_args__ = {"schema": "swat_sebou"}
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    source: Mapped[str] = mapped_column(Text, primary_key=True)
+    station: Mapped[int] = mapped_column(Integer, primary_key=True)
+    date: Mapped[date] = mapped_column(Date, primary_key=True)
+    pcp:  Mapped[float | None] = mapped_column(Double)
+    tmax: Mapped[float | None] = mapped_column(Double)
+    tmin: Mapped[float | None] = mapped_column(Double)
+
+class SwatSubbasinSummary(Base):
+    """Synthèse précalculée (import) par scénario, paramètre et sous-bassin."""
+    __tablename__ = "swat_subbasin_summary"
+    __table_args__ = {"schema": "swat_sebou"}
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    param: Mapped[str] = mapped_column(String(16), primary_key=True)
+    subbasin: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    mean: Mapped[float | None] = mapped_column(Double)
+    min:  Mapped[float | None] = mapped_column(Double)
+    max:  Mapped[float | None] = mapped_column(Double)
+    p10:  Mapped[float | None] = mapped_column(Double)
+    p50:  Mapped[float | None] = mapped_column(Double)
+    p90:  Mapped[float | None] = mapped_column(Double)
+    n:    Mapped[int | None] = mapped_column(Integer)
+    # Climatologie mensuelle : 12 moyennes (janvier -> décembre)
+    monthly: Mapped[list[float] | None] = mapped_column(ARRAY(Double))
+
+class SwatPackedSeries(Base):
+    """Séries compactes : une ligne par (scénario, table, unité, variable, année), valeurs en float4[]."""
+    __tablename__ = "swat_packed_series"
+    __table_args__ = (
+        CheckConstraint("step IN ('day', 'month', 'year')", name="ck_swat_packed_series_step"),
+        {"schema": "swat_sebou"},
+    )
+
+    scenario_id: Mapped[int] = mapped_column(Integer, ForeignKey("swat_sebou.swat_scenarios.id", ondelete="CASCADE"), primary_key=True)
+    # Table d'origine sans schéma (swat_subbasin_results, swat_reach_results...)
+    source: Mapped[str] = mapped_column(String(40), primary_key=True)
+    unit: Mapped[int] = mapped_column(Integer, primary_key=True)
+    variable: Mapped[str] = mapped_column(String(20), primary_key=True)
+    year: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    step: Mapped[str] = mapped_column(String(5), nullable=False)
+    # Date du premier élément ; l'élément i est daté start_date + (i-1) pas
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    vals: Mapped[list[float | None]] = mapped_column(ARRAY(REAL), nullable=False)
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.db.climate_database import get_climate_db
+from app.db.database import engine
 
 from app.core.logger import get_logger
 log = get_logger("CLIMATE_API")
@@ -118,3 +119,55 @@ def climate_kpis(
 
     row = db.execute(text(sql), {"ts_id": ts_id}).mappings().one()
     return row
+
+
+# =====================================================
+# 5. FORÇAGES SWAT (pcpN.pcp / tmpN.tmp importés dans swat_sebou)
+# =====================================================
+@router.get("/swat-forcing/stations")
+def swat_forcing_stations(scenario_id: int = Query(...)):
+    log.info(f"GET /climate/swat-forcing/stations | scenario_id={scenario_id}")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT s.source, s.station, s.name, s.lat, s.lon, s.elev,
+                   MIN(f.date) AS date_start, MAX(f.date) AS date_end
+            FROM swat_sebou.swat_climate_stations s
+            LEFT JOIN swat_sebou.swat_climate_forcing f
+              ON f.scenario_id = s.scenario_id AND f.source = s.source AND f.station = s.station
+            WHERE s.scenario_id = :sid
+            GROUP BY s.source, s.station, s.name, s.lat, s.lon, s.elev
+            ORDER BY s.source, s.station
+        """), {"sid": scenario_id}).mappings().all()
+
+    log.info(f"→ forcing stations count = {len(rows)}")
+    return rows
+
+
+@router.get("/swat-forcing/timeseries")
+def swat_forcing_timeseries(
+    scenario_id: int = Query(...),
+    source: str = Query(..., description="Fichier de forçage (ex. pcp1.pcp, tmp1.tmp)"),
+    station: int = Query(..., description="Rang de la station dans le fichier (1..n)"),
+    date_start: str | None = None,
+    date_end: str | None = None,
+):
+    log.info(f"GET /climate/swat-forcing/timeseries | {source} station={station}")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT date AS datetime, pcp, tmax, tmin
+            FROM swat_sebou.swat_climate_forcing
+            WHERE scenario_id = :sid AND source = :source AND station = :station
+              AND (CAST(:date_start AS date) IS NULL OR date >= CAST(:date_start AS date))
+              AND (CAST(:date_end AS date) IS NULL OR date <= CAST(:date_end AS date))
+            ORDER BY date
+        """), {
+            "sid": scenario_id,
+            "source": source.lower(),
+            "station": station,
+            "date_start": date_start,
+            "date_end": date_end,
+        }).mappings().all()
+
+    return rows
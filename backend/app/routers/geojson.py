@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.db.session import SessionLocal
+from app.etl.generalize import available_level, generalized_join
 
 router = APIRouter(prefix="/geojson", tags=["geojson"])
 
@@ -79,6 +80,8 @@ def get_layer_geojson(
     simplify: float = Query(0.0, ge=0.0, description="Tolérance simplification (m) en SRID de la table"),
     bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy en EPSG:4326"),
     where: Optional[str] = Query(None, description="Filtre SQL sûr (ex: statut='Actif')"),
+    zoom: Optional[float] = Query(None, ge=0, le=22, description="Zoom d'affichage : géométrie généralisée"),
+    resolution: Optional[float] = Query(None, gt=0, description="Résolution d'affichage (m/pixel), à défaut du zoom"),
 ):
     if layer_key not in CATALOG:
         raise HTTPException(status_code=404, detail=f"Layer inconnu: {layer_key}")
@@ -87,7 +90,7 @@ def get_layer_geojson(
 
     # WHERE dynamique sécurisé au minimum : pas de ; ni DROP etc. (soft guard)
     filters = []
-    bbox_sql = _sql_bbox(bbox, geom_col)
+    bbox_sql = _sql_bbox(bbox, f"t.{geom_col}")
     if bbox_sql:
         filters.append(bbox_sql)
 
@@ -101,22 +104,34 @@ def get_layer_geojson(
 
     where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
 
-    # Simplification éventuelle (dans le SRID natif de la table)
-    geom_expr = geom_col
-    if simplify and simplify > 0:
-        geom_expr = f"ST_SimplifyPreserveTopology({geom_col}, {simplify})"
+    # Géométrie généralisée (pyramide) si un zoom ou une résolution est donné,
+    # sinon simplification éventuelle (dans le SRID natif de la table)
+    params = {}
+    join = ""
+    geom_expr = f"t.{geom_col}"
+    try:
+        level = available_level(db, table, zoom, resolution)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur DB: {e}")
+    if level is not None:
+        join = generalized_join(table)
+        geom_expr = f"COALESCE(g.geom, t.{geom_col})"
+        params.update(gen_source=table, gen_level=level)
+    elif simplify and simplify > 0:
+        geom_expr = f"ST_SimplifyPreserveTopology(t.{geom_col}, {simplify})"
 
     q = f"""
-        SELECT {pk} AS gid,
-               COALESCE({label_prop}::text, '{layer_key}') AS label,
+        SELECT t.{pk} AS gid,
+               COALESCE(t.{label_prop}::text, '{layer_key}') AS label,
                ST_AsGeoJSON(ST_Transform({geom_expr}, 4326))::json AS geometry
-        FROM {table}
+        FROM {table} AS t
+        {join}
         {where_clause}
         {"LIMIT " + str(limit) if limit else ""}
     """
 
     try:
-        rows = db.execute(text(q)).fetchall()
+        rows = db.execute(text(q), params).fetchall()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur DB: {e}")
 
@@ -1,9 +1,12 @@
 # backend/app/routers/layers.py
 from typing import Dict, Optional
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from app.core.geojson_stream import stream_query
+from app.core.tile_cache import TILE_CACHE, layer_version, read_tile, tile_path, write_tile
 from app.db.session import SessionLocal
+from app.etl.generalize import available_level, generalized_join, generalized_missing
 
 router = APIRouter(tags=["layers"])
 
@@ -113,6 +116,9 @@ def _resolve_key(key: str) -> str:
 def get_layer(
     layer_key: str,
     ids: Optional[str] = Query(None, description="Liste d'IDs séparés par des virgules"),
+    zoom: Optional[float] = Query(None, ge=0, le=22, description="Zoom d'affichage : géométrie généralisée"),
+    resolution: Optional[float] = Query(None, gt=0, description="Résolution d'affichage (m/pixel), à défaut du zoom"),
+    stream: bool = Query(False, description="FeatureCollection en flux (curseur serveur, lots d'entités)"),
     db: Session = Depends(get_db),
 ):
     try:
@@ -122,39 +128,59 @@ def get_layer(
         id_col = cfg["id_col"]
         geom_col = cfg["geom_col"]
 
+        params = {}
+        join = ""
+        geometry = f"""CASE
+                        WHEN ST_SRID(t.{geom_col}) = 4326 THEN ST_AsGeoJSON(t.{geom_col})::jsonb
+                        ELSE ST_AsGeoJSON(ST_Transform(t.{geom_col}, 4326))::jsonb
+                    END"""
+        level = available_level(db, table, zoom, resolution)
+        if level is not None:
+            join = generalized_join(table)
+            geometry = f"COALESCE(ST_AsGeoJSON(ST_Transform(g.geom, 4326))::jsonb, {geometry})"
+            params.update(gen_source=table, gen_level=level)
+
         sql = f"""
-        SELECT jsonb_build_object(
-            'type', 'FeatureCollection',
-            'features', COALESCE(jsonb_agg(features.feature), '[]'::jsonb)
-        )
-        FROM (
             SELECT jsonb_build_object(
                 'type', 'Feature',
                 'geometry',
-                    CASE
-                        WHEN ST_SRID({geom_col}) = 4326 THEN ST_AsGeoJSON({geom_col})::jsonb
-                        ELSE ST_AsGeoJSON(ST_Transform({geom_col}, 4326))::jsonb
-                    END,
+                    {geometry},
                 'properties', to_jsonb(t) - '{geom_col}'
             ) AS feature
             FROM {table} AS t
-            WHERE {geom_col} IS NOT NULL
+            {join}
+            WHERE t.{geom_col} IS NOT NULL
         """
 
-        params = {}
         if ids:
             id_list = [i.strip() for i in ids.split(",") if i.strip()]
             if id_list:
                 are_all_numeric = all(x.replace(".", "", 1).isdigit() for x in id_list)
                 placeholders = ", ".join([f":id{i}" for i in range(len(id_list))])
-                sql += f" AND {id_col} IN ({placeholders})"
+                sql += f" AND t.{id_col} IN ({placeholders})"
                 for i, val in enumerate(id_list):
                     params[f"id{i}"] = int(val) if are_all_numeric else val
 
-        sql += ") AS features;"
+        detail = "filtrée" if ids else "complète"
+        if level is not None:
+            detail += f", niveau {level}"
+
+        if stream:
+            # Le flux a sa propre connexion : on rend celle de la session tout de suite
+            db.close()
+            response = stream_query(f"SELECT features.feature::text FROM ({sql}) AS features", params)
+            print(f"✅ Couche {key} en flux depuis {table} ({detail})")
+            return response
 
+        sql = f"""
+        SELECT jsonb_build_object(
+            'type', 'FeatureCollection',
+            'features', COALESCE(jsonb_agg(features.feature), '[]'::jsonb)
+        )
+        FROM ({sql}) AS features;
+        """
         result = db.execute(text(sql), params).scalar()
-        print(f"✅ Couche {key} chargée depuis {table} ({'filtrée' if ids else 'complète'})")
+        print(f"✅ Couche {key} chargée depuis {table} ({detail})")
 
         if not result:
             return {"type": "FeatureCollection", "features": []}
@@ -165,3 +191,123 @@ def get_layer(
     except Exception as e:
         print(f"❌ Erreur chargement couche {layer_key}: {e}")
         raise HTTPException(status_code=500, detail=f"Erreur base de données: {e}")
+
+
+# =====================================================
+# Tuiles vectorielles (Mapbox Vector Tiles)
+# =====================================================
+MVT_EXTENT = 4096
+MVT_BUFFER = 64
+MVT_MAX_ZOOM = 22
+# Demi-circonférence terrestre en EPSG:3857 (mètres)
+WEB_MERCATOR_HALF = 20037508.342789244
+
+_srids: Dict[str, int] = {}
+
+
+def _layer_srid(db: Session, key: str) -> int:
+    """SRID de la géométrie d'une couche (lu une fois, 4326 si la table est vide)."""
+    if key not in _srids:
+        cfg = LAYER_MAP[key]
+        srid = db.execute(text(
+            f"SELECT ST_SRID({cfg['geom_col']}) FROM {cfg['table']} WHERE {cfg['geom_col']} IS NOT NULL LIMIT 1"
+        )).scalar()
+        _srids[key] = srid or 4326
+    return _srids[key]
+
+
+def tile_sql(key: str, srid: int, level: Optional[int] = None) -> str:
+    """
+    ST_AsMVT d'une tuile z/x/y : sélection par l'enveloppe de la tuile dans le
+    SRID de la table (index spatial), simplification à une unité de tuile
+    (tolérance divisée par 2 à chaque zoom), puis découpage par ST_AsMVTGeom.
+    Seuls l'identifiant et le nom sont gardés en attributs.
+
+    Avec un niveau de la pyramide (app.etl.generalize), la géométrie est lue
+    déjà généralisée et en EPSG:3857, sélectionnée par l'index de la pyramide ;
+    les entités ajoutées depuis son calcul sont lues comme sans pyramide.
+    """
+    cfg = LAYER_MAP[key]
+    geom = cfg["geom_col"]
+    geom_3857 = f"t.{geom}" if srid == 3857 else f"ST_Transform(t.{geom}, 3857)"
+    if level is not None:
+        return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS tile,
+                   ST_TileEnvelope(:z, :x, :y, margin => :margin) AS sel,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), {srid}) AS sel_source
+        ),
+        features AS (
+            SELECT t.{cfg["id_col"]}::text AS id, t.{cfg["name_col"]}::text AS name,
+                   ST_AsMVTGeom(g.geom, bounds.tile, {MVT_EXTENT}, {MVT_BUFFER}, true) AS geom
+            FROM {cfg["table"]} AS t
+            {generalized_join(cfg["table"], outer=False)}
+            CROSS JOIN bounds
+            WHERE g.geom && bounds.sel
+            UNION ALL
+            SELECT t.{cfg["id_col"]}::text, t.{cfg["name_col"]}::text,
+                   ST_AsMVTGeom(ST_Simplify({geom_3857}, :tolerance, true), bounds.tile,
+                                {MVT_EXTENT}, {MVT_BUFFER}, true)
+            FROM {cfg["table"]} AS t, bounds
+            WHERE t.{geom} && bounds.sel_source AND {generalized_missing(cfg["table"])}
+        )
+        SELECT ST_AsMVT(features.*, :layer, {MVT_EXTENT}, 'geom')
+        FROM features
+        WHERE geom IS NOT NULL
+    """
+    return f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS tile,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), {srid}) AS sel
+        ),
+        features AS (
+            SELECT t.{cfg["id_col"]}::text AS id, t.{cfg["name_col"]}::text AS name,
+                   ST_AsMVTGeom(ST_Simplify({geom_3857}, :tolerance, true), bounds.tile,
+                                {MVT_EXTENT}, {MVT_BUFFER}, true) AS geom
+            FROM {cfg["table"]} AS t, bounds
+            WHERE t.{geom} && bounds.sel
+        )
+        SELECT ST_AsMVT(features.*, :layer, {MVT_EXTENT}, 'geom')
+        FROM features
+        WHERE geom IS NOT NULL
+    """
+
+
+def render_tile(db: Session, key: str, z: int, x: int, y: int) -> bytes:
+    """Génère la tuile z/x/y d'une couche (b"" si aucune entité)."""
+    unit = 2 * WEB_MERCATOR_HALF / (MVT_EXTENT * 2 ** z)
+    params = {"z": z, "x": x, "y": y, "layer": key, "tolerance": unit,
+              "margin": MVT_BUFFER / MVT_EXTENT}
+    table = LAYER_MAP[key]["table"]
+    level = available_level(db, table, zoom=z)
+    if level is not None:
+        params.update(gen_source=table, gen_level=level)
+    sql = tile_sql(key, _layer_srid(db, key), level)
+    return bytes(db.execute(text(sql), params).scalar() or b"")
+
+
+@router.get("/{layer_key}/tiles/{z}/{x}/{y}.mvt")
+def get_layer_tile(layer_key: str, z: int, x: int, y: int, db: Session = Depends(get_db)):
+    """
+    Tuile vectorielle (MVT) d'une couche de LAYER_MAP ; corps vide si aucune
+    entité. Servie depuis le cache disque tant que la table n'a pas changé.
+    """
+    key = _resolve_key(layer_key)
+    if not 0 <= z <= MVT_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail=f"Tuile hors grille : {z}/{x}/{y}")
+    table = LAYER_MAP[key]["table"]
+    try:
+        # Couche sans compteur de version (python -m app.core.tile_cache --install) : pas de cache
+        version = layer_version(db, table) if TILE_CACHE else None
+        path = tile_path(table, version, z, x, y) if version else None
+        tile = read_tile(path) if path else None
+        status = "hit" if tile is not None else ("miss" if path else "bypass")
+        if tile is None:
+            tile = render_tile(db, key, z, x, y)
+            if path:
+                write_tile(path, tile)
+    except Exception as e:
+        print(f"❌ Erreur tuile {layer_key} {z}/{x}/{y}: {e}")
+        raise HTTPException(status_code=500, detail=f"Erreur base de données: {e}")
+    return Response(content=tile, media_type="application/vnd.mapbox-vector-tile",
+                    headers={"Cache-Control": "public, max-age=3600", "X-Tile-Cache": status})
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from io import StringIO, BytesIO
 import pandas as pd
+from app.core.tile_cache import invalidate_table
 from app.db.session import SessionLocal
 
 router = APIRouter(prefix="/raw", tags=["raw"])
@@ -94,6 +95,7 @@ def update_row(
         query = text(f'UPDATE "{schema}"."{table}" SET {cols} WHERE id = :id')
         db.execute(query, {**data, "id": id})
         db.commit()
+        invalidate_table(schema, table)
         return {"status": "ok", "message": "Ligne mise à jour"}
     except Exception as e:
         db.rollback()
@@ -114,6 +116,7 @@ def delete_row(schema: str, table: str, id: str, db: Session = Depends(get_db)):
         query = text(f'DELETE FROM "{schema}"."{table}" WHERE id = :id')
         db.execute(query, {"id": id})
         db.commit()
+        invalidate_table(schema, table)
         return {"status": "ok", "message": "Ligne supprimée"}
     except Exception as e:
         db.rollback()
@@ -162,6 +165,7 @@ def create_row(schema: str, table: str, data: dict, db: Session = Depends(get_db
         query = text(f'INSERT INTO "{schema}"."{table}" ({cols}) VALUES ({vals}) RETURNING *')
         result = db.execute(query, clean_data)
         db.commit()
+        invalidate_table(schema, table)
         created = result.mappings().first()
         return {"status": "ok", "created": dict(created) if created else None}
 
@@ -0,0 +1,12 @@
+# backend/tests/conftest.py
+import os
+
+import pytest
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def fixtures() -> str:
+    """Dossier des petits fichiers SWAT de test (extraits d'un TxtInOut réel)."""
+    return FIXTURES
@@ -0,0 +1,58 @@
+# backend/tests/test_swat_analysis.py
+import numpy as np
+import pytest
+
+from app.api.v1.swat_analysis import batch_metrics, compute_metrics, to_periods
+
+# Paire 0 : obs 1,2,3,4 / sim 2,2,3,3 (moyennes 2.5 et 2.5)
+#   SSE = 2, SST = 5          -> NSE = 1 - 2/5 = 0.6
+#   cov = 2, SSS = 1          -> r = 2/√5, α = √(1/5), β = 1
+#   KGE = 1 - √((r-1)² + (α-1)²) = 0.437222
+# Paire 1 : obs 2,4,6 / sim 3,5,7 (sim = obs + 1)
+#   SSE = 3, SST = 8          -> NSE = 0.625
+#   r = 1, α = 1, β = 5/4     -> KGE = 0.75, PBIAS = 100·3/12 = 25
+# (couples entrelacés : les paires ne sont pas contiguës)
+OBS = np.array([1, 2, 2, 4, 3, 6, 4], dtype=np.float64)
+SIM = np.array([2, 3, 2, 5, 3, 7, 3], dtype=np.float64)
+CODES = np.array([0, 1, 0, 1, 0, 1, 0])
+
+
+def test_batch_metrics_by_hand():
+    res = batch_metrics(CODES, OBS, SIM, 2)
+    r = 2 / np.sqrt(5)
+    assert res["n"].tolist() == [4, 3]
+    assert res["NSE"] == pytest.approx([0.6, 0.625])
+    assert res["KGE"] == pytest.approx([1 - np.sqrt((r - 1) ** 2 + (np.sqrt(0.2) - 1) ** 2), 0.75])
+    assert res["KGE"][0] == pytest.approx(0.437222, abs=1e-6)
+    assert res["R2"] == pytest.approx([0.8, 1.0])
+    assert res["PBIAS"] == pytest.approx([0.0, 25.0])
+    assert res["RMSE"] == pytest.approx([np.sqrt(0.5), 1.0])
+    assert res["RSR"] == pytest.approx([np.sqrt(2 / 5), np.sqrt(3 / 8)])
+
+
+def test_batch_matches_single_pairs():
+    res = batch_metrics(CODES, OBS, SIM, 2)
+    for k in range(2):
+        one = compute_metrics(OBS[CODES == k], SIM[CODES == k])
+        for m, v in one.items():
+            assert v == pytest.approx(res[m][k], abs=0.01)
+
+
+def test_undefined_metrics_are_none():
+    # Observations constantes : SST = 0, NSE/KGE indéfinis
+    res = compute_metrics([3.0, 3.0, 3.0], [2.0, 3.0, 4.0])
+    assert res["NSE"] is None and res["KGE"] is None and res["R2"] is None
+    assert res["PBIAS"] == 0.0
+
+
+def test_empty_group():
+    res = batch_metrics(np.array([0, 0]), np.array([1.0, 2.0]), np.array([1.0, 2.0]), 2)
+    assert res["n"].tolist() == [2, 0]
+    assert res["NSE"][0] == 1.0 and np.isnan(res["NSE"][1])
+
+
+def test_to_periods():
+    dates = np.array(["1990-01-31", "1990-02-01", "1991-12-31"], dtype="datetime64[D]")
+    assert to_periods(dates, "daily").tolist() == [7335, 7336, 8034]
+    assert to_periods(dates, "monthly").tolist() == [240, 241, 263]
+    assert to_periods(dates, "annual").tolist() == [20, 20, 21]
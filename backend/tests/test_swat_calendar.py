@@ -0,0 +1,76 @@
+# backend/tests/test_swat_calendar.py
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.etl.swat_calendar import SwatCalendar, dates_from_year_day, read_file_cio
+from app.etl.swat_parser import read_swat_frame
+
+CIO = {"nbyr": 2, "iyr": 1990, "idaf": 1, "idal": 365, "iprint": 0, "nyskip": 0}
+
+
+def test_read_file_cio(fixtures):
+    assert read_file_cio(fixtures) == CIO
+    assert read_file_cio(os.path.join(fixtures, "file.cio")) == CIO
+
+
+def test_read_file_cio_missing(tmp_path):
+    (tmp_path / "file.cio").write_text("               2    | NBYR : Number of years simulated\n")
+    with pytest.raises(ValueError, match="iyr"):
+        read_file_cio(str(tmp_path))
+
+
+def test_bounds():
+    cal = SwatCalendar(CIO)
+    assert (cal.timestep, cal.start, cal.end) == ("monthly", date(1990, 1, 1), date(1991, 12, 31))
+    cal = SwatCalendar({**CIO, "idaf": 32, "idal": 59})
+    assert (cal.start, cal.end) == (date(1990, 2, 1), date(1991, 2, 28))
+    # NYSKIP : l'impression démarre au 1er janvier suivant
+    cal = SwatCalendar({**CIO, "idaf": 32, "nyskip": 1})
+    assert cal.start == date(1991, 1, 1)
+
+
+def test_monthly_output_sub(fixtures):
+    df = read_swat_frame(os.path.join(fixtures, "output.sub"))
+    out = SwatCalendar.from_txtinout(fixtures).assign(df, "sub")
+    # Totaux 1990 et moyenne de simulation écartés
+    assert len(out) == 26
+    sub1 = out[out["sub"] == 1]
+    assert sub1["date"].iloc[0] == pd.Timestamp("1990-01-01")
+    assert sub1["date"].iloc[11] == pd.Timestamp("1990-12-01")
+    assert sub1["date"].iloc[12] == pd.Timestamp("1991-01-01")
+    assert sub1["precip"].iloc[12] == pytest.approx(3.838)
+
+
+def test_counter_spans_blocks(fixtures):
+    df = read_swat_frame(os.path.join(fixtures, "output.sub"))
+    cal = SwatCalendar(CIO)
+    whole = cal.assign(df, "sub")
+    cal.reset()
+    parts = pd.concat([cal.assign(df.iloc[:9], "sub"), cal.assign(df.iloc[9:], "sub")])
+    assert parts["date"].tolist() == whole["date"].tolist()
+
+
+def test_inconsistent_month():
+    frame = pd.DataFrame({"sub": [1, 1], "mon": [1.0, 3.0]})
+    with pytest.raises(ValueError, match="Calendrier incohérent"):
+        SwatCalendar(CIO).assign(frame, "sub")
+
+
+def test_daily_and_annual():
+    frame = pd.DataFrame({"rch": [1, 2, 1, 2, 1], "mon": [365.0, 365.0, 1.0, 1.0, 1990.0]})
+    out = SwatCalendar({**CIO, "iprint": 1, "idaf": 365}).assign(frame, "rch")
+    assert out["date"].tolist() == [pd.Timestamp(d) for d in
+                                    ("1990-12-31", "1990-12-31", "1991-01-01", "1991-01-01")]
+
+    frame = pd.DataFrame({"rch": [1, 1, 1], "mon": [1990.0, 1991.0, 2.0]})
+    out = SwatCalendar({**CIO, "iprint": 2}).assign(frame, "rch")
+    assert out["date"].tolist() == [pd.Timestamp("1990-01-01"), pd.Timestamp("1991-01-01")]
+
+
+def test_dates_from_year_day():
+    dates = dates_from_year_day(np.array([1990, 1992, 1992]), np.array([1, 60, 366]))
+    assert dates.tolist() == [date(1990, 1, 1), date(1992, 2, 29), date(1992, 12, 31)]
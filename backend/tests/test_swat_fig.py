@@ -0,0 +1,35 @@
+# backend/tests/test_swat_fig.py
+import pytest
+
+from app.etl.swat_fig import hydrograph_reach, read_fig, reservoir_subbasins, routing_graph, saveconc_reach
+
+
+@pytest.fixture
+def commands(fixtures):
+    return read_fig(fixtures)
+
+
+def test_read_fig(commands):
+    assert [c["command"] for c in commands] == [
+        "subbasin", "subbasin", "subbasin", "route", "route", "add", "route", "add",
+        "routres", "saveconc", "finish",
+    ]
+    assert commands[0]["files"] == ["000010000.sub"]
+    assert commands[3] == {"command": "route", "icode": 2, "hyd": 4, "inum1": 1, "inum2": 1,
+                           "inum3": 0, "files": ["000010000.rte", "000010000.swq"]}
+    assert commands[-1]["icode"] == 0
+
+
+def test_routing_graph(commands):
+    graph = routing_graph(commands)
+    # 1 et 2 rejoignent le tronçon 3, exutoire du bassin
+    assert graph["upstream"] == {1: {1}, 2: {2}, 3: {1, 2, 3}}
+    assert graph["downstream"] == {1: 3, 2: 3, 3: None}
+
+
+def test_reservoir_and_outlet(commands):
+    assert reservoir_subbasins(commands) == {1: 3}
+    assert hydrograph_reach(commands, 5) == 2
+    assert hydrograph_reach(commands, 6) is None
+    assert saveconc_reach(commands, "WATOUT.DAT") == 3
+    assert saveconc_reach(commands, "other.dat") is None
@@ -0,0 +1,54 @@
+# backend/tests/test_swat_jobs.py
+import os
+import zipfile
+
+import pytest
+
+from app.etl import swat_jobs
+from app.etl.swat_jobs import extract_archive
+
+
+def _zip(path, entries: dict) -> str:
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+def test_extract_finds_txtinout(tmp_path, fixtures):
+    with open(os.path.join(fixtures, "file.cio")) as fh:
+        cio = fh.read()
+    archive = _zip(tmp_path / "run.zip", {"projet/Scenarios/TxtInOut/file.cio": cio,
+                                          "projet/Scenarios/TxtInOut/output.sub": "x"})
+    dest = tmp_path / "out"
+    folder = extract_archive(archive, str(dest))
+    assert folder == os.path.join(os.path.realpath(dest), "projet", "Scenarios", "TxtInOut")
+    assert os.path.isfile(os.path.join(folder, "output.sub"))
+
+
+@pytest.mark.parametrize("name", ["../evil.txt", "TxtInOut/../../evil.txt", "/tmp/evil.txt"])
+def test_rejects_paths_outside_dest(tmp_path, name):
+    archive = _zip(tmp_path / "bad.zip", {"TxtInOut/file.cio": "", name: "x"})
+    dest = tmp_path / "out"
+    dest.mkdir()
+    with pytest.raises(ValueError, match="Chemin interdit"):
+        extract_archive(archive, str(dest))
+    # Rien n'est écrit, pas même les entrées valides
+    assert os.listdir(dest) == []
+    assert not (tmp_path / "evil.txt").exists()
+
+
+def test_rejects_oversize_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(swat_jobs, "MAX_UNZIPPED_BYTES", 1000)
+    archive = _zip(tmp_path / "big.zip", {"TxtInOut/file.cio": "", "TxtInOut/output.sub": "0" * 1001})
+    dest = tmp_path / "out"
+    dest.mkdir()
+    with pytest.raises(ValueError, match="trop volumineuse"):
+        extract_archive(archive, str(dest))
+    assert os.listdir(dest) == []
+
+
+def test_requires_file_cio(tmp_path):
+    archive = _zip(tmp_path / "run.zip", {"TxtInOut/output.sub": "x"})
+    with pytest.raises(FileNotFoundError):
+        extract_archive(archive, str(tmp_path / "out"))
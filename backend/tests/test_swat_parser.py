@@ -0,0 +1,50 @@
+# backend/tests/test_swat_parser.py
+import os
+
+import numpy as np
+import pytest
+
+from app.etl.swat_parser import _column_name, iter_swat_records, read_swat_frame, resolve_kind
+
+
+def test_column_name_drops_units():
+    assert _column_name("PRECIPmm") == "precip"
+    assert _column_name("  GW_Qmm") == "gw_q"
+    assert _column_name("LAT Q(mm)") == "lat_q"
+    assert _column_name("FLOWm^3/s") == "flow"
+
+
+def test_resolve_kind():
+    assert resolve_kind("/tmp/TxtInOut/OUTPUT.SUB") == "output.sub"
+    assert resolve_kind("/tmp/x.txt", "output.rch") == "output.rch"
+    with pytest.raises(ValueError):
+        resolve_kind("/tmp/output.std")
+
+
+def test_output_sub_columns_and_values(fixtures):
+    df = read_swat_frame(os.path.join(fixtures, "output.sub"))
+    assert len(df) == 30
+    assert list(df.columns[:3]) == ["sub", "gis", "mon"]
+    assert {"precip", "surq", "gw_q", "wyld", "orgn", "orgp"} <= set(df.columns)
+    first = df.iloc[0]
+    assert (first["sub"], first["mon"]) == (1, 1.0)
+    assert first["precip"] == pytest.approx(84.129)
+    assert first["surq"] == pytest.approx(2.772)
+    # Lignes de synthèse conservées telles quelles (écartées par le calendrier)
+    assert df["mon"].tolist()[24:26] == [1990.0, 1990.0]
+    assert df["mon"].iloc[-1] == pytest.approx(24.6)
+
+
+def test_chunks_match_single_block(fixtures):
+    path = os.path.join(fixtures, "output.sub")
+    blocks = list(iter_swat_records(path, chunk_rows=7))
+    assert [len(b) for b in blocks] == [7, 7, 7, 7, 2]
+    whole = np.concatenate(list(iter_swat_records(path)))
+    assert np.array_equal(np.concatenate(blocks), whole)
+
+
+def test_missing_header(tmp_path):
+    path = tmp_path / "output.sub"
+    path.write_text("SWAT\n\nBIGSUB    1        0    1.46640E+03    84.129\n")
+    with pytest.raises(ValueError, match="En-tête"):
+        list(iter_swat_records(str(path)))